@@ -0,0 +1,46 @@
+"""Time entries
+
+Revision ID: 2f8c6d3a1e47
+Revises: 9e4b7a1c2d58
+Create Date: 2026-10-18 21:12:09.481530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8c6d3a1e47'
+down_revision: Union[str, Sequence[str], None] = '9e4b7a1c2d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('time_entries',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('task_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('minutes', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    sa.Column('client_entry_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_time_entries_task_id_created_at_id', 'time_entries', ['task_id', 'created_at', 'id'], unique=False)
+    op.create_index('ux_time_entries_user_id_client_entry_id', 'time_entries', ['user_id', 'client_entry_id'], unique=True)
+    # Counters are incremented from here on; NULL + n would stay NULL
+    op.execute("UPDATE tasks SET total_minutes = 0 WHERE total_minutes IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_time_entries_user_id_client_entry_id', table_name='time_entries')
+    op.drop_index('ix_time_entries_task_id_created_at_id', table_name='time_entries')
+    op.drop_table('time_entries')
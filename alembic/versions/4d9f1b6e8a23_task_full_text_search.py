@@ -0,0 +1,63 @@
+"""Task full-text search
+
+Revision ID: 4d9f1b6e8a23
+Revises: 7a3e5f9b2c61
+Create Date: 2026-10-18 23:41:09.582731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d9f1b6e8a23'
+down_revision: Union[str, Sequence[str], None] = '7a3e5f9b2c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # Generated, so existing rows are indexed as the column is added
+        op.execute(
+            "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)")
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='rowid', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    # Backfill the index from existing tasks
+    op.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_tasks_search_vector', table_name='tasks')
+        op.drop_column('tasks', 'search_vector')
+        return
+    for trigger in ('tasks_fts_insert', 'tasks_fts_delete', 'tasks_fts_update'):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
@@ -0,0 +1,51 @@
+"""Task rollups for analytics
+
+Revision ID: 7a3e5f9b2c61
+Revises: 2f8c6d3a1e47
+Create Date: 2026-10-18 23:04:52.117406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3e5f9b2c61'
+down_revision: Union[str, Sequence[str], None] = '2f8c6d3a1e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_rollups',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM('TODO', 'IN_PROGRESS', 'DONE', name='taskstatus', create_type=False), nullable=False),
+    sa.Column('tasks', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('minutes', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'status')
+    )
+    op.create_index('ix_task_rollups_day', 'task_rollups', ['day'], unique=False)
+    # Backfill from existing tasks; writes keep the rollups current from here on
+    if op.get_bind().dialect.name == 'postgresql':
+        day = "CAST(timezone('UTC', tasks.created_at) AS DATE)"
+    else:
+        day = "date(tasks.created_at)"
+    op.execute(
+        "INSERT INTO task_rollups (user_id, day, status, tasks, minutes) "
+        f"SELECT tasks.user_id, {day}, "
+        "COALESCE(tasks.status, 'TODO'), COUNT(*), COALESCE(SUM(tasks.total_minutes), 0) "
+        "FROM tasks JOIN users ON users.id = tasks.user_id "
+        "GROUP BY 1, 2, 3"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_rollups_day', table_name='task_rollups')
+    op.drop_table('task_rollups')
@@ -0,0 +1,51 @@
+"""Task filter and sort indexes
+
+Revision ID: 8d21b6e0c4a7
+Revises: 3c9a4f1e7b52
+Create Date: 2026-10-18 11:03:52.470911
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d21b6e0c4a7'
+down_revision: Union[str, Sequence[str], None] = '3c9a4f1e7b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # updated_at is now set on insert; backfill so range filters and keyset
+    # sorting never have to deal with NULLs
+    op.execute("UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL")
+    # SQLite cannot ALTER a column default, so batch mode copies the table
+    # there; CURRENT_TIMESTAMP is spelled the same on both dialects
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.alter_column('updated_at', server_default=sa.text('CURRENT_TIMESTAMP'))
+
+    # The primary key already indexes tasks.id
+    op.drop_index('ix_tasks_id', table_name='tasks')
+
+    op.create_index('ix_tasks_user_id_updated_at_id', 'tasks', ['user_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_tasks_user_id_status_updated_at_id', 'tasks', ['user_id', 'status', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_tasks_user_id_status_created_at_id', 'tasks', ['user_id', 'status', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_tasks_user_id_title_id', 'tasks', ['user_id', 'title', 'id'], unique=False,
+        postgresql_ops={'title': 'text_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_user_id_title_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_status_created_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_status_updated_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_updated_at_id', table_name='tasks')
+    op.create_index(op.f('ix_tasks_id'), 'tasks', ['id'], unique=False)
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.alter_column('updated_at', server_default=None)
@@ -0,0 +1,43 @@
+"""User workload counters
+
+Revision ID: 9e4b7a1c2d58
+Revises: c41d7a2e9b03
+Create Date: 2026-10-18 18:05:41.310274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7a1c2d58'
+down_revision: Union[str, Sequence[str], None] = 'c41d7a2e9b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_workloads',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('open_tasks', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('open_minutes', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    # Backfill from existing tasks; writes keep the counters current from here on
+    op.execute(
+        "INSERT INTO user_workloads (user_id, open_tasks, open_minutes) "
+        "SELECT tasks.user_id, COUNT(*), COALESCE(SUM(tasks.total_minutes), 0) "
+        "FROM tasks JOIN users ON users.id = tasks.user_id "
+        "WHERE tasks.status IS NULL OR tasks.status != 'DONE' "
+        "GROUP BY tasks.user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_workloads')
@@ -0,0 +1,33 @@
+"""Task assigned_by
+
+Revision ID: c41d7a2e9b03
+Revises: 5b7e2c9d4f16
+Create Date: 2026-10-18 16:40:12.905118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7a2e9b03'
+down_revision: Union[str, Sequence[str], None] = '5b7e2c9d4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batch mode so SQLite, which cannot add a constraint in place, copies the table
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.add_column(sa.Column('assigned_by', sa.String(), nullable=True))
+        batch_op.create_foreign_key('tasks_assigned_by_fkey', 'users', ['assigned_by'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_constraint('tasks_assigned_by_fkey', type_='foreignkey')
+        batch_op.drop_column('assigned_by')
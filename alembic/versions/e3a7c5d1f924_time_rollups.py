@@ -0,0 +1,63 @@
+"""Time rollups by day of work
+
+Revision ID: e3a7c5d1f924
+Revises: 4d9f1b6e8a23
+Create Date: 2026-10-19 10:12:37.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c5d1f924'
+down_revision: Union[str, Sequence[str], None] = '4d9f1b6e8a23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _day(column: str) -> str:
+    if op.get_bind().dialect.name == 'postgresql':
+        return f"CAST(timezone('UTC', {column}) AS DATE)"
+    return f"date({column})"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Minutes move out of task_rollups, where they were filed under the
+    # task's creation day, into their own table keyed by the day of work
+    op.create_table('time_rollups',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('minutes', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_index('ix_time_rollups_day', 'time_rollups', ['day'], unique=False)
+    day = _day("COALESCE(time_entries.started_at, time_entries.created_at)")
+    op.execute(
+        "INSERT INTO time_rollups (user_id, day, minutes) "
+        f"SELECT tasks.user_id, {day}, SUM(time_entries.minutes) "
+        "FROM time_entries JOIN tasks ON tasks.id = time_entries.task_id "
+        "JOIN users ON users.id = tasks.user_id "
+        "GROUP BY 1, 2"
+    )
+    with op.batch_alter_table('task_rollups') as batch_op:
+        batch_op.drop_column('minutes')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('task_rollups') as batch_op:
+        batch_op.add_column(sa.Column('minutes', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE task_rollups SET minutes = ("
+        "SELECT COALESCE(SUM(tasks.total_minutes), 0) FROM tasks "
+        "WHERE tasks.user_id = task_rollups.user_id "
+        f"AND {_day('tasks.created_at')} = task_rollups.day "
+        "AND COALESCE(tasks.status, 'TODO') = task_rollups.status)"
+    )
+    op.drop_index('ix_time_rollups_day', table_name='time_rollups')
+    op.drop_table('time_rollups')
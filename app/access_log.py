@@ -0,0 +1,102 @@
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+from app.config import config
+from app.database import QueryTimer
+from app.metrics import registry
+
+access_logger = logging.getLogger("sprintsync.access")
+
+log_records_dropped = registry.counter(
+    "sprintsync_log_records_dropped_total",
+    "Log records discarded because the log queue was full",
+)
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueue without ever waiting: when the queue is full the record is dropped"""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+def configure_logging(stream: Optional[TextIO] = None) -> QueueListener:
+    """Send all logging through a bounded queue drained by a listener thread.
+
+    Request handlers only pay for building the record and a put_nowait();
+    JSON formatting and the write to stdout happen on the listener thread,
+    so a slow stdout can no longer add to request latency. The caller starts
+    and stops the returned listener.
+    """
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter())
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(config.LOG_LEVEL.upper())
+    return QueueListener(log_queue, output, respect_handler_level=True)
+
+def should_log(status: int, latency: float) -> bool:
+    """Errors and slow requests always; other responses at ACCESS_LOG_SAMPLE_RATE"""
+    if status >= 400 or latency * 1000 >= config.ACCESS_LOG_SLOW_MS:
+        return True
+    rate = config.ACCESS_LOG_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+def log_access(method: str, path: str, status: int, user_id: str, latency: float,
+               db: Optional[QueryTimer] = None):
+    """Write one access log entry, subject to sampling.
+
+    ``path`` should be the route template (``/tasks/{task_id}``), not the
+    raw URL, so entries group by endpoint.
+    """
+    if not should_log(status, latency):
+        return
+    slow = latency * 1000 >= config.ACCESS_LOG_SLOW_MS
+    if status >= 500:
+        level = logging.ERROR
+    elif slow:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    access_logger.log(level, "request", extra={
+        "method": method,
+        "path": path,
+        "status": status,
+        "user": user_id,
+        "latency_ms": round(latency * 1000, 2),
+        "db_ms": round(db.seconds * 1000, 2) if db else 0.0,
+        "db_queries": db.queries if db else 0,
+        # Weight for reconstructing totals from sampled entries
+        "sample_rate": 1.0 if status >= 400 or slow else config.ACCESS_LOG_SAMPLE_RATE,
+    })
@@ -0,0 +1,180 @@
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, literal_column, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.metrics import registry
+from app.workload import UPSERT_INSERTS, WorkloadDeltas, apply_workload_deltas
+
+rollup_rebuild_seconds = registry.histogram(
+    "sprintsync_task_rollup_rebuild_seconds",
+    "Time to recount the analytics rollup tables",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+def day_of(moment: datetime) -> date:
+    """UTC calendar day of a timestamp; naive values are taken as UTC"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+class RollupDeltas:
+    """task_rollups and time_rollups changes collected while writing, applied before commit"""
+
+    def __init__(self):
+        self._tasks: Dict[Tuple[str, date, models.TaskStatus], int] = defaultdict(int)
+        self._minutes: Dict[Tuple[str, date], int] = defaultdict(int)
+
+    def add(self, user_id: Optional[str], created_at: datetime, status: Optional[models.TaskStatus],
+            sign: int = 1):
+        if user_id is None:
+            return
+        self._tasks[(user_id, day_of(created_at), status or models.TaskStatus.TODO)] += sign
+
+    def created(self, user_id, created_at, status):
+        self.add(user_id, created_at, status)
+
+    def deleted(self, user_id, created_at, status):
+        self.add(user_id, created_at, status, sign=-1)
+
+    def changed(self, user_id, created_at, old_status, new_status):
+        self.deleted(user_id, created_at, old_status)
+        self.created(user_id, created_at, new_status)
+
+    def logged(self, user_id: Optional[str], worked_at: datetime, minutes: int):
+        """Minutes of work done at ``worked_at`` on a task ``user_id`` owns; negative takes them back"""
+        if user_id is None:
+            return
+        self._minutes[(user_id, day_of(worked_at))] += minutes
+
+    def items(self) -> List[Tuple[str, date, models.TaskStatus, int]]:
+        """Non-zero (user_id, day, status, tasks) changes in key order"""
+        return [
+            (user_id, day, status, tasks)
+            for (user_id, day, status), tasks in sorted(
+                self._tasks.items(), key=lambda item: (item[0][0], item[0][1], item[0][2].name)
+            )
+            if tasks
+        ]
+
+    def minute_items(self) -> List[Tuple[str, date, int]]:
+        """Non-zero (user_id, day, minutes) changes in key order"""
+        return [(user_id, day, minutes) for (user_id, day), minutes in sorted(self._minutes.items()) if minutes]
+
+async def _add_to_rows(db: AsyncSession, table, keys: List[str], column: str, rows: List[dict]):
+    # Database-side increments, like apply_workload_deltas
+    make_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if make_insert is not None:
+        stmt = make_insert(table).values(rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={column: table.c[column] + stmt.excluded[column]},
+        ))
+        return
+    for row in rows:
+        result = await db.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in keys))
+            .values({column: table.c[column] + row[column]})
+        )
+        if result.rowcount == 0:
+            await db.execute(table.insert().values(row))
+
+async def apply_rollup_deltas(db: AsyncSession, deltas: RollupDeltas):
+    """Add the deltas to task_rollups and time_rollups in the caller's transaction.
+
+    Like apply_workload_deltas: database-side increments, rows touched in
+    key order.
+    """
+    tasks = [
+        {"user_id": user_id, "day": day, "status": status, "tasks": count}
+        for user_id, day, status, count in deltas.items()
+    ]
+    if tasks:
+        await _add_to_rows(db, models.TaskRollup.__table__, ["user_id", "day", "status"], "tasks", tasks)
+    minutes = [
+        {"user_id": user_id, "day": day, "minutes": count}
+        for user_id, day, count in deltas.minute_items()
+    ]
+    if minutes:
+        await _add_to_rows(db, models.TimeRollup.__table__, ["user_id", "day"], "minutes", minutes)
+
+class TaskChanges:
+    """Every task written in one transaction, for the counters kept beside tasks.
+
+    Call sites describe each write once; ``apply_task_changes`` then updates
+    both user_workloads and the rollups.
+    """
+
+    def __init__(self):
+        self.workload = WorkloadDeltas()
+        self.rollups = RollupDeltas()
+
+    def created(self, user_id, created_at, status, minutes):
+        self.workload.created(user_id, status, minutes)
+        self.rollups.created(user_id, created_at, status)
+
+    def deleted(self, user_id, created_at, status, minutes):
+        self.workload.deleted(user_id, status, minutes)
+        self.rollups.deleted(user_id, created_at, status)
+
+    def changed(self, user_id, created_at, old_status, old_minutes, new_status, new_minutes):
+        self.workload.changed(user_id, old_status, old_minutes, new_status, new_minutes)
+        self.rollups.changed(user_id, created_at, old_status, new_status)
+
+    def logged(self, user_id, worked_at, minutes):
+        """Time entries added (or, negative, removed); total_minutes goes through ``changed``"""
+        self.rollups.logged(user_id, worked_at, minutes)
+
+async def apply_task_changes(db: AsyncSession, changes: TaskChanges):
+    await apply_workload_deltas(db, changes.workload)
+    await apply_rollup_deltas(db, changes.rollups)
+
+def _day_column(dialect_name: str, column):
+    if dialect_name == "postgresql":
+        return cast(func.timezone(literal_column("'UTC'"), column), Date)
+    # SQLite keeps timestamps as UTC text; date() takes the day part
+    return func.date(column)
+
+async def rebuild_rollups(db: AsyncSession) -> int:
+    """Recount task_rollups and time_rollups from tasks and time entries; returns rows written.
+
+    On Postgres the tables are locked against concurrent deltas first, so a
+    write either lands before the recount reads it or is added on top of it
+    afterwards, never both or neither.
+    """
+    dialect_name = db.get_bind().dialect.name
+    task_rollups, time_rollups = models.TaskRollup.__table__, models.TimeRollup.__table__
+    task, entry = models.Task, models.TimeEntry
+    started_at = time.perf_counter()
+    if dialect_name == "postgresql":
+        await db.execute(text("LOCK TABLE task_rollups, time_rollups IN EXCLUSIVE MODE"))
+    await db.execute(task_rollups.delete())
+    await db.execute(time_rollups.delete())
+    day = _day_column(dialect_name, task.created_at)
+    # Literals rather than bound parameters (here and in _day_column) so
+    # Postgres sees the SELECT and GROUP BY expressions as the same
+    status = func.coalesce(task.status, literal_column(f"'{models.TaskStatus.TODO.name}'"))
+    counts = (
+        select(task.user_id, day, status, func.count())
+        .join(models.User, models.User.id == task.user_id)
+        .group_by(task.user_id, day, status)
+    )
+    result = await db.execute(
+        task_rollups.insert().from_select(["user_id", "day", "status", "tasks"], counts)
+    )
+    rows = result.rowcount
+    worked_on = _day_column(dialect_name, func.coalesce(entry.started_at, entry.created_at))
+    minutes = (
+        select(task.user_id, worked_on, func.sum(entry.minutes))
+        .join(task, task.id == entry.task_id)
+        .join(models.User, models.User.id == task.user_id)
+        .group_by(task.user_id, worked_on)
+    )
+    result = await db.execute(time_rollups.insert().from_select(["user_id", "day", "minutes"], minutes))
+    rollup_rebuild_seconds.observe(time.perf_counter() - started_at)
+    return rows + result.rowcount
@@ -1,42 +1,117 @@
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app import models
+from app.cache import TTLCache
 from app.config import config
 from app.exceptions import InvalidCredentials, InvalidToken, UserNotFound
+from app.hashing import get_password_hash, password_hasher, verify_password
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+@dataclass(frozen=True)
+class Principal:
+    """Detached, read-only snapshot of the authenticated user"""
+    id: str
+    username: str
+    email: str
+    is_admin: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_admin=bool(user.is_admin),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
 
-def get_user(db: Session, username: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
+principal_cache = TTLCache(
+    "principal",
+    max_size=config.PRINCIPAL_CACHE_SIZE,
+    ttl=config.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Called with the username on every local invalidation, e.g. to publish it to
+# other workers. Receivers should call invalidate_principal(..., propagate=False).
+_invalidation_hooks: List[Callable[[str], None]] = []
+
+def register_invalidation_hook(hook: Callable[[str], None]):
+    _invalidation_hooks.append(hook)
+
+def invalidate_principal(username: str, propagate: bool = True):
+    principal_cache.pop(username)
+    if not propagate:
+        return
+    for hook in _invalidation_hooks:
+        try:
+            hook(username)
+        except Exception:
+            logger.exception(f"Principal invalidation hook failed for {username}")
+
+async def get_user(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalars().first()
     if not user:
         raise UserNotFound()
     return user
 
-def authenticate_user(db: Session, username: str, password: str):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
     try:
-        user = get_user(db, username)
-        print(f"User found: {user.username}")
-        print(f"Stored hash: {user.password_hash}")
-        print(f"Password verification: {verify_password(password, user.password_hash)}")
-        if not verify_password(password, user.password_hash):
+        user = await get_user(db, username)
+        if not await password_hasher.verify(password, user.password_hash):
             raise InvalidCredentials()
         return user
     except UserNotFound:
         raise InvalidCredentials()
 
+# Recently verified tokens, keyed by SHA-256 of the token so the cache never
+# holds usable credentials. Entries expire no later than the token's own exp.
+token_cache = TTLCache(
+    "token",
+    max_size=config.TOKEN_CACHE_SIZE,
+    ttl=config.TOKEN_CACHE_TTL_SECONDS,
+)
+
+def decode_access_token(token: str) -> dict:
+    """Verify a bearer token and return its claims, raising InvalidToken"""
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return claims
+
+    try:
+        claims = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
+    except JWTError:
+        raise InvalidToken()
+
+    expires_at = None
+    if isinstance(claims.get("exp"), (int, float)):
+        expires_at = time.monotonic() + (claims["exp"] - time.time())
+    token_cache.set(digest, claims, expires_at=expires_at)
+    return claims
+
+def bearer_token(request: Request) -> Optional[str]:
+    # The scheme is case-insensitive, as in OAuth2PasswordBearer
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -47,19 +122,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    # Reuse the claims the request middleware already verified for this token
+    if getattr(request.state, "token", None) == token:
+        payload = request.state.token_claims
+        if payload is None:
             raise InvalidToken()
-        token_data = {"sub": username}
-    except JWTError:
+    else:
+        payload = decode_access_token(token)
+
+    username: str = payload.get("sub")
+    if username is None:
         raise InvalidToken()
-    
-    user = get_user(db, username=token_data["sub"])
-    return user
+    token_data = {"sub": username}
+
+    principal = principal_cache.get(token_data["sub"])
+    if principal is None:
+        user = await get_user(db, username=token_data["sub"])
+        principal = Principal.from_user(user)
+        principal_cache.set(principal.username, principal)
+    return principal
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)):
 
     return current_user
\ No newline at end of file
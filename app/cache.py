@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from app.metrics import registry
+
+cache_requests = registry.counter(
+    "sprintsync_cache_requests_total",
+    "Lookups against in-process caches by outcome",
+    ["cache", "result"],
+)
+cache_evictions = registry.counter(
+    "sprintsync_cache_evictions_total",
+    "Entries dropped from in-process caches because they were full",
+    ["cache"],
+)
+
+_MISSING = object()
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Meant to be used from the event loop; it is not thread-safe. Entries may
+    carry their own expiry (``set(..., expires_at=...)``) when that is sooner
+    than the default TTL.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            cache_requests.inc(cache=self.name, result="miss")
+            return default
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            cache_requests.inc(cache=self.name, result="expired")
+            return default
+        self._entries.move_to_end(key)
+        cache_requests.inc(cache=self.name, result="hit")
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        default_expiry = self._clock() + self.ttl
+        if expires_at is None or expires_at > default_expiry:
+            expires_at = default_expiry
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            cache_evictions.inc(cache=self.name)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,119 @@
+"""HTTP validators (ETag, Last-Modified) and conditional requests.
+
+A single row's ETag is its version, the ``updated_at`` timestamp in
+microseconds, so an ``If-Match`` header can be turned back into a
+``WHERE updated_at = ...`` guard on the write itself.
+
+Listings have two kinds of ETag. A plain GET hashes the ids and versions
+of the page it just read (``page_etag``), which costs nothing extra. A
+revalidation (If-None-Match) instead runs a ``count(*), max(updated_at)``
+probe over every row the filters match (``collection_etag``): any
+insert, update or delete among them changes one or the other, and a
+match is answered without reading the page. The first revalidation of a
+page tag therefore gets a full response carrying the probe tag; polls
+after that get 304s.
+
+304s are only decided on ``If-None-Match``. Last-Modified is sent for
+information; at one-second resolution it cannot tell apart writes that
+land in the same second.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Clients may keep the body but must revalidate before every use; without
+# it browsers guess a freshness lifetime from Last-Modified and skip polls
+CACHE_CONTROL = "private, no-cache"
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are stored as UTC
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+def row_etag(version: datetime) -> str:
+    """Strong ETag of a single row last written at ``version``"""
+    return f'"{(_as_utc(version) - EPOCH) // timedelta(microseconds=1)}"'
+
+def collection_etag(count: int, last_modified: Optional[datetime], scope: str) -> str:
+    """ETag of a listing from its probe; ``scope`` keeps different users' lists apart"""
+    version = row_etag(last_modified) if last_modified is not None else "-"
+    digest = hashlib.sha1(f"{scope}:{count}:{version}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def page_etag(rows: Iterable[Tuple[str, datetime]], scope: str,
+              *extra) -> Tuple[str, Optional[datetime]]:
+    """ETag and Last-Modified of a page from the (id, version) of its rows.
+
+    ``extra`` is anything else in the body, such as the next cursor.
+    """
+    digest = hashlib.sha1(f"{scope}:".encode())
+    last_modified = None
+    for row_id, version in rows:
+        digest.update(f"{row_id}:{row_etag(version)};".encode())
+        if last_modified is None or _as_utc(version) > last_modified:
+            last_modified = _as_utc(version)
+    for value in extra:
+        digest.update(f"{value};".encode())
+    return f'"p{digest.hexdigest()[:32]}"', last_modified
+
+def revalidating(request: Request) -> bool:
+    """Whether the client sent If-None-Match, i.e. has a copy to validate"""
+    return "if-none-match" in request.headers
+
+def _entity_tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def if_match_versions(request: Request) -> Optional[List[datetime]]:
+    """Versions the client's If-Match accepts, or None when any will do.
+
+    None means there is no If-Match header or it is ``*``. Weak and
+    malformed tags never match (If-Match uses strong comparison), so they
+    are dropped; a header with nothing else left yields an empty list.
+    """
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    tags = _entity_tags(header)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            try:
+                versions.append(EPOCH + timedelta(microseconds=int(tag[1:-1])))
+            except OverflowError:
+                pass
+    return versions
+
+def version_matches(version: datetime, versions: List[datetime]) -> bool:
+    """Whether a row loaded at ``version`` satisfies ``if_match_versions``"""
+    return _as_utc(version) in versions
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+def not_modified(request: Request, response: Response, etag: str,
+                 last_modified: Optional[datetime]) -> Optional[Response]:
+    """A 304 if the client's If-None-Match already has ``etag``.
+
+    Otherwise the validators are set on ``response`` and None is returned,
+    for the endpoint to go on and build the body.
+    """
+    headers = validator_headers(etag, last_modified)
+    header = request.headers.get("if-none-match")
+    if header is not None:
+        # Weak comparison: W/"x" matches "x"
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in _entity_tags(header)]
+        if "*" in tags or etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
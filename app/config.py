@@ -3,15 +3,57 @@ from pydantic import AnyUrl, Field
 
 class Settings(BaseSettings):
     DATABASE_URL: AnyUrl
+    DATABASE_ASYNC_DRIVER: str = ""  # Driver of the async engine that serves every request; defaults to asyncpg for Postgres, aiosqlite for SQLite
+    DB_POOL_SIZE: int = 5  # Connections kept open per worker
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under burst
+    DB_POOL_TIMEOUT: float = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Reconnect after this many seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True  # Check connections before use to drop stale ones
+    DB_PGBOUNCER: bool = False  # Use NullPool and no prepared statement cache behind PgBouncer
+    DB_SLOW_CHECKOUT_MS: float = 100  # Log pool checkouts that wait longer than this
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    HASH_WORKERS: int = 2  # bcrypt workers; each one keeps a CPU core busy
+    HASH_MAX_PENDING: int = 32  # Queued + running hash jobs before returning 503
+    HASH_USE_PROCESSES: bool = False  # Use a process pool instead of threads
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Authenticated users kept in memory; 0 disables
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    TOKEN_CACHE_SIZE: int = 4096  # Verified JWTs kept in memory; 0 disables
+    TOKEN_CACHE_TTL_SECONDS: float = 300  # Upper bound; entries never outlive the token's exp
+    BULK_MAX_ITEMS: int = 500  # Largest batch accepted by the /tasks/bulk endpoints
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per server-side cursor round trip
     GROQ_API_KEY: str = ""
     GROQ_MODEL: str = "openai/gpt-oss-20b"  # Current recommended model
+    GROQ_BASE_URL: str = ""  # Override the Groq endpoint, e.g. a local fake LLM server
+    LLM_TIMEOUT_SECONDS: float = 30  # Per-attempt read timeout for LLM calls
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5
+    LLM_MAX_RETRIES: int = 2  # Retries after timeouts, 429s and 5xx responses
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5  # Base of the jittered exponential backoff
+    LLM_MAX_CONCURRENCY: int = 8  # LLM calls in flight per worker
+    AI_BATCH_MAX_ITEMS: int = 100  # Largest list accepted by /ai/suggest/batch
+    AI_BATCH_CHUNK_SIZE: int = 10  # Titles packed into one LLM prompt
+    AI_BATCH_MAX_CONCURRENCY: int = 4  # Prompts in flight per batch request
+    AI_CACHE_SIZE: int = 1000  # Suggestions kept in memory per worker; 0 disables
+    AI_CACHE_TTL_SECONDS: float = 86400
+    AI_CACHE_PERSIST: bool = False  # Also store suggestions in the ai_suggestions table
     PORT: int = Field(default=8000, env="PORT")
-    PINECONE_API_KEY: str = ""
-    PINECONE_ENVIRONMENT: str = ""
-    PINECONE_INDEX_NAME: str = "user-skills"
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000  # Log records buffered for the writer thread; more are dropped
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # Share of non-error, non-slow requests written to the access log
+    ACCESS_LOG_SLOW_MS: float = 1000  # Requests at least this slow are always logged
+    METRICS_TOKEN: str = ""  # Bearer token required by /metrics; empty leaves it open
+    METRICS_MULTIPROCESS_DIR: str = ""  # Shared directory for per-worker metrics files; empty serves this worker only
+    METRICS_WRITE_INTERVAL_SECONDS: float = 5  # How often each worker rewrites its metrics file
+    SKILLS_INDEX_DIM: int = 1024  # Hashed features per skill profile; 4 KB per user
+    SKILLS_INDEX_PATH: str = ""  # Snapshot file loaded on startup and written on shutdown
+    SKILLS_CANDIDATES: int = 5  # Best-matching users considered by auto-assign
+    SKILLS_UPDATE_DEBOUNCE_SECONDS: float = 2  # Quiet time after a user's last task write before updating their profile
+    SKILLS_UPDATE_MAX_DELAY_SECONDS: float = 30  # Update anyway once the oldest write is this old
+    SKILLS_UPDATE_BATCH_SIZE: int = 200  # Users whose queued task deltas are applied together
+    AUTO_ASSIGN_TASK_WEIGHT: float = 0.1  # Score discount per open task of a candidate
+    AUTO_ASSIGN_HOUR_WEIGHT: float = 0.05  # Score discount per logged hour on a candidate's open tasks
+    ANALYTICS_MAX_DAYS: int = 366  # Longest range /analytics/timeseries returns
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,17 +1,185 @@
-from sqlalchemy import create_engine
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from app.config import config
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Default async driver for each backend when DATABASE_ASYNC_DRIVER is not set
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+pool_checkout_seconds = registry.histogram(
+    "sprintsync_db_pool_checkout_seconds",
+    "Time spent waiting for (or opening) a database connection",
+)
+pool_slow_checkouts = registry.counter(
+    "sprintsync_db_pool_slow_checkouts_total",
+    "Connection checkouts slower than DB_SLOW_CHECKOUT_MS",
+)
+pool_in_use = registry.gauge(
+    "sprintsync_db_pool_in_use",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="sum",
+)
+pool_overflow = registry.gauge(
+    "sprintsync_db_pool_overflow",
+    "Connections open beyond DB_POOL_SIZE",
+    multiprocess_mode="sum",
+)
+
+db_query_seconds = registry.histogram(
+    "sprintsync_db_query_seconds",
+    "Time spent executing a database statement, by kind",
+    ["operation"],
+)
 
 database_url = str(config.DATABASE_URL)
 if database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql://", 1)
 
+def make_async_url(url: str) -> str:
+    """Rewrite a sync database URL so it uses an asyncio driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = config.DATABASE_ASYNC_DRIVER or ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+class _TimedCheckoutMixin:
+    """Times every checkout, including the wait for a free connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            pool_checkout_seconds.observe(waited)
+            if waited * 1000 > config.DB_SLOW_CHECKOUT_MS:
+                pool_slow_checkouts.inc()
+                logger.warning(f"Slow database pool checkout: {waited * 1000:.1f}ms ({self.status()})")
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+def _prepared_statement_name() -> str:
+    # Unique per statement: asyncpg's own names repeat across clients and
+    # clash on a server connection PgBouncer shares between them
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+def async_engine_options(url: str) -> dict:
+    """Pool settings for the request-serving engine, taken from Settings"""
+    parsed = make_url(url)
+    if config.DB_PGBOUNCER:
+        options = {"poolclass": InstrumentedNullPool}
+        if parsed.get_backend_name() == "postgresql":
+            # PgBouncer in transaction mode cannot keep prepared statements:
+            # turn off asyncpg's and SQLAlchemy's caches, and name the
+            # statements SQLAlchemy still prepares uniquely
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _prepared_statement_name,
+            }
+        return options
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives inside a single connection; keep the default pool
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+class QueryTimer:
+    """Database time spent while serving one request"""
+    __slots__ = ("seconds", "queries")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+# Set per request by the access log middleware. SQLAlchemy runs async
+# engine events in a greenlet that shares the caller's context, so the
+# listeners below see the request's timer.
+query_timer: ContextVar[Optional[QueryTimer]] = ContextVar("query_timer", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_clock(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started_at"] = time.perf_counter()
+
+def _operation(cursor, context) -> str:
+    if context is not None:
+        if context.isinsert:
+            return "insert"
+        if context.isupdate:
+            return "update"
+        if context.isdelete:
+            return "delete"
+    return "select" if cursor.description is not None else "other"
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_clock(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"]
+    db_query_seconds.observe(elapsed, operation=_operation(cursor, context))
+    timer = query_timer.get()
+    if timer is not None:
+        timer.seconds += elapsed
+        timer.queries += 1
+
+def pool_status(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=config.DB_MAX_OVERFLOW,  # What the pool was built with
+            timeout=pool.timeout(),
+        )
+    return status
+
+# The sync engine is only used for schema management (create_all, Alembic)
+# and offline scripts; request handlers go through the async engine below.
 engine = create_engine(database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async_engine = create_async_engine(make_async_url(database_url), **async_engine_options(database_url))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+@registry.add_collector
+def _collect_pool_usage():
+    status = pool_status(async_engine.sync_engine.pool)
+    if "checked_out" in status:
+        pool_in_use.set(status["checked_out"])
+        pool_overflow.set(status["overflow"])
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def get_session_factory():
+    """For responses that outlive the request's get_db session, e.g. streaming"""
+    return AsyncSessionLocal
@@ -32,6 +32,26 @@ class InvalidToken(SprintSyncException):
     """User has provided an invalid or expired token"""
     pass
 
+class InvalidCursor(SprintSyncException):
+    """Client sent a pagination cursor that could not be decoded"""
+    pass
+
+class BatchTooLarge(SprintSyncException):
+    """Client sent more items in one bulk request than the server accepts"""
+    pass
+
+class InvalidDateRange(SprintSyncException):
+    """Client asked for a date range that is reversed or longer than allowed"""
+    pass
+
+class ServiceBusy(SprintSyncException):
+    """The server is temporarily out of capacity for this kind of work"""
+    pass
+
+class PreconditionFailed(SprintSyncException):
+    """Client sent If-Match with a version the resource no longer has"""
+    pass
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -109,6 +129,65 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid",
+                "resolution": "Restart from the first page",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        BatchTooLarge,
+        create_exception_handler(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            initial_detail={
+                "message": "Too many items in one bulk request",
+                "resolution": "Split the request into smaller batches",
+                "error_code": "batch_too_large",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidDateRange,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Date range is invalid",
+                "resolution": "Make start no later than end and stay within the maximum span",
+                "error_code": "invalid_date_range",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ServiceBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy, please retry shortly",
+                "error_code": "service_busy",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        PreconditionFailed,
+        create_exception_handler(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            initial_detail={
+                "message": "Resource was modified since it was read",
+                "resolution": "Fetch it again and retry with its current ETag",
+                "error_code": "precondition_failed",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
         return JSONResponse(
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+from app.config import config
+from app.exceptions import ServiceBusy
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+hash_queue_wait = registry.histogram(
+    "sprintsync_hash_queue_wait_seconds",
+    "Time a password hash/verify job waited for a hashing worker",
+    ["operation"],
+)
+hash_duration = registry.histogram(
+    "sprintsync_hash_duration_seconds",
+    "Time spent inside bcrypt for a password hash/verify job",
+    ["operation"],
+)
+hash_rejected = registry.counter(
+    "sprintsync_hash_rejected_total",
+    "Hash/verify jobs rejected because the hashing queue was full",
+    ["operation"],
+)
+hash_pending = registry.gauge(
+    "sprintsync_hash_pending",
+    "Hash/verify jobs queued or running on the hashing executor",
+    multiprocess_mode="sum",
+)
+
+def verify_password(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+def get_password_hash(password):
+    return pwd_context.hash(password)
+
+def _timed_job(operation: str, submitted_at: float, func, *args):
+    # Runs on the worker; the returned timings are recorded by the caller so
+    # this also works when the worker lives in another process.
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded executor so it never blocks the event loop.
+
+    At most ``max_pending`` jobs may be queued or running at once; beyond that
+    callers get ``ServiceBusy`` (503) instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self._pending >= self.max_pending:
+            hash_rejected.inc(operation=operation)
+            logger.warning(f"Hashing queue full ({self._pending} pending), rejecting {operation}")
+            raise ServiceBusy()
+
+        self._pending += 1
+        hash_pending.set(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited, took = await loop.run_in_executor(
+                self._get_executor(), _timed_job, operation, time.time(), func, *args
+            )
+        finally:
+            self._pending -= 1
+            hash_pending.set(self._pending)
+
+        hash_queue_wait.observe(max(waited, 0.0), operation=operation)
+        hash_duration.observe(took, operation=operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    workers=config.HASH_WORKERS,
+    max_pending=config.HASH_MAX_PENDING,
+    use_processes=config.HASH_USE_PROCESSES,
+)
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Optional
+
+import groq
+import httpx
+from fastapi import Request
+from langchain_groq import ChatGroq
+
+from app.config import config
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single backoff sleep, whatever the attempt number.
+MAX_BACKOFF_SECONDS = 8.0
+
+# Errors worth another attempt: timeouts, dropped connections, 429 and 5xx.
+RETRYABLE_ERRORS = (
+    groq.APIConnectionError,
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+
+llm_queue_wait = registry.histogram(
+    "sprintsync_llm_queue_wait_seconds",
+    "Time an LLM call waited for a concurrency slot",
+)
+llm_duration = registry.histogram(
+    "sprintsync_llm_request_seconds",
+    "Wall time of an LLM call including retries",
+    ["outcome"],
+)
+llm_first_token = registry.histogram(
+    "sprintsync_llm_first_token_seconds",
+    "Time from starting a streamed LLM call to its first token",
+)
+llm_retries = registry.counter(
+    "sprintsync_llm_retries_total",
+    "LLM attempts retried after a transient error",
+    ["error"],
+)
+llm_in_flight = registry.gauge(
+    "sprintsync_llm_in_flight",
+    "LLM calls currently holding a concurrency slot",
+    multiprocess_mode="sum",
+)
+
+def backoff_delay(attempt: int, base: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, base * 2**attempt), capped."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base * 2 ** attempt))
+
+class LLMClient:
+    """Shared chat model for the /ai routes, created once per application.
+
+    Calls go through the async Groq client so they never block the event
+    loop. At most ``max_concurrency`` calls are in flight at once; the rest
+    wait for a slot. Transient failures are retried here with jittered
+    backoff, so the underlying client is built with ``max_retries=0``.
+    """
+
+    def __init__(
+        self,
+        chat: ChatGroq,
+        http_client: httpx.AsyncClient,
+        max_concurrency: int,
+        max_retries: int,
+        backoff: float,
+    ):
+        self.chat = chat
+        self.http_client = http_client
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.chat.model_name
+
+    async def complete(self, prompt: str) -> str:
+        started_at = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self._semaphore:
+                llm_queue_wait.observe(time.perf_counter() - started_at)
+                self._in_flight += 1
+                llm_in_flight.set(self._in_flight)
+                try:
+                    response = await self._invoke_with_retries(prompt)
+                finally:
+                    self._in_flight -= 1
+                    llm_in_flight.set(self._in_flight)
+            outcome = "ok"
+            return response.content
+        finally:
+            llm_duration.observe(time.perf_counter() - started_at, outcome=outcome)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield completion text as it arrives.
+
+        Retries only happen before the first token; once text has been
+        handed to the caller an error is raised as-is.
+        """
+        started_at = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self._semaphore:
+                llm_queue_wait.observe(time.perf_counter() - started_at)
+                self._in_flight += 1
+                llm_in_flight.set(self._in_flight)
+                try:
+                    attempt = 0
+                    while True:
+                        chunks = self.chat.astream(prompt)
+                        try:
+                            first = await chunks.__anext__()
+                            break
+                        except StopAsyncIteration:
+                            first = None
+                            break
+                        except RETRYABLE_ERRORS as e:
+                            await chunks.aclose()
+                            await self._before_retry(attempt, e)
+                            attempt += 1
+
+                    llm_first_token.observe(time.perf_counter() - started_at)
+                    try:
+                        if first is not None:
+                            yield first.content
+                            async for chunk in chunks:
+                                yield chunk.content
+                    finally:
+                        await chunks.aclose()
+                finally:
+                    self._in_flight -= 1
+                    llm_in_flight.set(self._in_flight)
+            outcome = "ok"
+        finally:
+            llm_duration.observe(time.perf_counter() - started_at, outcome=outcome)
+
+    async def _invoke_with_retries(self, prompt: str):
+        attempt = 0
+        while True:
+            try:
+                return await self.chat.ainvoke(prompt)
+            except RETRYABLE_ERRORS as e:
+                await self._before_retry(attempt, e)
+                attempt += 1
+
+    async def _before_retry(self, attempt: int, error: Exception):
+        """Sleep before retry ``attempt + 1``, or re-raise once retries run out."""
+        if attempt >= self.max_retries:
+            raise error
+        delay = backoff_delay(attempt, self.backoff)
+        llm_retries.inc(error=type(error).__name__)
+        logger.warning(
+            f"LLM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+def create_llm_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    http_client: Optional[httpx.AsyncClient] = None,
+    max_concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+) -> Optional[LLMClient]:
+    """Build the LLM client from settings; returns None without an API key."""
+    api_key = api_key if api_key is not None else config.GROQ_API_KEY
+    if not api_key:
+        return None
+    max_concurrency = max_concurrency or config.LLM_MAX_CONCURRENCY
+    if http_client is None:
+        # One keep-alive pool for the lifetime of the app, sized to the
+        # concurrency limit so every slot can reuse a warm connection.
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                config.LLM_TIMEOUT_SECONDS, connect=config.LLM_CONNECT_TIMEOUT_SECONDS
+            ),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+    async_client = groq.AsyncGroq(
+        api_key=api_key,
+        base_url=base_url or config.GROQ_BASE_URL or None,
+        max_retries=0,
+        http_client=http_client,
+    )
+    chat = ChatGroq(
+        model_name=config.GROQ_MODEL,
+        groq_api_key=api_key,
+        async_client=async_client.chat.completions,
+        max_retries=0,
+    )
+    return LLMClient(
+        chat,
+        http_client,
+        max_concurrency=max_concurrency,
+        max_retries=config.LLM_MAX_RETRIES if max_retries is None else max_retries,
+        backoff=config.LLM_RETRY_BACKOFF_SECONDS if backoff is None else backoff,
+    )
+
+def get_llm(request: Request) -> Optional[LLMClient]:
+    """The application's LLM client, or None when no API key is configured."""
+    return getattr(request.app.state, "llm", None)
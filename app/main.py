@@ -1,19 +1,56 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from app.database import engine
+from fastapi.responses import Response
+from app.access_log import configure_logging
+from app.config import config
+from app.database import AsyncSessionLocal, async_engine, engine
 from app.models import Base
-from app.router import auth, tasks, ai, users
-from app.exceptions import register_all_errors
+from app.router import auth, tasks, ai, users, admin, analytics
+from app.exceptions import InvalidToken, register_all_errors
+from app.middleware import AccessLogMiddleware
+from app.hashing import password_hasher
+from app.llm import create_llm_client
+from app.skills import skills_index, skills_updater
+from app.auth import bearer_token
+from app.metrics import PROMETHEUS_CONTENT_TYPE, MetricsFileWriter, merge_metrics_files, registry, render_prometheus
+import asyncio
+import hmac
 import logging
-import time
-from jose import JWTError, jwt
-from app.config import config
 from fastapi.middleware.cors import CORSMiddleware
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# JSON logs, written to stdout by a background thread
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="SprintSync API", version="1.0.0")
+metrics_writer = (
+    MetricsFileWriter(registry, config.METRICS_MULTIPROCESS_DIR, config.METRICS_WRITE_INTERVAL_SECONDS)
+    if config.METRICS_MULTIPROCESS_DIR else None
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener.start()
+    app.state.llm = create_llm_client()
+    try:
+        await skills_index.load_or_build(AsyncSessionLocal)
+    except Exception:
+        logger.exception("Could not load the skills index; auto-assign starts empty")
+    skills_updater.start(AsyncSessionLocal)
+    if metrics_writer is not None:
+        metrics_writer.start()
+    yield
+    if metrics_writer is not None:
+        await metrics_writer.stop()
+    await skills_updater.stop()
+    if skills_index.path:
+        skills_index.save()
+    if app.state.llm is not None:
+        await app.state.llm.aclose()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    log_listener.stop()
+
+app = FastAPI(title="SprintSync API", version="1.0.0", lifespan=lifespan)
 
 # Register all exception handlers
 register_all_errors(app)
@@ -26,6 +63,8 @@ app.include_router(auth.router)
 app.include_router(tasks.router)
 app.include_router(ai.router)
 app.include_router(users.router)
+app.include_router(admin.router)
+app.include_router(analytics.router)
 
 origins = [
     "http://localhost:3000", 
@@ -41,36 +80,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the validators they send back in If-Match
+    expose_headers=["ETag", "Last-Modified"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Try to get user ID from token
-    user_id = "anonymous"
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-        try:
-            payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-            user_id = payload.get("sub", "anonymous")
-        except JWTError:
-            pass  # Keep as anonymous if token is invalid
-    
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
-    
-    logger.info(
-        f"Method={request.method} "
-        f"Path={request.url.path} "
-        f"Status={response.status_code} "
-        f"UserID={user_id} "
-        f"Latency={process_time:.2f}ms"
-    )
-    
-    return response
+# Added last so it is the outermost layer and times everything below it
+app.add_middleware(AccessLogMiddleware)
 
 @app.get("/")
 def read_root():
-    return {"message": "SprintSync API is running!"}
\ No newline at end of file
+    return {"message": "SprintSync API is running!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def read_prometheus_metrics(request: Request):
+    """Prometheus text format; all workers' metrics when METRICS_MULTIPROCESS_DIR is set"""
+    if config.METRICS_TOKEN and not hmac.compare_digest(bearer_token(request) or "", config.METRICS_TOKEN):
+        raise InvalidToken()
+    if metrics_writer is None:
+        exported = registry.export()
+    else:
+        # Refresh our own file first so this worker's numbers are current
+        metrics_writer.write()
+        exported = await asyncio.to_thread(merge_metrics_files, metrics_writer.directory)
+    return Response(render_prometheus(exported), media_type=PROMETHEUS_CONTENT_TYPE)
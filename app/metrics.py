@@ -0,0 +1,377 @@
+import asyncio
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, tuned for request/DB/bcrypt timings
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> LabelKey:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple((name, str(labels[name])) for name in labelnames)
+
+class Metric:
+    """Base class for in-process metrics, safe to update from worker threads"""
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, object] = {}
+
+    def samples(self):
+        with self._lock:
+            return [(dict(key), self._copy(value)) for key, value in self._values.items()]
+
+    def _copy(self, value):
+        return value
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+class Gauge(Metric):
+    """Point-in-time value.
+
+    ``multiprocess_mode`` says how workers are combined when metrics are
+    aggregated across processes: "all" keeps one series per live worker
+    (with a ``worker`` label), "sum" adds the live workers' values.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 multiprocess_mode: str = "all"):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ("all", "sum"):
+            raise ValueError(f"Unknown multiprocess_mode {multiprocess_mode!r}")
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "count": 0, "sum": 0.0, "buckets": [0] * len(self.buckets),
+                }
+            state["count"] += 1
+            state["sum"] += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+
+    def _copy(self, value):
+        return {"count": value["count"], "sum": value["sum"], "buckets": list(value["buckets"])}
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def add_collector(self, collector: Callable[[], None]) -> Callable[[], None]:
+        """Register a callback that refreshes gauges right before they are read"""
+        self._collectors.append(collector)
+        return collector
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              multiprocess_mode: str = "all") -> Gauge:
+        return self._get_or_create(
+            Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode
+        )
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Iterable[float]] = None) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets or DEFAULT_BUCKETS
+        )
+
+    def collect(self):
+        for collector in list(self._collectors):
+            collector()
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view of every metric, used by the admin endpoint"""
+        result = {}
+        for metric in self.collect():
+            entry = {"type": metric.type, "help": metric.documentation, "samples": []}
+            for labels, value in metric.samples():
+                if isinstance(metric, Histogram):
+                    value = dict(value, buckets=dict(zip(map(str, metric.buckets), value["buckets"])))
+                entry["samples"].append({"labels": labels, "value": value})
+            result[metric.name] = entry
+        return result
+
+    def export(self, include_gauges: bool = True) -> dict:
+        """This process's metrics in the format written to multiprocess files"""
+        result = {}
+        for metric in self.collect():
+            if isinstance(metric, Gauge) and not include_gauges:
+                continue
+            entry = {"type": metric.type, "help": metric.documentation, "samples": metric.samples()}
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            if isinstance(metric, Gauge):
+                entry["multiprocess_mode"] = metric.multiprocess_mode
+            result[metric.name] = entry
+        return result
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(exported: dict) -> str:
+    """Prometheus text exposition (format 0.0.4) of an export() result"""
+    lines = []
+    for name, metric in sorted(exported.items()):
+        lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in metric["samples"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            # Bucket counts are already cumulative: observe() bumps every
+            # bucket whose bound is >= the value
+            for bound, count in zip(metric["buckets"], value["buckets"]):
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+            lines.append(f"{name}_bucket{_format_labels(dict(labels, le='+Inf'))} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+# Multi-worker mode: every worker writes its export() to a file in a shared
+# directory and /metrics merges them, like prometheus_client's multiprocess
+# mode. Counters and histograms of exited workers stay in the totals so they
+# never go backwards; their gauges are dropped. Files of exited workers are
+# folded into one archive file by compact_metrics_files().
+
+ARCHIVE_FILE = "metrics-archive.json"
+
+_worker_id: Optional[Tuple[int, str]] = None
+
+def _this_worker() -> Tuple[int, str]:
+    # A fresh id per process: PIDs get reused, and workers forked from a
+    # parent that imported this module would otherwise share its id
+    global _worker_id
+    if _worker_id is None or _worker_id[0] != os.getpid():
+        _worker_id = (os.getpid(), uuid.uuid4().hex[:12])
+    return _worker_id
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:  # The archive
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+@contextlib.contextmanager
+def _locked(directory: str, operation: int):
+    # Readers share the lock; compaction takes it exclusively so a scrape
+    # never sees a worker both in the archive and in its own file
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def write_metrics_file(directory: str, exported: dict, pid: Optional[int] = None):
+    """Write this worker's file, or a file for another ``pid`` with an id of its own"""
+    pid, worker_id = _this_worker() if pid is None else (pid, uuid.uuid4().hex[:12])
+    _write_json(os.path.join(directory, f"metrics-{pid}-{worker_id}.json"), {"pid": pid, "metrics": exported})
+
+def _merge_value(kind: str, current, value):
+    if current is None:
+        return value if kind != "histogram" else dict(value, buckets=list(value["buckets"]))
+    if kind == "histogram":
+        current["count"] += value["count"]
+        current["sum"] += value["sum"]
+        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+        return current
+    return current + value
+
+def _read_metrics_files(directory: str) -> List[Tuple[str, dict]]:
+    workers = []
+    for path in sorted(glob.glob(os.path.join(directory, "metrics-*.json"))):
+        try:
+            with open(path) as f:
+                workers.append((path, json.load(f)))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable metrics file {path}: {e}")
+    return workers
+
+def _merge_workers(workers: Iterable[dict]) -> dict:
+    merged: Dict[str, dict] = {}
+    values: Dict[str, Dict[LabelKey, object]] = {}
+    for worker in workers:
+        alive = _pid_alive(worker["pid"])
+        for name, metric in worker["metrics"].items():
+            kind = metric["type"]
+            if kind == "gauge" and not alive:
+                continue
+            if name not in merged:
+                merged[name] = {key: value for key, value in metric.items() if key != "samples"}
+                values[name] = {}
+            series = values[name]
+            for labels, value in metric["samples"]:
+                if kind == "gauge" and metric.get("multiprocess_mode", "all") == "all":
+                    labels = dict(labels, worker=str(worker["pid"]))
+                key = tuple(labels.items())
+                series[key] = _merge_value(kind, series.get(key), value)
+    for name, metric in merged.items():
+        metric["samples"] = [(dict(key), value) for key, value in values[name].items()]
+    return merged
+
+def merge_metrics_files(directory: str) -> dict:
+    """Combine every worker's metrics file into one export()-shaped dict"""
+    with _locked(directory, fcntl.LOCK_SH):
+        workers = _read_metrics_files(directory)
+    return _merge_workers(worker for _, worker in workers)
+
+def compact_metrics_files(directory: str) -> int:
+    """Fold the files of exited workers into the archive file and delete them.
+
+    Keeps the directory from growing with every worker restart while the
+    totals stay the same. Returns how many files were folded in.
+    """
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    with _locked(directory, fcntl.LOCK_EX):
+        exited = [
+            (path, worker) for path, worker in _read_metrics_files(directory)
+            if not _pid_alive(worker["pid"])
+        ]
+        folded = [path for path, _ in exited if path != archive_path]
+        if not folded:
+            return 0
+        _write_json(archive_path, {"pid": None, "metrics": _merge_workers(worker for _, worker in exited)})
+        for path in folded:
+            os.remove(path)
+    return len(folded)
+
+class MetricsFileWriter:
+    """Writes this worker's metrics file every ``interval`` seconds"""
+
+    def __init__(self, registry: MetricsRegistry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self, include_gauges: bool = True):
+        write_metrics_file(self.directory, self.registry.export(include_gauges=include_gauges))
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Workers that exited since the last start leave their files behind
+        try:
+            compact_metrics_files(self.directory)
+        except OSError as e:
+            logger.warning(f"Could not compact metrics files: {e}")
+        self.write()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Final totals; this worker's gauges stop meaning anything once it exits
+        self.write(include_gauges=False)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write metrics file: {e}")
@@ -0,0 +1,110 @@
+import time
+from typing import NamedTuple
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.access_log import log_access
+from app.auth import bearer_token, decode_access_token
+from app.database import QueryTimer, query_timer
+from app.exceptions import InvalidToken
+from app.metrics import registry
+
+http_request_duration = registry.histogram(
+    "sprintsync_http_request_duration_seconds",
+    "Time to the end of the response, by route template and status class",
+    ["method", "route", "status_class"],
+)
+http_requests_in_flight = registry.gauge(
+    "sprintsync_http_requests_in_flight",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="sum",
+)
+
+# Anything else is counted as "other" so clients cannot mint new series
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+class RequestTiming(NamedTuple):
+    started_at: float
+    method: str
+    user_id: str
+    db: QueryTimer
+
+def begin_request(request: Request) -> RequestTiming:
+    """Start timing ``request`` and verify its bearer token once.
+
+    get_current_user reuses the claims left on ``request.state``.
+    """
+    started_at = time.perf_counter()
+    method = request.method if request.method in HTTP_METHODS else "other"
+    http_requests_in_flight.inc(method=method)
+    timer = QueryTimer()
+    query_timer.set(timer)
+
+    user_id = "anonymous"
+    token = bearer_token(request)
+    if token:
+        request.state.token = token
+        try:
+            request.state.token_claims = decode_access_token(token)
+            user_id = request.state.token_claims.get("sub", "anonymous")
+        except InvalidToken:
+            request.state.token_claims = None  # Keep as anonymous if token is invalid
+    return RequestTiming(started_at, method, user_id, timer)
+
+def finish_request(request: Request, timing: RequestTiming, status_code: int):
+    """Record the request's latency histogram and access log entry"""
+    latency = time.perf_counter() - timing.started_at
+    # The matched route's template keeps /tasks/<uuid> from becoming one
+    # series per task; unmatched requests keep their raw path in the log
+    route = request.scope.get("route")
+    http_requests_in_flight.dec(method=timing.method)
+    http_request_duration.observe(
+        latency,
+        method=timing.method,
+        route=route.path if route is not None else "unmatched",
+        status_class=f"{status_code // 100}xx",
+    )
+    log_access(
+        request.method,
+        route.path if route is not None else request.url.path,
+        status_code,
+        timing.user_id,
+        latency,
+        timing.db,
+    )
+
+class AccessLogMiddleware:
+    """Times, meters and logs every HTTP request as a plain ASGI wrapper.
+
+    Unlike ``@app.middleware("http")`` (Starlette's BaseHTTPMiddleware) it
+    runs the app in the caller's task with no per-request memory stream, and
+    passes every message straight through, so streamed bodies and background
+    tasks behave as without it. The status is read from
+    ``http.response.start`` and latency runs until the app has sent its last
+    body chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        timing = begin_request(request)
+        status_code = 500  # If the app fails before starting a response
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            finish_request(request, timing, status_code)
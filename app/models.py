@@ -1,10 +1,16 @@
-from sqlalchemy import Column, String, Integer, Boolean, Enum, DateTime, ForeignKey
+from sqlalchemy import Column, DDL, String, Integer, Float, Boolean, Date, Enum, DateTime, ForeignKey, Index, Text, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import enum
 
 Base = declarative_base()
 
+def utcnow():
+    # Set client-side as well as via server_default so SQLite keeps sub-second
+    # precision; (created_at, id) keyset pagination relies on it.
+    return datetime.now(timezone.utc)
+
 class TaskStatus(enum.Enum):
     TODO = "todo"
     IN_PROGRESS = "in_progress"
@@ -18,17 +24,152 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     password_hash = Column(String)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    # Client-side like Task.updated_at: it versions the row for ETags, and
+    # SQLite's now() only has whole seconds
+    updated_at = Column(DateTime(timezone=True), onupdate=utcnow)
+
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
 class Task(Base):
     __tablename__ = "tasks"
     
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True)
     title = Column(String, index=True)
     description = Column(String)
     status = Column(Enum(TaskStatus), default=TaskStatus.TODO)
     total_minutes = Column(Integer, default=0)
     user_id = Column(String, ForeignKey("users.id"))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    assigned_by = Column(String, ForeignKey("users.id"), nullable=True)  # Admin who auto-assigned it
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    # Starts out equal to created_at so it can be filtered and keyset-sorted on
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_tasks_user_id_status_updated_at_id", "user_id", "status", "updated_at", "id"),
+        Index("ix_tasks_user_id_status_created_at_id", "user_id", "status", "created_at", "id"),
+        Index(
+            "ix_tasks_user_id_title_id", "user_id", "title", "id",
+            postgresql_ops={"title": "text_pattern_ops"},
+        ),
+    )
+
+# Full-text search over title and description lives outside the model so
+# ORM queries never load it: a weighted tsvector column with a GIN index on
+# Postgres, an FTS5 table kept in step by triggers on SQLite. The migration
+# creates the same objects.
+SEARCH_CONFIG = "english"
+
+for statement in (
+    "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)",
+):
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# External content table: the text stays in tasks, FTS5 only keeps its
+# index, keyed by the tasks rowid
+for statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts (tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO tasks_fts (rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    # Index whatever the table already holds (a no-op when it is new)
+    "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')",
+):
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Task.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
+
+class AISuggestion(Base):
+    """Persisted /ai/suggest results, keyed by model and normalized title"""
+    __tablename__ = "ai_suggestions"
+
+    key = Column(String(64), primary_key=True)  # sha256 of model + normalized title
+    model = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    latency_ms = Column(Float, nullable=False, default=0)  # What the LLM call cost
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), index=True)
+
+class UserWorkload(Base):
+    """Open (not DONE) task count and minutes per user.
+
+    Kept in step with task writes in the same transaction, so auto-assign
+    can read every candidate's load without counting tasks.
+    """
+    __tablename__ = "user_workloads"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    open_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    open_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+
+class TaskRollup(Base):
+    """Task count per owner, UTC creation day and status.
+
+    Task writes apply their changes in the same transaction (see
+    app.analytics), so /analytics reads a few rows per day instead of
+    aggregating the tasks table.
+    """
+    __tablename__ = "task_rollups"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(TaskStatus), primary_key=True)
+    tasks = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_task_rollups_day", "day"),
+    )
+
+class TimeRollup(Base):
+    """Minutes logged per task owner and UTC day the work was done.
+
+    The day is the time entry's started_at, or when it was logged if the
+    client did not say. Kept like TaskRollup: time entries and task
+    deletes apply their changes in the same transaction.
+    """
+    __tablename__ = "time_rollups"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    minutes = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_time_rollups_day", "day"),
+    )
+
+class TimeEntry(Base):
+    """Minutes logged against a task. Rows are only ever appended.
+
+    Each insert also adds its minutes to ``tasks.total_minutes`` in the same
+    transaction. ``client_entry_id`` lets offline timer clients resend a
+    batch without counting any entry twice.
+    """
+    __tablename__ = "time_entries"
+
+    id = Column(String, primary_key=True)
+    task_id = Column(String, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)  # Who logged it
+    minutes = Column(Integer, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)  # When the work began, if the client knows
+    note = Column(String, nullable=True)
+    client_entry_id = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_time_entries_task_id_created_at_id", "task_id", "created_at", "id"),
+        Index("ux_time_entries_user_id_client_entry_id", "user_id", "client_entry_id", unique=True),
+    )
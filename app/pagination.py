@@ -0,0 +1,64 @@
+import base64
+import binascii
+import enum
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, Enum, tuple_
+from sqlalchemy.sql import Select
+from app.exceptions import InvalidCursor
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _load(value, column):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Enum) and column.type.enum_class is not None:
+        return column.type.enum_class(value)
+    return value
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    payload = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: Sequence) -> List:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise InvalidCursor()
+        return [_load(value, column) for value, column in zip(payload, columns)]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor()
+
+def keyset_query(query: Select, columns: Sequence, cursor: Optional[str], limit: int,
+                 descending: bool = False) -> Select:
+    """Order ``query`` by ``columns`` and start it right after ``cursor``.
+
+    The last column must be unique (the primary key) so that pages never
+    overlap or skip rows. One extra row is fetched to tell whether there is
+    a next page; see ``keyset_page``.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key, bound = tuple_(*columns), tuple_(*values)
+        query = query.where(key < bound if descending else key > bound)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+def keyset_page(rows: Sequence, columns: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Split the rows fetched by ``keyset_query`` into a page and the next cursor"""
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return items, next_cursor
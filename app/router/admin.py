@@ -0,0 +1,84 @@
+import time
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.auth import Principal, get_current_active_user
+from app.database import async_engine, get_db, get_session_factory, pool_checkout_seconds, pool_slow_checkouts, pool_status
+from app.exceptions import InsufficientPermission
+from app.metrics import registry
+from app.skills import skills_index, skills_updater
+from app.analytics import rebuild_rollups
+from app.workload import rebuild_workloads
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+async def require_admin(current_user: Principal = Depends(get_current_active_user)):
+    if not current_user.is_admin:
+        raise InsufficientPermission()
+    return current_user
+
+@router.get("/metrics")
+async def read_metrics(current_user: Principal = Depends(require_admin)):
+    return registry.snapshot()
+
+@router.get("/db/pool")
+async def read_pool_status(current_user: Principal = Depends(require_admin)):
+    samples = pool_checkout_seconds.samples()
+    if samples:
+        checkouts = samples[0][1]
+    else:
+        checkouts = {"count": 0, "sum": 0.0, "buckets": [0] * len(pool_checkout_seconds.buckets)}
+    return {
+        **pool_status(async_engine.sync_engine.pool),
+        "slow_checkouts": pool_slow_checkouts.value(),
+        "checkout_seconds": {
+            "count": checkouts["count"],
+            "sum": checkouts["sum"],
+            "buckets": dict(zip(map(str, pool_checkout_seconds.buckets), checkouts["buckets"])),
+        },
+    }
+
+def _skills_status():
+    return {
+        "users": len(skills_index),
+        "tasks": skills_index.documents,
+        "pending_users": skills_updater.pending,
+        "oldest_pending_seconds": skills_updater.oldest_pending_age(),
+    }
+
+@router.get("/skills")
+async def read_skills_status(current_user: Principal = Depends(require_admin)):
+    return _skills_status()
+
+@router.post("/skills/rebuild")
+async def rebuild_skills_index(
+    current_user: Principal = Depends(require_admin),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """Recovery: rebuild every skill profile from the database (this worker only)"""
+    started_at = time.perf_counter()
+    await skills_updater.rebuild(session_factory)
+    if skills_index.path:
+        skills_index.save()
+    return {**_skills_status(), "seconds": time.perf_counter() - started_at}
+
+@router.post("/workloads/rebuild")
+async def rebuild_user_workloads(
+    current_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Recovery: recount open tasks per user after writes that bypassed the API"""
+    started_at = time.perf_counter()
+    users = await rebuild_workloads(db)
+    await db.commit()
+    return {"users": users, "seconds": time.perf_counter() - started_at}
+
+@router.post("/analytics/rebuild")
+async def rebuild_task_rollups(
+    current_user: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Reconcile: recount the analytics rollups from tasks and time entries"""
+    started_at = time.perf_counter()
+    rows = await rebuild_rollups(db)
+    await db.commit()
+    return {"rows": rows, "seconds": time.perf_counter() - started_at}
@@ -1,30 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.database import get_db, get_session_factory
 from app.auth import get_current_active_user
-from app import schemas
+from app import models, schemas
+from app.llm import LLMClient, get_llm
+from app.metrics import registry
 from app.config import config
+from app.exceptions import BatchTooLarge
+from app.skills import skills_index, task_text
+from app.suggestions import normalize_title, suggestion_cache
+from app.analytics import TaskChanges, apply_task_changes
+from app.workload import rank_candidates
+from contextlib import aclosing
+from typing import Dict, List, Optional
+import asyncio
+import json
 import logging
-from langchain_groq import ChatGroq
+import re
+import time
+import uuid
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-@router.post("/suggest")
-async def suggest_task_description(
-    request: schemas.TaskBase,
-    current_user=Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    logger.info(f"AI suggest request from user {current_user.username} for task: '{request.title}'")
-    
-    api_key = config.GROQ_API_KEY
-    
-    if not api_key:
-        logger.warning("GROQ_API_KEY not configured, using fallback implementation")
-        # Better fallback with structure
-        fallback_description = f"""**Objective**: Complete {request.title}
+suggest_first_byte = registry.histogram(
+    "sprintsync_ai_suggest_first_byte_seconds",
+    "Time from a streamed /ai/suggest request to its first event",
+    ["source"],
+)
+suggest_stream_duration = registry.histogram(
+    "sprintsync_ai_suggest_stream_seconds",
+    "Total time to stream an /ai/suggest response",
+    ["source"],
+)
+
+def suggest_prompt(title: str) -> str:
+    return f"""Generate a concise, well-structured task description for: "{title}"
+
+Format the response as follows:
+- Start with a brief 1-2 sentence overview
+- Include 3-5 bullet points of key requirements or steps
+- Keep total response under 150 words
+- Use clear, actionable language
+- Do not include markdown headers or excessive formatting
+
+Task title: {title}"""
+
+MAX_DESCRIPTION_LENGTH = 500
+
+class DescriptionCleaner:
+    """Incremental form of clean_description for streamed completions.
+
+    Feed chunks as they arrive; each call returns the text that is safe to
+    send. Leading/trailing whitespace is stripped, ``**`` and ``##`` are
+    removed even when split across chunks, and the output is cut at
+    MAX_DESCRIPTION_LENGTH with "...". Once ``done`` is set the rest of the
+    completion can be dropped. feed() + finish() over any split of a text
+    gives exactly clean_description(text).
+    """
+
+    def __init__(self, max_length: int = MAX_DESCRIPTION_LENGTH):
+        self.max_length = max_length
+        self.done = False
+        self._started = False
+        self._whitespace = ""  # Trailing whitespace, kept until more text follows
+        self._markers = {"**": "", "##": ""}  # An unpaired marker char at the end
+        self._emitted = 0
+        self._held = ""  # The last chars before the cap, kept until we know it's not hit
+
+    def feed(self, text: str) -> str:
+        return self._process(text, final=False)
+
+    def finish(self) -> str:
+        return self._process("", final=True)
+
+    def _process(self, text: str, final: bool) -> str:
+        if self.done:
+            return ""
+        text = self._strip(text, final)
+        for marker in ("**", "##"):
+            text = self._drop_marker(marker, text, final)
+        return self._cap(text, final)
+
+    def _strip(self, text: str, final: bool) -> str:
+        if final:
+            return ""
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        text = self._whitespace + text
+        stripped = text.rstrip()
+        self._whitespace = text[len(stripped):]
+        return stripped
+
+    def _drop_marker(self, marker: str, text: str, final: bool) -> str:
+        text = self._markers[marker] + text
+        self._markers[marker] = ""
+        # str.replace pairs marker chars left to right, so an odd run at the
+        # end leaves one char that may pair with the start of the next chunk
+        run = len(text) - len(text.rstrip(marker[0]))
+        if run % 2 and not final:
+            self._markers[marker] = marker[0]
+            text = text[:-1]
+        return text.replace(marker, "")
+
+    def _cap(self, text: str, final: bool) -> str:
+        text = self._held + text
+        self._held = ""
+        if self._emitted + len(text) > self.max_length:
+            self.done = True
+            return text[:self.max_length - 3 - self._emitted] + "..."
+        if not final:
+            free = max(self.max_length - 3 - self._emitted, 0)
+            self._held = text[free:]
+            text = text[:free]
+        self._emitted += len(text)
+        return text
+
+def clean_description(text: str) -> str:
+    # Clean up any excessive formatting and ensure it's not too long
+    cleaner = DescriptionCleaner()
+    return cleaner.feed(text) + cleaner.finish()
+
+def fallback_description(title: str) -> str:
+    # Better fallback with structure
+    return f"""**Objective**: Complete {title}
 
 **Key Requirements**:
 - Define clear acceptance criteria
@@ -34,48 +138,257 @@ async def suggest_task_description(
 **Estimated Time**: 2-4 hours
 
 **Priority**: Medium"""
-        return {"description": fallback_description}
+
+def error_description(title: str) -> str:
+    return f"Implement and test {title}. Ensure all requirements are met and code is properly documented."
+
+def wants_event_stream(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _word_chunks(text: str):
+    # Stream canned text the way tokens arrive, a word or so at a time
+    return re.findall(r"\s*\S+", text) or [text]
+
+async def _stream_suggestion(
+    title: str,
+    llm: Optional[LLMClient],
+    session_factory: async_sessionmaker,
+):
+    """SSE body: ``token`` events with text deltas, then one ``done`` event
+    carrying the full description (or ``error`` if the model fails mid-way)."""
+    started_at = time.perf_counter()
+    first_byte_at = None
+    source = "fallback"
+
+    def event(name: str, data: dict) -> str:
+        nonlocal first_byte_at
+        if first_byte_at is None:
+            first_byte_at = time.perf_counter()
+            suggest_first_byte.observe(first_byte_at - started_at, source=source)
+        return _sse(name, data)
+
+    async def canned(description: str):
+        for piece in _word_chunks(description):
+            yield event("token", {"text": piece})
+        yield event("done", {"description": description})
+
+    try:
+        if llm is None:
+            logger.warning("GROQ_API_KEY not configured, streaming fallback implementation")
+            async for chunk in canned(fallback_description(title)):
+                yield chunk
+            return
+
+        async with session_factory() as db:
+            cached = await suggestion_cache.lookup(llm.model_name, title, db)
+        if cached is not None:
+            source = "cache"
+            async for chunk in canned(cached):
+                yield chunk
+            return
+
+        source = "llm"
+        cleaner = DescriptionCleaner()
+        parts = []
+        try:
+            async with aclosing(llm.stream(suggest_prompt(title))) as tokens:
+                async for token in tokens:
+                    text = cleaner.feed(token)
+                    if text:
+                        parts.append(text)
+                        yield event("token", {"text": text})
+                    if cleaner.done:
+                        break
+            text = cleaner.finish()
+            if text:
+                parts.append(text)
+                yield event("token", {"text": text})
+        except Exception as e:
+            logger.error(f"Error streaming AI description: {str(e)}", exc_info=True)
+            if parts:
+                yield event("error", {"message": "AI description was interrupted"})
+                return
+            source = "fallback"
+            async for chunk in canned(error_description(title)):
+                yield chunk
+            return
+
+        description = "".join(parts)
+        logger.info(f"AI response streamed: {len(description)} characters")
+        async with session_factory() as db:
+            await suggestion_cache.store(
+                llm.model_name, title, description, time.perf_counter() - started_at, db
+            )
+        yield event("done", {"description": description})
+    finally:
+        suggest_stream_duration.observe(time.perf_counter() - started_at, source=source)
+
+def _event_stream_response(body) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/suggest")
+async def suggest_task_description(
+    request: schemas.TaskBase,
+    http_request: Request,
+    current_user=Depends(get_current_active_user),
+    llm: Optional[LLMClient] = Depends(get_llm),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    logger.info(f"AI suggest request from user {current_user.username} for task: '{request.title}'")
+
+    if wants_event_stream(http_request):
+        return _event_stream_response(_stream_suggestion(request.title, llm, session_factory))
+    
+    if llm is None:
+        logger.warning("GROQ_API_KEY not configured, using fallback implementation")
+        return {"description": fallback_description(request.title)}
     
     try:
-        chat = ChatGroq(
-            model_name=config.GROQ_MODEL,
-            groq_api_key=api_key
+        async def generate():
+            logger.info(f"Sending structured prompt to AI")
+            ai_description = clean_description(await llm.complete(suggest_prompt(request.title)))
+            logger.info(f"AI response received: {len(ai_description)} characters")
+            return ai_description
+
+        ai_description = await suggestion_cache.get_or_create(
+            llm.model_name, request.title, generate, db=db
         )
         
-        # Much better prompt for structured output
-        prompt = f"""Generate a concise, well-structured task description for: "{request.title}"
+        return {"description": ai_description}
+        
+    except Exception as e:
+        logger.error(f"Error generating AI description: {str(e)}", exc_info=True)
+        
+        return {"description": error_description(request.title)}
 
-Format the response as follows:
+@router.post("/suggest/stream")
+async def stream_task_description(
+    request: schemas.TaskBase,
+    current_user=Depends(get_current_active_user),
+    llm: Optional[LLMClient] = Depends(get_llm),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    logger.info(f"AI suggest stream from user {current_user.username} for task: '{request.title}'")
+    return _event_stream_response(_stream_suggestion(request.title, llm, session_factory))
+
+
+
+def batch_prompt(titles: List[str]) -> str:
+    numbered = "\n".join(f"{i}. {' '.join(title.split())}" for i, title in enumerate(titles, 1))
+    return f"""Generate a concise, well-structured task description for each task title below.
+
+For every task:
 - Start with a brief 1-2 sentence overview
 - Include 3-5 bullet points of key requirements or steps
-- Keep total response under 150 words
+- Keep each description under 150 words
 - Use clear, actionable language
 - Do not include markdown headers or excessive formatting
 
-Task title: {request.title}"""
-        
-        logger.info(f"Sending structured prompt to AI")
-        
-        response = chat.invoke(prompt)
-        ai_description = response.content.strip()
-        
-        # Clean up any excessive formatting
-        ai_description = ai_description.replace("**", "").replace("##", "")
-        
-        # Ensure it's not too long
-        if len(ai_description) > 500:
-            ai_description = ai_description[:497] + "..."
-        
-        logger.info(f"AI response received: {len(ai_description)} characters")
-        
-        return {"description": ai_description}
-        
-    except Exception as e:
-        logger.error(f"Error generating AI description: {str(e)}", exc_info=True)
-        
-        return {
-            "description": f"Implement and test {request.title}. Ensure all requirements are met and code is properly documented."
-        }
+Respond with only a JSON object of the form {{"items": [{{"index": 1, "description": "..."}}]}}
+containing one item per task, numbered as below.
+
+Tasks:
+{numbered}"""
+
+def parse_batch_reply(text: str, count: int) -> Dict[int, str]:
+    """Cleaned descriptions by 0-based position; missing or malformed items are left out."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    items = data.get("items") if isinstance(data, dict) else None
+    descriptions = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        index, description = item.get("index"), item.get("description")
+        if isinstance(index, int) and 1 <= index <= count and isinstance(description, str) and description.strip():
+            descriptions[index - 1] = clean_description(description)
+    return descriptions
+
+@router.post("/suggest/batch", response_model=schemas.SuggestionBatchResponse)
+async def suggest_task_descriptions(
+    requests: List[schemas.TaskBase],
+    current_user=Depends(get_current_active_user),
+    llm: Optional[LLMClient] = Depends(get_llm),
+    db: AsyncSession = Depends(get_db)
+):
+    if len(requests) > config.AI_BATCH_MAX_ITEMS:
+        raise BatchTooLarge()
+    logger.info(f"AI batch suggest request from user {current_user.username} for {len(requests)} tasks")
+
+    if llm is None:
+        logger.warning("GROQ_API_KEY not configured, using fallback implementation")
+        return {"results": [
+            {"title": r.title, "description": fallback_description(r.title), "ok": True}
+            for r in requests
+        ]}
+
+    # Answer from the cache where possible and ask once per distinct title
+    descriptions: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    pending: Dict[str, str] = {}
+    for r in requests:
+        key = normalize_title(r.title)
+        if key in descriptions or key in pending:
+            continue
+        cached = await suggestion_cache.lookup(llm.model_name, r.title, db)
+        if cached is not None:
+            descriptions[key] = cached
+        else:
+            pending[key] = r.title
+
+    titles = list(pending.values())
+    size = max(config.AI_BATCH_CHUNK_SIZE, 1)
+    chunks = [titles[i:i + size] for i in range(0, len(titles), size)]
+    semaphore = asyncio.Semaphore(config.AI_BATCH_MAX_CONCURRENCY)
+
+    async def suggest_chunk(chunk: List[str]):
+        async with semaphore:
+            started_at = time.perf_counter()
+            reply = await llm.complete(batch_prompt(chunk))
+            return parse_batch_reply(reply, len(chunk)), time.perf_counter() - started_at
+
+    outcomes = await asyncio.gather(*(suggest_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Error generating AI descriptions for {len(chunk)} tasks: {outcome}")
+            errors.update((normalize_title(title), "ai_unavailable") for title in chunk)
+            continue
+        parsed, latency = outcome
+        for position, title in enumerate(chunk):
+            if position not in parsed:
+                errors[normalize_title(title)] = "ai_invalid_output"
+                continue
+            descriptions[normalize_title(title)] = parsed[position]
+            await suggestion_cache.store(llm.model_name, title, parsed[position], latency / len(chunk), db)
+
+    results = []
+    for r in requests:
+        key = normalize_title(r.title)
+        if key in descriptions:
+            results.append({"title": r.title, "description": descriptions[key], "ok": True})
+        else:
+            results.append({
+                "title": r.title,
+                "description": error_description(r.title),
+                "ok": False,
+                "error_code": errors[key],
+            })
+    logger.info(f"AI batch suggest: {len(chunks)} prompts, {len(errors)} failed titles")
+    return {"results": results}
 
 
 
@@ -83,34 +396,30 @@ Task title: {request.title}"""
 @router.post("/auto-assign")
 async def auto_assign_task(
     task: schemas.TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_active_user)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can auto-assign tasks")
     
-    # Find the best users for this task
-    best_user_ids = pinecone_service.find_best_user_for_task(
-        f"{task.title} {task.description}"
-    )
-    
-    if not best_user_ids:
+    # Find the best users for this task from the local skills index
+    matches = skills_index.top_k(task_text(task.title, task.description), k=config.SKILLS_CANDIDATES)
+    if not matches:
         raise HTTPException(status_code=404, detail="No suitable user found for this task")
     
-    # Get the first available user from the results
-    best_user_id = best_user_ids[0]
-    
-    # Verify the user exists in our database
-    user = db.query(models.User).filter(models.User.id == best_user_id).first()
-    if not user:
-        # If the user doesn't exist in our DB, try the next one
-        if len(best_user_ids) > 1:
-            best_user_id = best_user_ids[1]
-            user = db.query(models.User).filter(models.User.id == best_user_id).first()
-        
-        if not user:
-            # Fallback: assign to the current user
-            best_user_id = current_user.id
+    # Weigh skills against open work; one query checks every candidate still
+    # exists (profiles of deleted users linger in the index until a rebuild)
+    candidates = await rank_candidates(db, matches)
+    if candidates:
+        best = candidates[0]
+        assignee = best.user
+        workload = {"open_tasks": best.open_tasks, "open_minutes": best.open_minutes}
+        score = round(best.score, 4)
+    else:
+        # Fallback: assign to the current user
+        assignee = current_user
+        workload = None
+        score = 0.0
     
     # Create the task assigned to the best user
     db_task = models.Task(
@@ -118,24 +427,30 @@ async def auto_assign_task(
         title=task.title,
         description=task.description,
         status=models.TaskStatus.TODO,
-        user_id=best_user_id,
-        assigned_by=current_user.id
+        user_id=assignee.id,
+        assigned_by=current_user.id,
+        created_at=models.utcnow(),
     )
+    changes = TaskChanges()
+    changes.created(assignee.id, db_task.created_at, db_task.status, 0)
     
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    
-    # Get the assigned user details
-    assigned_user = db.query(models.User).filter(models.User.id == best_user_id).first()
+    await apply_task_changes(db, changes)
+    await db.commit()
+    await db.refresh(db_task)
     
     return {
-        "task": db_task,
+        "task": schemas.Task.model_validate(db_task),
         "assigned_to": {
-            "user_id": assigned_user.id,
-            "username": assigned_user.username,
-            "email": assigned_user.email
+            "user_id": assignee.id,
+            "username": assignee.username,
+            "email": assignee.email
         },
         "assigned_by": current_user.username,
-        "matching_score": "high"  # You could calculate this from Pinecone results
+        "matching_score": score,
+        "workload": workload,
+        "candidates": [
+            {"user_id": c.user.id, "similarity": round(c.similarity, 4), "score": round(c.score, 4)}
+            for c in candidates
+        ]
     }
\ No newline at end of file
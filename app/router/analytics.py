@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from app.database import get_db
+from app import models, schemas
+from app.auth import Principal, get_current_active_user
+from app.config import config
+from app.exceptions import InsufficientPermission, InvalidDateRange
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+rollup = models.TaskRollup
+time_rollup = models.TimeRollup
+
+def _rollup_queries(column: str, current_user: Principal, user_id: Optional[str],
+                    start: Optional[date], end: Optional[date]):
+    """Task counts by ``column`` and status, and minutes by ``column``, limited to what the user may see"""
+    if not current_user.is_admin:
+        # Users only see their own tasks, as in GET /tasks/
+        if user_id is not None and user_id != current_user.id:
+            raise InsufficientPermission()
+        user_id = current_user.id
+    queries = []
+    for table, value in ((rollup, rollup.tasks), (time_rollup, time_rollup.minutes)):
+        key = getattr(table, column)
+        columns = (key, table.status) if table is rollup else (key,)
+        query = select(*columns, func.sum(value)).group_by(*columns)
+        if user_id is not None:
+            query = query.where(table.user_id == user_id)
+        if start is not None:
+            query = query.where(table.day >= start)
+        if end is not None:
+            query = query.where(table.day <= end)
+        queries.append(query)
+    return queries
+
+def _add_tasks(counts: dict, status: models.TaskStatus, tasks: int):
+    counts[status.value] = counts.get(status.value, 0) + tasks
+    counts["total"] = counts.get("total", 0) + tasks
+
+def _add_minutes(counts: dict, minutes: int):
+    counts["minutes"] = counts.get("minutes", 0) + minutes
+
+@router.get("/summary", response_model=schemas.AnalyticsSummary)
+async def read_summary(
+    user_id: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Task counts by status and minutes, overall and per user.
+
+    Admins see every user unless ``user_id`` narrows it down; other users
+    see only themselves. ``start``/``end`` (inclusive, UTC) limit it to
+    tasks created and minutes worked on those days.
+    """
+    tasks, minutes = _rollup_queries("user_id", current_user=current_user, user_id=user_id, start=start, end=end)
+    totals, users = {}, {}
+    for row_user_id, status, count in (await db.execute(tasks)).all():
+        _add_tasks(totals, status, count)
+        _add_tasks(users.setdefault(row_user_id, {"user_id": row_user_id}), status, count)
+    for row_user_id, count in (await db.execute(minutes)).all():
+        _add_minutes(totals, count)
+        _add_minutes(users.setdefault(row_user_id, {"user_id": row_user_id}), count)
+    return {"totals": totals, "users": [users[key] for key in sorted(users)]}
+
+@router.get("/timeseries", response_model=schemas.AnalyticsTimeseries)
+async def read_timeseries(
+    user_id: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Tasks created per UTC day, by their current status, and minutes worked that day.
+
+    ``end`` defaults to today and ``start`` to 30 days before it; both are
+    inclusive and every day in between is listed, zeros included. Visibility
+    is as for /analytics/summary.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= config.ANALYTICS_MAX_DAYS:
+        raise InvalidDateRange()
+
+    tasks, minutes = _rollup_queries("day", current_user=current_user, user_id=user_id, start=start, end=end)
+    days = {start + timedelta(days=n): {} for n in range((end - start).days + 1)}
+    for day, status, count in (await db.execute(tasks)).all():
+        _add_tasks(days[day], status, count)
+    for day, count in (await db.execute(minutes)).all():
+        _add_minutes(days[day], count)
+    return {
+        "start": start,
+        "end": end,
+        "days": [{"day": day, **counts} for day, counts in days.items()],
+    }
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from app.database import get_db
 from app import models, schemas
-from app.auth import authenticate_user, create_access_token, get_password_hash
+from app.auth import authenticate_user, create_access_token
+from app.hashing import password_hasher
 from app.config import config
 from app.exceptions import UserAlreadyExists
 import uuid
@@ -14,9 +16,9 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -24,16 +26,17 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=schemas.User)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(models.User).filter(
+    result = await db.execute(select(models.User).where(
         (models.User.username == user.username) | (models.User.email == user.email)
-    ).first()
+    ))
+    db_user = result.scalars().first()
     if db_user:
         raise UserAlreadyExists()
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = models.User(
         id=str(uuid.uuid4()),
         username=user.username,
@@ -42,6 +45,6 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
         is_admin=False  # First user can be admin, others regular by default
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
\ No newline at end of file
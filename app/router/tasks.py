@@ -1,55 +1,670 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, delete, func, insert, literal_column, select, table, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional, Union
+import csv
+import io
+import json
+import re
 import uuid
-from app.database import get_db
+from app.database import get_db, get_session_factory
 from app import models, schemas
-from app.auth import get_current_active_user
-from app.exceptions import TaskNotFound, InsufficientPermission
+from app.auth import Principal, get_current_active_user
+from app.config import config
+from app.conditional import (
+    collection_etag, if_match_versions, not_modified, page_etag, revalidating, row_etag, validator_headers,
+    version_matches,
+)
+from app.exceptions import BatchTooLarge, PreconditionFailed, TaskNotFound, InsufficientPermission
+from app.pagination import encode_cursor, keyset_page, keyset_query
+from app.skills import skills_updater, task_text
+from app.analytics import TaskChanges, apply_task_changes
+from app.workload import UPSERT_INSERTS
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
-@router.get("/", response_model=List[schemas.Task])
+# Columns clients may sort task listings by. Each one is paired with the id
+# as a tie-breaker and has a matching (user_id, [status,] column, id) index.
+TASK_SORT_COLUMNS = {
+    "created_at": models.Task.created_at,
+    "updated_at": models.Task.updated_at,
+    "title": models.Task.title,
+}
+TASK_SORT_PATTERN = "^-?(" + "|".join(TASK_SORT_COLUMNS) + ")$"
+
+def build_task_query(
+    current_user: Principal,
+    status: Optional[schemas.TaskStatus] = None,
+    title_prefix: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    sort: str = "created_at",
+):
+    """Filtered task query plus the keyset it should be ordered by"""
+    query = select(models.Task)
+    # Users can only see their own tasks unless they're admin
+    if not current_user.is_admin:
+        query = query.where(models.Task.user_id == current_user.id)
+    if status is not None:
+        query = query.where(models.Task.status == models.TaskStatus[status.name])
+    if title_prefix:
+        # Build the pattern here rather than with startswith(), which emits
+        # "? || '%'" and hides the constant prefix from the Postgres planner
+        escaped = title_prefix.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        query = query.where(models.Task.title.like(escaped + "%", escape="/"))
+    if created_after is not None:
+        query = query.where(models.Task.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(models.Task.created_at < created_before)
+    if updated_after is not None:
+        query = query.where(models.Task.updated_at >= updated_after)
+    if updated_before is not None:
+        query = query.where(models.Task.updated_at < updated_before)
+
+    descending = sort.startswith("-")
+    key = (TASK_SORT_COLUMNS[sort.lstrip("-")], models.Task.id)
+    return query, key, descending
+
+@router.get("/", response_model=Union[List[schemas.Task], schemas.TaskPage])
 async def read_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    cursor: Optional[str] = None,
+    status: Optional[schemas.TaskStatus] = None,
+    title_prefix: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    sort: str = Query("created_at", pattern=TASK_SORT_PATTERN),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    # Users can only see their own tasks unless they're admin
+    """List tasks, oldest first unless ``sort`` says otherwise.
+
+    ``sort`` is one of created_at, updated_at or title, prefixed with ``-``
+    for descending order. Passing ``cursor`` (empty for the first page)
+    switches to keyset pagination and returns
+    ``{"items": [...], "next_cursor": ...}``; otherwise ``skip``/``limit``
+    offset paging returns a plain list.
+
+    A poll with If-None-Match is answered from one count/max query over
+    every task the filters match: a 304 until one of them changes. Plain
+    requests skip that query and tag the page they read.
+    """
+    query, key, descending = build_task_query(
+        current_user,
+        status=status,
+        title_prefix=title_prefix,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        sort=sort,
+    )
+
+    probed = revalidating(request)
+    if probed:
+        # Probed before the page is read: a write in between makes the body
+        # newer than its ETag, which only costs the next poll a full response
+        probe = await db.execute(query.with_only_columns(func.count(), func.max(models.Task.updated_at)))
+        count, last_modified = probe.one()
+        cached = not_modified(request, response, collection_etag(count, last_modified, current_user.id), last_modified)
+        if cached is not None:
+            return cached
+
+    if cursor is not None:
+        result = await db.execute(keyset_query(query, key, cursor, limit, descending=descending))
+        items, next_cursor = keyset_page(result.scalars().all(), key, limit)
+        if not probed:
+            _set_page_validators(response, items, current_user, next_cursor)
+        return {"items": items, "next_cursor": next_cursor}
+
+    order = [column.desc() if descending else column.asc() for column in key]
+    result = await db.execute(query.order_by(*order).offset(skip).limit(limit))
+    tasks = result.scalars().all()
+    if not probed:
+        _set_page_validators(response, tasks, current_user)
+    return tasks
+
+def _set_page_validators(response: Response, tasks, current_user: Principal, *extra):
+    etag, last_modified = page_etag(((task.id, task.updated_at) for task in tasks), current_user.id, *extra)
+    response.headers.update(validator_headers(etag, last_modified))
+
+def _supports_returning(db: AsyncSession, kind: str) -> bool:
+    """Whether the dialect can do INSERT/UPDATE/DELETE ... RETURNING"""
+    return getattr(db.get_bind().dialect, f"{kind}_returning", False)
+
+def _writable_by(current_user: Principal):
+    """Predicate limiting a write to tasks the user may modify"""
     if current_user.is_admin:
-        tasks = db.query(models.Task).offset(skip).limit(limit).all()
+        return true()
+    return models.Task.user_id == current_user.id
+
+async def _raise_write_miss(db: AsyncSession, task_id: str, current_user: Principal):
+    # Only reached when the guarded write matched nothing: tell a missing
+    # task (404) apart from someone else's task (403) and from a task that
+    # changed since the version the client sent in If-Match (412).
+    owner = (await db.execute(select(models.Task.user_id).where(models.Task.id == task_id))).first()
+    if owner is None:
+        raise TaskNotFound()
+    if not current_user.is_admin and owner.user_id != current_user.id:
+        raise InsufficientPermission()
+    raise PreconditionFailed()
+
+def _task_etag(task) -> str:
+    return row_etag(task.updated_at)
+
+async def _load_writable_task(db: AsyncSession, task_id: str, current_user: Principal):
+    """SELECT-then-check path for dialects without RETURNING"""
+    task = await db.get(models.Task, task_id)
+    if not task:
+        raise TaskNotFound()
+    # Users can only change their own tasks unless they're admin
+    if not current_user.is_admin and task.user_id != current_user.id:
+        raise InsufficientPermission()
+    return task
+
+async def _update_task_values(db: AsyncSession, task_id: str, values: dict, current_user: Principal,
+                              versions: Optional[List[datetime]] = None):
+    """Apply ``values`` to a task the user may write with UPDATE ... RETURNING
+
+    Status changes also move the task between its owner's workload and
+    rollup counters, and status or text changes reach the skill profiles,
+    so the task's previous status and text are needed too. On Postgres the
+    UPDATE reads them from a locked sub-SELECT of itself, one round trip in
+    all; elsewhere a locked SELECT runs first. With ``versions`` (from
+    If-Match) the task's updated_at must be one of them, checked by the
+    write itself so two writers holding the same ETag cannot both win.
+    """
+    changes = TaskChanges()
+    guard = _writable_by(current_user)
+    if versions is not None:
+        guard = guard & models.Task.updated_at.in_(versions)
+    if not _supports_returning(db, "update"):
+        task = await _load_writable_task(db, task_id, current_user)
+        if versions is not None and not version_matches(task.updated_at, versions):
+            raise PreconditionFailed()
+        old_status, old_minutes = task.status, task.total_minutes
+        old_text = task_text(task.title, task.description)
+        for name, value in values.items():
+            setattr(task, name, value)
+        changes.changed(task.user_id, task.created_at, old_status, old_minutes, task.status, task.total_minutes)
+        await apply_task_changes(db, changes)
+        await db.commit()
+        await db.refresh(task)
+        skills_updater.task_changed(
+            task.user_id, old_status, old_text, task.status, task_text(task.title, task.description),
+            task.updated_at,
+        )
+        return task
+
+    # Locked, so a concurrent write cannot be counted twice
+    previous = (
+        select(models.Task.id, models.Task.status, models.Task.total_minutes, models.Task.title,
+               models.Task.description)
+        .where(models.Task.id == task_id, guard)
+        .with_for_update()
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        # The sub-SELECT sees the row as it was before this UPDATE
+        previous = previous.subquery("previous")
+        row = (await db.execute(
+            update(models.Task)
+            .where(models.Task.id == previous.c.id)
+            .values(**values)
+            .returning(models.Task, previous.c.status, previous.c.total_minutes,
+                       previous.c.title, previous.c.description)
+            .execution_options(synchronize_session=False)
+        )).first()
+        if row is None:
+            await _raise_write_miss(db, task_id, current_user)
+        task, old_status, old_minutes, old_title, old_description = row
     else:
-        tasks = db.query(models.Task).filter(
-            models.Task.user_id == current_user.id
-        ).offset(skip).limit(limit).all()
-    return tasks
+        # SQLite's RETURNING only sees the new row, even of a joined table
+        row = (await db.execute(previous)).first()
+        if row is None:
+            await _raise_write_miss(db, task_id, current_user)
+        _, old_status, old_minutes, old_title, old_description = row
+        result = await db.execute(
+            update(models.Task)
+            .where(models.Task.id == task_id, guard)
+            .values(**values)
+            .returning(models.Task)
+            .execution_options(synchronize_session=False)
+        )
+        task = result.scalars().first()
+        if task is None:
+            await _raise_write_miss(db, task_id, current_user)
+    if "status" in values:
+        changes.changed(task.user_id, task.created_at, old_status, old_minutes, task.status, task.total_minutes)
+        await apply_task_changes(db, changes)
+    await db.commit()
+    skills_updater.task_changed(
+        task.user_id, old_status, task_text(old_title, old_description),
+        task.status, task_text(task.title, task.description), task.updated_at,
+    )
+    return task
 
 @router.post("/", response_model=schemas.Task)
 async def create_task(
     task: schemas.TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    db_task = models.Task(
+    values = dict(
         id=str(uuid.uuid4()),
         title=task.title,
         description=task.description,
         status=models.TaskStatus.TODO,
-        user_id=current_user.id
+        user_id=current_user.id,
+        created_at=models.utcnow(),
     )
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    # New tasks start in TODO, which skill profiles leave out: nothing to
+    # queue for them until they are moved to DONE
+    changes = TaskChanges()
+    changes.created(current_user.id, values["created_at"], values["status"], 0)
+    if not _supports_returning(db, "insert"):
+        db_task = models.Task(**values)
+        db.add(db_task)
+        await apply_task_changes(db, changes)
+        await db.commit()
+        await db.refresh(db_task)
+        return db_task
+
+    result = await db.execute(insert(models.Task).values(**values).returning(models.Task))
+    db_task = result.scalars().one()
+    await apply_task_changes(db, changes)
+    await db.commit()
     return db_task
 
-@router.get("/{task_id}", response_model=schemas.Task)
-async def read_task(
-    task_id: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+# Plain columns only: the export never builds ORM objects or Pydantic models
+EXPORT_COLUMNS = (
+    models.Task.id,
+    models.Task.title,
+    models.Task.description,
+    models.Task.status,
+    models.Task.total_minutes,
+    models.Task.user_id,
+    models.Task.created_at,
+    models.Task.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+def _export_value(value):
+    if isinstance(value, models.TaskStatus):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_export_value, row)))) + "\n" for row in rows
+    )
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([_export_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+async def _stream_export(session_factory, query, export_format: str):
+    # Runs after the endpoint has returned, so it opens its own session
+    async with session_factory() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        )
+        if export_format == "csv":
+            yield _csv_chunk([], header=True)
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if export_format == "csv" else _ndjson_chunk(rows)
+
+@router.get("/export")
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[schemas.TaskStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    session_factory=Depends(get_session_factory),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Stream every visible task as NDJSON or CSV with flat memory use.
+
+    Rows come from a server-side cursor (``yield_per``) in batches of
+    EXPORT_BATCH_SIZE and are written out as they arrive.
+    """
+    query, key, _ = build_task_query(
+        current_user, status=status, created_after=created_after, created_before=created_before
+    )
+    query = query.with_only_columns(*EXPORT_COLUMNS).order_by(*key)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_export(session_factory, query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+# bm25 weights for FTS5's (title, description), mirroring the weights
+# Postgres' ts_rank gives the A and B labels by default
+SEARCH_WEIGHTS = (1.0, 0.4)
+
+def _search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q)
+
+def build_search_query(dialect_name: str, current_user: Principal, q: str,
+                       status: Optional[schemas.TaskStatus] = None):
+    """Tasks matching ``q`` the user may see, with a rank column (higher is better)"""
+    query, _, _ = build_task_query(current_user, status=status)
+    if dialect_name == "postgresql":
+        # websearch_to_tsquery accepts anything a user types
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{models.SEARCH_CONFIG}'::regconfig"), q)
+        search_vector = literal_column("tasks.search_vector")
+        rank = func.ts_rank(search_vector, tsquery)  # Default weights: A (title) 1.0, B 0.4
+        return query.where(search_vector.op("@@")(tsquery)), rank
+
+    # FTS5 query syntax treats punctuation as operators; quote every word
+    # so user input is always a plain all-words match
+    match = " ".join(f'"{term}"' for term in _search_terms(q))
+    fts = table("tasks_fts")
+    fts_table = literal_column("tasks_fts")
+    rank = -func.bm25(fts_table, *SEARCH_WEIGHTS)
+    query = (
+        query.join(fts, literal_column("tasks_fts.rowid") == literal_column("tasks.rowid"))
+        .where(fts_table.op("MATCH")(match))
+    )
+    return query, rank
+
+@router.get("/search", response_model=schemas.TaskSearchPage)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[schemas.TaskStatus] = None,
+    cursor: Optional[str] = "",
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Full-text search over titles and descriptions, best match first.
+
+    Words are stemmed, so "fixing" finds "fix". Title matches rank above
+    description matches. Visibility is as in GET /tasks/, and pages are
+    keyset-paginated on (rank, id) with ``cursor``.
+    """
+    if not _search_terms(q):
+        return {"items": [], "next_cursor": None}
+    query, rank = build_search_query(db.get_bind().dialect.name, current_user, q, status=status)
+    key = (rank, models.Task.id)
+    result = await db.execute(keyset_query(query.add_columns(rank.label("rank")), key, cursor, limit, descending=True))
+    rows = result.all()
+    items = [{**schemas.Task.model_validate(task).model_dump(), "rank": task_rank} for task, task_rank in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last.rank, last[0].id])
+    return {"items": items, "next_cursor": next_cursor}
+
+def _check_batch_size(items: list):
+    if len(items) > config.BULK_MAX_ITEMS:
+        raise BatchTooLarge()
+
+async def _authorize_bulk(db: AsyncSession, ids: List[str], current_user: Principal):
+    """Check ownership of every id with one query.
+
+    Returns an error code per position in ``ids``, or None where the user may
+    write the task, and the locked rows as they were before the write. Repeats
+    of an id are rejected so each task is written once.
+    """
+    result = await db.execute(
+        select(
+            models.Task.id, models.Task.user_id, models.Task.status, models.Task.total_minutes,
+            models.Task.created_at, models.Task.title, models.Task.description,
+        )
+        .where(models.Task.id.in_(set(ids)))
+        .with_for_update()
+    )
+    previous = {row.id: row for row in result.all()}
+    errors, seen = [], set()
+    for task_id in ids:
+        if task_id in seen:
+            errors.append("duplicate_id")
+        elif task_id not in previous:
+            errors.append("task_not_found")
+        elif not current_user.is_admin and previous[task_id].user_id != current_user.id:
+            errors.append("insufficient_permissions")
+        else:
+            errors.append(None)
+        seen.add(task_id)
+    return errors, previous
+
+async def _bulk_update(db: AsyncSession, rows: List[dict], current_user: Principal):
+    ids = [row["id"] for row in rows]
+    errors, previous = await _authorize_bulk(db, ids, current_user)
+    allowed = [row for row, error in zip(rows, errors) if error is None]
+    tasks = {}
+    if allowed:
+        # ORM bulk UPDATE by primary key: one executemany round trip
+        await db.execute(update(models.Task), allowed)
+        result = await db.execute(
+            select(models.Task).where(models.Task.id.in_([row["id"] for row in allowed]))
+        )
+        tasks = {task.id: task for task in result.scalars()}
+        changes = TaskChanges()
+        for task in tasks.values():
+            old = previous[task.id]
+            changes.changed(task.user_id, task.created_at, old.status, old.total_minutes, task.status, task.total_minutes)
+        await apply_task_changes(db, changes)
+    await db.commit()
+    for task in tasks.values():
+        old = previous[task.id]
+        skills_updater.task_changed(
+            task.user_id, old.status, task_text(old.title, old.description),
+            task.status, task_text(task.title, task.description), task.updated_at,
+        )
+
+    return {"results": [
+        {"id": task_id, "ok": True, "task": tasks[task_id]} if error is None
+        else {"id": task_id, "ok": False, "error_code": error}
+        for task_id, error in zip(ids, errors)
+    ]}
+
+@router.post("/bulk", response_model=schemas.TaskBulkResponse)
+async def create_tasks_bulk(
+    tasks: List[schemas.TaskCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Create many tasks in one transaction with a multi-row INSERT ... RETURNING"""
+    _check_batch_size(tasks)
+    if not tasks:
+        return {"results": []}
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": task.title,
+            "description": task.description,
+            "status": models.TaskStatus.TODO,
+            "total_minutes": 0,
+            "user_id": current_user.id,
+        }
+        for task in tasks
+    ]
+    result = await db.scalars(
+        insert(models.Task).returning(models.Task, sort_by_parameter_order=True), rows
+    )
+    created = result.all()
+    changes = TaskChanges()
+    for task in created:
+        changes.created(task.user_id, task.created_at, task.status, task.total_minutes)
+    await apply_task_changes(db, changes)
+    await db.commit()
+    return {"results": [{"id": task.id, "ok": True, "task": task} for task in created]}
+
+@router.patch("/bulk", response_model=schemas.TaskBulkResponse)
+async def update_tasks_bulk(
+    tasks: List[schemas.TaskBulkUpdate],
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    """Update title/description of many tasks in one transaction"""
+    _check_batch_size(tasks)
+    rows = [{"id": task.id, "title": task.title, "description": task.description} for task in tasks]
+    return await _bulk_update(db, rows, current_user)
+
+@router.patch("/bulk/status", response_model=schemas.TaskBulkResponse)
+async def update_task_status_bulk(
+    tasks: List[schemas.TaskBulkStatus],
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Move many tasks to new statuses in one transaction"""
+    _check_batch_size(tasks)
+    rows = [{"id": task.id, "status": models.TaskStatus[task.status.name]} for task in tasks]
+    return await _bulk_update(db, rows, current_user)
+
+async def _insert_time_entries(db: AsyncSession, rows: List[dict], user_id: str) -> set:
+    """Insert ``rows``, skipping client_entry_ids this user already sent.
+
+    Returns the ids of the rows actually inserted.
+    """
+    table = models.TimeEntry.__table__
+    make_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if make_insert is not None and _supports_returning(db, "insert"):
+        # The unique (user_id, client_entry_id) index settles races between
+        # two uploads of the same batch
+        result = await db.execute(
+            make_insert(table)
+            .on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.client_entry_id])
+            .returning(table.c.id),
+            rows,
+        )
+        return set(result.scalars())
+
+    client_ids = [row["client_entry_id"] for row in rows if row["client_entry_id"] is not None]
+    existing = set()
+    if client_ids:
+        result = await db.execute(
+            select(table.c.client_entry_id)
+            .where(table.c.user_id == user_id, table.c.client_entry_id.in_(client_ids))
+        )
+        existing = set(result.scalars())
+    new_rows = [row for row in rows if row["client_entry_id"] not in existing]
+    if new_rows:
+        await db.execute(table.insert(), new_rows)
+    return {row["id"] for row in new_rows}
+
+async def _log_time(db: AsyncSession, entries: List[schemas.TimeEntryBulkCreate], current_user: Principal):
+    """Append time entries and add their minutes to their tasks, in one transaction.
+
+    Totals are incremented by the database (``total_minutes = total_minutes
+    + ?``, once per task) rather than recomputed, so concurrent loggers never
+    lose minutes. Entries whose client_entry_id was already recorded, in this
+    batch or an earlier one, are reported as duplicates and add nothing.
+    Returns a result per entry and the new total of every task written to.
+    """
+    task_ids = list(dict.fromkeys(entry.task_id for entry in entries))
+    task_errors, previous = await _authorize_bulk(db, task_ids, current_user)
+    task_errors = dict(zip(task_ids, task_errors))
+
+    rows, results, first_seen = [], [], {}
+    for entry in entries:
+        result = {"task_id": entry.task_id, "client_entry_id": entry.client_entry_id, "ok": False}
+        results.append(result)
+        if task_errors[entry.task_id] is not None:
+            result["error_code"] = task_errors[entry.task_id]
+            continue
+        result.update(ok=True)
+        if entry.client_entry_id is not None and entry.client_entry_id in first_seen:
+            result.update(duplicate=True, entry=first_seen[entry.client_entry_id])
+            continue
+        row = {
+            "id": str(uuid.uuid4()),
+            "task_id": entry.task_id,
+            "user_id": current_user.id,
+            "minutes": entry.minutes,
+            "started_at": entry.started_at,
+            "note": entry.note,
+            "client_entry_id": entry.client_entry_id,
+            "created_at": models.utcnow(),
+        }
+        rows.append(row)
+        result["entry"] = row
+        if entry.client_entry_id is not None:
+            first_seen[entry.client_entry_id] = row
+
+    inserted = await _insert_time_entries(db, rows, current_user.id) if rows else set()
+    resent = [row["client_entry_id"] for row in rows if row["id"] not in inserted]
+    if resent:
+        existing = await db.execute(
+            select(models.TimeEntry)
+            .where(models.TimeEntry.user_id == current_user.id, models.TimeEntry.client_entry_id.in_(resent))
+        )
+        recorded = {entry.client_entry_id: entry for entry in existing.scalars()}
+        for result in results:
+            row = result.get("entry")
+            if row is not None and row["id"] not in inserted:
+                result.update(duplicate=True, entry=recorded[row["client_entry_id"]])
+
+    added = {}
+    for row in rows:
+        if row["id"] in inserted:
+            added[row["task_id"]] = added.get(row["task_id"], 0) + row["minutes"]
+    if added:
+        tasks = models.Task.__table__
+        await db.execute(
+            update(tasks)
+            .where(tasks.c.id == bindparam("task"))
+            .values(total_minutes=tasks.c.total_minutes + bindparam("minutes")),
+            [{"task": task_id, "minutes": minutes} for task_id, minutes in sorted(added.items())],
+        )
+        # The task rows are locked by _authorize_bulk, so their status
+        # cannot change before commit
+        changes = TaskChanges()
+        for task_id, minutes in added.items():
+            old = previous[task_id]
+            old_minutes = old.total_minutes or 0
+            changes.changed(old.user_id, old.created_at, old.status, old_minutes, old.status, old_minutes + minutes)
+        for row in rows:
+            if row["id"] in inserted:
+                changes.logged(previous[row["task_id"]].user_id, row["started_at"] or row["created_at"], row["minutes"])
+        await apply_task_changes(db, changes)
+
+    written = [task_id for task_id in task_ids if task_errors[task_id] is None]
+    totals = {}
+    if written:
+        result = await db.execute(
+            select(models.Task.id, models.Task.total_minutes).where(models.Task.id.in_(written))
+        )
+        totals = {task_id: total or 0 for task_id, total in result.all()}
+    await db.commit()
+    return results, totals
+
+@router.post("/bulk/time", response_model=schemas.TimeEntryBulkResponse)
+async def log_time_bulk(
+    entries: List[schemas.TimeEntryBulkCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Record many time entries, across tasks, in one transaction.
+
+    Meant for timer clients flushing what they logged offline: give every
+    entry a client_entry_id and a retried upload is counted once.
+    """
+    _check_batch_size(entries)
+    if not entries:
+        return {"results": [], "totals": {}}
+    results, totals = await _log_time(db, entries, current_user)
+    return {"results": results, "totals": totals}
+
+async def _read_visible_task(db: AsyncSession, task_id: str, current_user: Principal):
+    task = await db.get(models.Task, task_id)
     if not task:
         raise TaskNotFound()
     
@@ -59,62 +674,127 @@ async def read_task(
     
     return task
 
+@router.get("/{task_id}", response_model=schemas.Task)
+async def read_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """A task, with an ETag to send back as If-None-Match (304) or If-Match on writes"""
+    task = await _read_visible_task(db, task_id, current_user)
+    cached = not_modified(request, response, _task_etag(task), task.updated_at)
+    if cached is not None:
+        return cached
+    return task
+
 @router.put("/{task_id}", response_model=schemas.Task)
 async def update_task(
     task_id: str,
     task: schemas.TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not db_task:
-        raise TaskNotFound()
-    
-    # Users can only update their own tasks unless they're admin
-    if not current_user.is_admin and db_task.user_id != current_user.id:
-        raise InsufficientPermission()
-    
-    db_task.title = task.title
-    db_task.description = task.description
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+    """Replace a task's title and description; If-Match makes it conditional (412)"""
+    updated = await _update_task_values(
+        db, task_id, {"title": task.title, "description": task.description}, current_user,
+        versions=if_match_versions(request),
+    )
+    response.headers.update(validator_headers(_task_etag(updated), updated.updated_at))
+    return updated
 
 @router.delete("/{task_id}")
 async def delete_task(
     task_id: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not task:
-        raise TaskNotFound()
-    
-    # Users can only delete their own tasks unless they're admin
-    if not current_user.is_admin and task.user_id != current_user.id:
-        raise InsufficientPermission()
-    
-    db.delete(task)
-    db.commit()
+    # The entries go first: their minutes leave the days they were worked,
+    # and on Postgres the task's foreign key would otherwise cascade to
+    # them unseen. SQLite does not enforce it, so they are deleted by hand.
+    entries = delete(models.TimeEntry).where(models.TimeEntry.task_id == task_id)
+    worked = (models.TimeEntry.started_at, models.TimeEntry.created_at, models.TimeEntry.minutes)
+    if _supports_returning(db, "delete"):
+        writable = select(models.Task.id).where(models.Task.id == task_id, _writable_by(current_user))
+        logged = (await db.execute(entries.where(writable.exists()).returning(*worked))).all()
+        result = await db.execute(
+            delete(models.Task)
+            .where(models.Task.id == task_id, _writable_by(current_user))
+            .returning(
+                models.Task.user_id, models.Task.status, models.Task.total_minutes, models.Task.created_at,
+                models.Task.title, models.Task.description,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        deleted = result.first()
+        if deleted is None:
+            await _raise_write_miss(db, task_id, current_user)
+    else:
+        deleted = await _load_writable_task(db, task_id, current_user)
+        logged = (await db.execute(select(*worked).where(models.TimeEntry.task_id == task_id))).all()
+        await db.execute(entries)
+        await db.delete(deleted)
+    owner_id = deleted.user_id
+    changes = TaskChanges()
+    changes.deleted(owner_id, deleted.created_at, deleted.status, deleted.total_minutes)
+    for started_at, created_at, minutes in logged:
+        changes.logged(owner_id, started_at or created_at, -minutes)
+    await apply_task_changes(db, changes)
+    await db.commit()
+    skills_updater.task_changed(
+        owner_id, deleted.status, task_text(deleted.title, deleted.description), None, None, models.utcnow()
+    )
     return {"message": "Task deleted successfully"}
 
 @router.patch("/{task_id}/status", response_model=schemas.Task)
 async def update_task_status(
     task_id: str,
     status: schemas.TaskStatus,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not task:
+    # Convert the schema enum to the model enum
+    new_status = models.TaskStatus[status.name]  # Use .name to get the enum member name
+    updated = await _update_task_values(
+        db, task_id, {"status": new_status}, current_user, versions=if_match_versions(request)
+    )
+    response.headers.update(validator_headers(_task_etag(updated), updated.updated_at))
+    return updated
+
+@router.post("/{task_id}/time", response_model=schemas.TimeLogged)
+async def log_time(
+    task_id: str,
+    entry: schemas.TimeEntryCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Append a time entry and add its minutes to the task's total_minutes"""
+    [result], totals = await _log_time(
+        db, [schemas.TimeEntryBulkCreate(task_id=task_id, **entry.model_dump())], current_user
+    )
+    if result.get("error_code") == "task_not_found":
         raise TaskNotFound()
-    
-    # Users can only update their own tasks unless they're admin
-    if not current_user.is_admin and task.user_id != current_user.id:
+    if result.get("error_code") == "insufficient_permissions":
         raise InsufficientPermission()
-    
-    # Convert the schema enum to the model enum
-    task.status = models.TaskStatus[status.name]  # Use .name to get the enum member name
-    db.commit()
-    db.refresh(task)
-    return task
\ No newline at end of file
+    return {"entry": result["entry"], "total_minutes": totals[task_id], "duplicate": result.get("duplicate", False)}
+
+@router.get("/{task_id}/time", response_model=schemas.TimeEntryPage)
+async def read_time_entries(
+    task_id: str,
+    cursor: Optional[str] = "",
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """Time entries of a task, oldest first, a keyset page at a time"""
+    task = await _read_visible_task(db, task_id, current_user)
+    key = (models.TimeEntry.created_at, models.TimeEntry.id)
+    query = select(models.TimeEntry).where(models.TimeEntry.task_id == task.id)
+    result = await db.execute(keyset_query(query, key, cursor, limit))
+    items, next_cursor = keyset_page(result.scalars().all(), key, limit)
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,73 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from app.database import get_db
 from app import models, schemas
-from app.auth import get_current_active_user, get_password_hash
-from app.exceptions import UserNotFound, InsufficientPermission
+from app.auth import Principal, get_current_active_user, invalidate_principal
+from app.hashing import password_hasher
+from app.conditional import (
+    collection_etag, if_match_versions, not_modified, page_etag, revalidating, row_etag, validator_headers,
+    version_matches,
+)
+from app.exceptions import UserNotFound, InsufficientPermission, PreconditionFailed
+from app.pagination import keyset_page, keyset_query
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[schemas.User])
+USER_PAGE_KEY = (models.User.created_at, models.User.id)
+
+# updated_at stays NULL until the first update
+USER_VERSION = func.coalesce(models.User.updated_at, models.User.created_at)
+
+def _user_version(user: models.User):
+    return user.updated_at or user.created_at
+
+@router.get("/", response_model=Union[List[schemas.User], schemas.UserPage])
 async def read_users(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     if not current_user.is_admin:
         raise InsufficientPermission()
-    users = db.query(models.User).offset(skip).limit(limit).all()
+    # As in GET /tasks/: revalidations probe the whole table first, plain
+    # requests tag the page they read
+    probed = revalidating(request)
+    if probed:
+        probe = await db.execute(select(func.count(), func.max(USER_VERSION)))
+        count, last_modified = probe.one()
+        cached = not_modified(request, response, collection_etag(count, last_modified, current_user.id), last_modified)
+        if cached is not None:
+            return cached
+    query = select(models.User)
+
+    # Same contract as GET /tasks/: a cursor (even empty) selects keyset paging
+    if cursor is not None:
+        result = await db.execute(keyset_query(query, USER_PAGE_KEY, cursor, limit))
+        items, next_cursor = keyset_page(result.scalars().all(), USER_PAGE_KEY, limit)
+        if not probed:
+            _set_page_validators(response, items, current_user, next_cursor)
+        return {"items": items, "next_cursor": next_cursor}
+
+    result = await db.execute(query.order_by(*USER_PAGE_KEY).offset(skip).limit(limit))
+    users = result.scalars().all()
+    if not probed:
+        _set_page_validators(response, users, current_user)
     return users
 
+def _set_page_validators(response: Response, users, current_user: Principal, *extra):
+    etag, last_modified = page_etag(((user.id, _user_version(user)) for user in users), current_user.id, *extra)
+    response.headers.update(validator_headers(etag, last_modified))
+
 @router.get("/{user_id}", response_model=schemas.User)
 async def read_user(
     user_id: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     if not current_user.is_admin:
         raise InsufficientPermission()
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise UserNotFound()
+    version = _user_version(user)
+    cached = not_modified(request, response, row_etag(version), version)
+    if cached is not None:
+        return cached
     return user
 
 @router.put("/{user_id}", response_model=schemas.User)
 async def update_user(
     user_id: str,
     user_update: schemas.UserUpdate,  # You'll need to create this schema
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     if not current_user.is_admin:
         raise InsufficientPermission()
-    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    versions = if_match_versions(request)
+    # Locked so a concurrent update cannot slip in between the If-Match
+    # check and this one
+    db_user = await db.get(models.User, user_id, with_for_update=versions is not None)
     if not db_user:
         raise UserNotFound()
+    if versions is not None and not version_matches(_user_version(db_user), versions):
+        raise PreconditionFailed()
+    previous_username = db_user.username
     
     if user_update.username is not None:
         db_user.username = user_update.username
     if user_update.email is not None:
         db_user.email = user_update.email
     if user_update.password is not None:
-        db_user.password_hash = get_password_hash(user_update.password)
+        db_user.password_hash = await password_hasher.hash(user_update.password)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_principal(previous_username)
+    if db_user.username != previous_username:
+        invalidate_principal(db_user.username)
+    version = _user_version(db_user)
+    response.headers.update(validator_headers(row_etag(version), version))
     return db_user
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: str,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     if not current_user.is_admin:
         raise InsufficientPermission()
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         raise UserNotFound()
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    invalidate_principal(user.username)
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional
+from datetime import date, datetime
 from enum import Enum
 
 class Token(BaseModel):
@@ -26,6 +26,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -48,6 +52,7 @@ class Task(TaskBase):
     status: TaskStatus
     total_minutes: int
     user_id: str
+    assigned_by: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None  # Make this optional
 
@@ -55,4 +60,105 @@ class Task(TaskBase):
         from_attributes = True
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class TaskSearchResult(Task):
+    rank: float  # Relevance; only comparable within one search
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskSearchResult]
+    next_cursor: Optional[str] = None
+
+class TaskBulkUpdate(TaskBase):
+    id: str
+
+class TaskBulkStatus(BaseModel):
+    id: str
+    status: TaskStatus
+
+class TaskBulkResult(BaseModel):
+    id: Optional[str] = None
+    ok: bool
+    task: Optional[Task] = None
+    error_code: Optional[str] = None
+
+class TaskBulkResponse(BaseModel):
+    results: List[TaskBulkResult]
+
+class TimeEntryCreate(BaseModel):
+    minutes: int = Field(gt=0, le=24 * 60)
+    started_at: Optional[datetime] = None
+    note: Optional[str] = None
+    client_entry_id: Optional[str] = None  # Resending the same id is a no-op
+
+class TimeEntryBulkCreate(TimeEntryCreate):
+    task_id: str
+
+class TimeEntry(BaseModel):
+    id: str
+    task_id: str
+    user_id: str
+    minutes: int
+    started_at: Optional[datetime] = None
+    note: Optional[str] = None
+    client_entry_id: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class TimeEntryPage(BaseModel):
+    items: List[TimeEntry]
+    next_cursor: Optional[str] = None
+
+class TimeLogged(BaseModel):
+    entry: TimeEntry
+    total_minutes: int
+    duplicate: bool = False  # Already recorded under this client_entry_id
+
+class TimeEntryBulkResult(BaseModel):
+    task_id: str
+    client_entry_id: Optional[str] = None
+    ok: bool
+    duplicate: bool = False
+    entry: Optional[TimeEntry] = None
+    error_code: Optional[str] = None
+
+class TimeEntryBulkResponse(BaseModel):
+    results: List[TimeEntryBulkResult]
+    totals: Dict[str, int]  # total_minutes of every task written to
+
+class SuggestionResult(BaseModel):
+    title: str
+    description: str
+    ok: bool
+    error_code: Optional[str] = None
+
+class SuggestionBatchResponse(BaseModel):
+    results: List[SuggestionResult]
+
+class StatusCounts(BaseModel):
+    todo: int = 0
+    in_progress: int = 0
+    done: int = 0
+    total: int = 0
+    minutes: int = 0  # Minutes logged on those days, on tasks of those users
+
+class UserStatusCounts(StatusCounts):
+    user_id: str
+
+class DayStatusCounts(StatusCounts):
+    day: date
+
+class AnalyticsSummary(BaseModel):
+    totals: StatusCounts
+    users: List[UserStatusCounts]
+
+class AnalyticsTimeseries(BaseModel):
+    start: date
+    end: date
+    days: List[DayStatusCounts]
@@ -0,0 +1,577 @@
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.config import config
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 3
+
+# Recompute IDF weights for every row once this share of the profiles has
+# changed since they were last computed; in between only changed rows are
+# reweighted with the previous weights.
+IDF_REFRESH_FRACTION = 0.1
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by do for from how in into is it of on or that the this to up with".split()
+)
+
+skills_query_seconds = registry.histogram(
+    "sprintsync_skills_query_seconds",
+    "Time to rank users against a task in the skills index",
+)
+skills_users = registry.gauge(
+    "sprintsync_skills_index_users",
+    "Users with a profile in the skills index",
+)
+skills_profile_lag = registry.histogram(
+    "sprintsync_skills_profile_lag_seconds",
+    "Time from a task write to the assignee's skill profile reflecting it",
+)
+skills_pending = registry.gauge(
+    "sprintsync_skills_pending_users",
+    "Users with task writes not yet applied to their skill profile",
+)
+skills_oldest_pending = registry.gauge(
+    "sprintsync_skills_oldest_pending_seconds",
+    "Age of the oldest task write not yet applied to a skill profile",
+)
+skills_update_errors = registry.counter(
+    "sprintsync_skills_update_errors_total",
+    "Skill profile update batches that failed; POST /admin/skills/rebuild recovers",
+)
+
+@lru_cache(maxsize=65536)
+def _feature(token: str, dim: int) -> Tuple[int, float]:
+    # crc32 is stable across processes, unlike hash(), so snapshots stay valid
+    h = zlib.crc32(token.encode())
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+def term_frequencies(text: str, dim: int) -> Dict[int, float]:
+    """Signed hashed term counts of ``text`` (the hashing trick)."""
+    tf: Dict[int, float] = {}
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        index, sign = _feature(token, dim)
+        tf[index] = tf.get(index, 0.0) + sign
+    return tf
+
+def task_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+def _microseconds(moment: Optional[datetime]) -> int:
+    """A stored timestamp as microseconds since the epoch; -1 for none"""
+    if moment is None:
+        return -1
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)  # SQLite hands back naive UTC
+    return round(moment.timestamp() * 1_000_000)
+
+async def read_watermark(db: AsyncSession) -> Tuple[int, int]:
+    """How far the database's completed tasks have got: (DONE tasks, latest task write).
+
+    Every write that can change a profile moves one or the other: a task
+    entering or leaving DONE or being edited bumps its ``updated_at``, and
+    deleting a DONE task lowers the count.
+    """
+    done, last_write = (await db.execute(select(
+        func.count(models.Task.id).filter(models.Task.status == models.TaskStatus.DONE),
+        func.max(models.Task.updated_at),
+    ))).one()
+    return done, _microseconds(last_write)
+
+class SkillsIndex:
+    """In-process index of user skill profiles for auto-assign.
+
+    Each user's profile is the sum of the hashed term vectors of the tasks
+    they completed, kept as one row of a contiguous float32 matrix, so a
+    task entering or leaving DONE adds or subtracts its vector in place.
+    Ranking weights the profiles by IDF (over profiles, so no row needs
+    the documents it was built from), L2-normalises them and scores every
+    user with a single matrix-vector product (cosine similarity).
+    """
+
+    def __init__(self, dim: int, path: str = ""):
+        self.dim = dim
+        self.path = path
+        self.clear()
+
+    def clear(self):
+        self.user_ids: List[str] = []
+        self.documents = 0
+        self._rows: Dict[str, int] = {}
+        self._counts = np.zeros((0, self.dim), dtype=np.float32)
+        self._weighted = np.zeros((0, self.dim), dtype=np.float32)
+        self._tasks = np.zeros(0, dtype=np.int64)  # Completed tasks per row
+        self._idf: Optional[np.ndarray] = None
+        self._changes_since_idf = 0
+        self._dirty = set()
+        # read_watermark() of the data the profiles were last rebuilt from
+        self.watermark: Optional[Tuple[int, int]] = None
+        skills_users.set(0)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def _row(self, user_id: str) -> int:
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            if row >= len(self._counts):
+                self._grow(max(64, 2 * len(self._counts)))
+        return row
+
+    def _grow(self, capacity: int):
+        for name in ("_counts", "_weighted", "_tasks"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _accumulate(self, vectors: Iterable[Tuple[str, Dict[int, float]]], sign: int = 1):
+        """Add (sign 1) or subtract (sign -1) task vectors from their users' rows"""
+        rows: List[int] = []
+        columns: List[int] = []
+        values: List[float] = []
+        for user_id, tf in vectors:
+            if not tf:
+                continue
+            if sign < 0 and user_id not in self._rows:
+                continue  # Never added, so there is nothing to take away
+            row = self._row(user_id)
+            rows.extend([row] * len(tf))
+            columns.extend(tf)
+            values.extend(value * sign for value in tf.values())
+            self._tasks[row] += sign
+            self.documents += sign
+            self._mark_changed(row)
+        if rows:
+            np.add.at(self._counts, (rows, columns), values)
+        skills_users.set(len(self.user_ids))
+
+    def _mark_changed(self, row: int):
+        if row not in self._dirty:
+            self._dirty.add(row)
+            self._changes_since_idf += 1
+
+    def add(self, user_id: str, text: str):
+        self.add_many([(user_id, text)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str]]):
+        """Fold completed-task texts into their users' profiles."""
+        self._accumulate((user_id, term_frequencies(text, self.dim)) for user_id, text in documents)
+
+    def remove_many(self, documents: Iterable[Tuple[str, str]]):
+        """Take completed-task texts back out of their users' profiles."""
+        self._accumulate(((user_id, term_frequencies(text, self.dim)) for user_id, text in documents), sign=-1)
+
+    def negative_users(self, user_ids: Iterable[str]) -> List[str]:
+        """Users whose completed-task count fell below zero.
+
+        Their profile had a task taken out that it never held, e.g. one
+        completed after the snapshot it was loaded from was taken.
+        """
+        return [
+            user_id for user_id in user_ids
+            if user_id in self._rows and self._tasks[self._rows[user_id]] < 0
+        ]
+
+    def apply_deltas(self, deltas: Iterable[Tuple[str, int, str]]):
+        """Fold (user_id, sign, text) task deltas in, in order.
+
+        Order matters: a task added and then removed in one batch must not
+        be removed first. Consecutive deltas of one sign go in together.
+        """
+        for sign, run in groupby(deltas, key=lambda delta: delta[1]):
+            documents = [(user_id, text) for user_id, _, text in run]
+            if sign < 0:
+                self.remove_many(documents)
+            else:
+                self.add_many(documents)
+
+    def _refresh(self):
+        n = len(self.user_ids)
+        if self._idf is None or self._changes_since_idf > IDF_REFRESH_FRACTION * n:
+            df = np.count_nonzero(self._counts[:n], axis=0)
+            self._idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+            self._changes_since_idf = 0
+            self._reweight(slice(0, n))
+        elif self._dirty:
+            self._reweight(np.fromiter(self._dirty, dtype=np.intp))
+        self._dirty.clear()
+
+    def _reweight(self, rows):
+        weighted = self._counts[rows] * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self._weighted[rows] = weighted / norms
+
+    def top_k(self, text: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Best matching users for ``text`` as (user_id, cosine score), best first.
+
+        Users with no overlap at all (score <= 0) are left out.
+        """
+        started_at = time.perf_counter()
+        n = len(self.user_ids)
+        tf = term_frequencies(text, self.dim)
+        if not n or not tf or k <= 0:
+            return []
+        self._refresh()
+
+        query = np.zeros(self.dim, dtype=np.float32)
+        query[list(tf)] = list(tf.values())
+        query *= self._idf
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self._weighted[:n] @ (query / norm)
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        skills_query_seconds.observe(time.perf_counter() - started_at)
+        return [(self.user_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, path: Optional[str] = None):
+        """Write a snapshot atomically (temp file + rename).
+
+        The temp file is unique, so workers saving at once cannot clobber
+        each other's; the last rename wins.
+        """
+        path = path or self.path
+        n = len(self.user_ids)
+        done, last_write = self.watermark or (-1, -1)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    version=SNAPSHOT_VERSION,
+                    dim=self.dim,
+                    documents=self.documents,
+                    tasks=self._tasks[:n],
+                    counts=self._counts[:n],
+                    user_ids=np.array(self.user_ids, dtype=str),
+                    watermark_done=done,
+                    watermark_last_write=last_write,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.info(f"Saved skills index snapshot with {n} users to {path}")
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Replace the index with a snapshot; False if it is missing or incompatible."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != SNAPSHOT_VERSION or int(data["dim"]) != self.dim:
+                logger.warning(f"Ignoring skills index snapshot {path}: built with other settings")
+                return False
+            self.clear()
+            counts = data["counts"]
+            self._grow(max(64, len(counts)))
+            self._counts[:len(counts)] = counts
+            self._tasks[:len(counts)] = data["tasks"]
+            self.documents = int(data["documents"])
+            self.user_ids = data["user_ids"].tolist()
+            if int(data["watermark_done"]) >= 0:
+                self.watermark = (int(data["watermark_done"]), int(data["watermark_last_write"]))
+        self._rows = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        skills_users.set(len(self.user_ids))
+        logger.info(f"Loaded skills index snapshot with {len(self.user_ids)} users from {path}")
+        return True
+
+    async def _add_from_database(self, session_factory: async_sessionmaker,
+                                 user_ids: Optional[List[str]] = None) -> Tuple[int, int]:
+        """Add the completed tasks of ``user_ids`` (everyone by default).
+
+        Returns the watermark of the data read.
+        """
+        query = (
+            select(models.Task.user_id, models.Task.title, models.Task.description)
+            .where(models.Task.status == models.TaskStatus.DONE, models.Task.user_id.is_not(None))
+            .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        )
+        if user_ids is not None:
+            query = query.where(models.Task.user_id.in_(user_ids))
+        async with session_factory() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                # One snapshot for the watermark and the rows it describes
+                await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            watermark = await read_watermark(db)
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                self.add_many((row.user_id, task_text(row.title, row.description)) for row in rows)
+        return watermark
+
+    async def rebuild(self, session_factory: async_sessionmaker):
+        """Rebuild every profile from the completed tasks in the database."""
+        fresh = SkillsIndex(self.dim, self.path)
+        fresh.watermark = await fresh._add_from_database(session_factory)
+        self.__dict__.update(fresh.__dict__)
+        logger.info(f"Rebuilt skills index: {len(self.user_ids)} users, {self.documents} tasks")
+
+    async def reload_users(self, session_factory: async_sessionmaker, user_ids: List[str]) -> Tuple[int, int]:
+        """Rebuild only these users' profiles from the database.
+
+        Returns the watermark of the data read; ``watermark`` itself stays
+        at the last full rebuild.
+        """
+        fresh = SkillsIndex(self.dim)
+        watermark = await fresh._add_from_database(session_factory, user_ids)
+        for user_id in user_ids:
+            row = self._row(user_id)
+            self.documents -= int(self._tasks[row])
+            self._tasks[row] = 0
+            self._counts[row] = 0
+            self._mark_changed(row)
+        fresh_rows = [fresh._rows[user_id] for user_id in fresh.user_ids]
+        rows = [self._rows[user_id] for user_id in fresh.user_ids]
+        self._counts[rows] = fresh._counts[fresh_rows]
+        self._tasks[rows] = fresh._tasks[fresh_rows]
+        self.documents += fresh.documents
+        skills_users.set(len(self.user_ids))
+        return watermark
+
+    async def load_or_build(self, session_factory: async_sessionmaker):
+        """Startup: load the snapshot if it is current, else rebuild and snapshot.
+
+        A snapshot is current while the database's watermark is the one it
+        was rebuilt at. Deltas applied since are not counted, as other
+        workers' writes never reach this index, so any write in between
+        means a rebuild.
+        """
+        if self.load():
+            async with session_factory() as db:
+                if await read_watermark(db) == self.watermark:
+                    return
+            logger.info("Skills index snapshot is behind the database; rebuilding")
+        await self.rebuild(session_factory)
+        if self.path:
+            self.save()
+
+class ProfileUpdater:
+    """Applies task writes to the skills index in the background.
+
+    Write endpoints call ``task_changed`` after committing with the task's
+    status and text before and after; it only queues the resulting delta
+    (add the text on a move into DONE, subtract it on a move out, both for
+    an edited DONE task). A worker task started in the app lifespan waits
+    until a user's writes have been quiet for ``debounce`` seconds (or the
+    oldest one is ``max_delay`` old), then folds the deltas of up to
+    ``batch_size`` such users into the index.
+
+    Deltas are stamped with the write's ``updated_at``. Whenever profiles
+    are read from the database (``rebuild``, or re-reading a user whose
+    task count went negative), queued deltas stamped at or before the
+    watermark of that read are already part of it and are dropped. Stamps
+    come from the writers' clocks, so skew between workers can still let
+    a write be counted twice or not at all until the next rebuild.
+    """
+
+    def __init__(self, index: SkillsIndex, debounce: float, max_delay: float, batch_size: int):
+        self.index = index
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.session_factory: Optional[async_sessionmaker] = None
+        self._pending: Dict[str, Tuple[float, float]] = {}  # user_id -> (first, last) write time
+        self._deltas: Dict[str, List[Tuple[int, str, int]]] = {}  # user_id -> [(sign, task text, stamp)]
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def oldest_pending_age(self) -> float:
+        if not self._pending:
+            return 0.0
+        return time.monotonic() - min(first for first, _ in self._pending.values())
+
+    def task_changed(self, user_id: Optional[str], old_status: Optional[models.TaskStatus],
+                     old_text: Optional[str], new_status: Optional[models.TaskStatus],
+                     new_text: Optional[str], version: datetime):
+        """Queue the profile delta of one committed task write.
+
+        A created task has no old status and a deleted one no new status.
+        ``version`` is the task's updated_at after the write, or the time
+        of a delete. Only DONE tasks are part of a profile, so most writes
+        queue nothing.
+        """
+        done = models.TaskStatus.DONE
+        if old_status == done and new_status == done and old_text == new_text:
+            return
+        if old_status == done:
+            self.enqueue(user_id, -1, old_text, version)
+        if new_status == done:
+            self.enqueue(user_id, 1, new_text, version)
+
+    def enqueue(self, user_id: Optional[str], sign: int, text: str, version: datetime):
+        if not user_id:
+            return
+        self._deltas.setdefault(user_id, []).append((sign, text, _microseconds(version)))
+        now = time.monotonic()
+        first, _ = self._pending.get(user_id, (now, now))
+        self._pending[user_id] = (first, now)
+        skills_pending.set(len(self._pending))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, session_factory: async_sessionmaker):
+        # Event and Lock are created here so they belong to the running loop
+        self.session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        if self._pending:
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Apply whatever is pending, then stop the worker."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Could not apply pending skill profile updates on shutdown")
+
+    async def flush(self):
+        """Apply every pending update now, ignoring the debounce."""
+        while self._pending:
+            await self._apply(list(self._pending)[:self.batch_size])
+
+    async def rebuild(self, session_factory: Optional[async_sessionmaker] = None):
+        """Full rebuild from the database; covers everything enqueued so far.
+
+        Of the deltas queued while it runs, those the rebuild already read
+        are dropped and the rest are applied on top afterwards.
+        """
+        async with self._lock:
+            applied, self._pending = self._pending, {}
+            deltas, self._deltas = self._deltas, {}
+            skills_pending.set(0)
+            try:
+                await self.index.rebuild(session_factory or self.session_factory)
+            except BaseException:
+                self._requeue(applied, deltas)
+                raise
+            self._discard_seen(self.index.watermark)
+            self._observe_lag(applied)
+
+    def _due(self, now: float) -> Tuple[List[str], float]:
+        """Users ready for an update, and seconds until the next one is ready."""
+        due, wait = [], self.debounce
+        for user_id, (first, last) in self._pending.items():
+            ready_at = min(last + self.debounce, first + self.max_delay)
+            if ready_at <= now:
+                due.append(user_id)
+            else:
+                wait = min(wait, ready_at - now)
+        return due, wait
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                due, wait = self._due(time.monotonic())
+                if not due:
+                    await asyncio.sleep(wait)
+                    continue
+                try:
+                    await self._apply(due[:self.batch_size])
+                except Exception:
+                    skills_update_errors.inc()
+                    logger.exception("Skill profile update failed; rebuild the skills index to recover")
+                    await asyncio.sleep(self.debounce)
+
+    async def _apply(self, user_ids: List[str]):
+        # The lock keeps deltas out of an index that rebuild() is replacing
+        async with self._lock:
+            taken = {user_id: self._pending.pop(user_id) for user_id in user_ids if user_id in self._pending}
+            deltas = {user_id: self._deltas.pop(user_id, []) for user_id in taken}
+            skills_pending.set(len(self._pending))
+            if not taken:
+                return
+            # Not requeued on failure: a batch that stopped halfway would be
+            # applied twice. The error metric says when to rebuild instead.
+            self.index.apply_deltas(
+                (user_id, sign, text) for user_id, entries in deltas.items() for sign, text, _ in entries
+            )
+            broken = self.index.negative_users(taken)
+            if broken and self.session_factory is not None:
+                logger.warning(f"Skill profiles of {len(broken)} users lost tasks they never had; re-reading them")
+                watermark = await self.index.reload_users(self.session_factory, broken)
+                self._discard_seen(watermark, broken)
+            self._observe_lag(taken)
+
+    def _discard_seen(self, watermark: Tuple[int, int], user_ids: Optional[List[str]] = None):
+        # Drop queued deltas that a read of the database at ``watermark``
+        # already included
+        _, last_write = watermark
+        for user_id in list(self._deltas) if user_ids is None else user_ids:
+            unseen = [delta for delta in self._deltas.get(user_id, []) if delta[2] > last_write]
+            if unseen:
+                self._deltas[user_id] = unseen
+            else:
+                self._deltas.pop(user_id, None)
+                self._pending.pop(user_id, None)
+        skills_pending.set(len(self._pending))
+
+    def _requeue(self, entries: Dict[str, Tuple[float, float]], deltas: Dict[str, List[Tuple[int, str, int]]]):
+        # Keep the original write times so the lag metric stays honest, and
+        # the deltas ahead of any queued since
+        for user_id, (first, last) in entries.items():
+            current = self._pending.get(user_id)
+            if current is not None:
+                first, last = min(first, current[0]), max(last, current[1])
+            self._pending[user_id] = (first, last)
+        for user_id, entries in deltas.items():
+            self._deltas[user_id] = entries + self._deltas.get(user_id, [])
+        skills_pending.set(len(self._pending))
+
+    def _observe_lag(self, entries: Dict[str, Tuple[float, float]]):
+        now = time.monotonic()
+        for first, _ in entries.values():
+            skills_profile_lag.observe(now - first)
+
+skills_index = SkillsIndex(config.SKILLS_INDEX_DIM, config.SKILLS_INDEX_PATH)
+skills_updater = ProfileUpdater(
+    skills_index,
+    debounce=config.SKILLS_UPDATE_DEBOUNCE_SECONDS,
+    max_delay=config.SKILLS_UPDATE_MAX_DELAY_SECONDS,
+    batch_size=config.SKILLS_UPDATE_BATCH_SIZE,
+)
+
+@registry.add_collector
+def _collect_profile_lag():
+    skills_oldest_pending.set(skills_updater.oldest_pending_age())
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.cache import TTLCache
+from app.config import config
+from app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+suggestion_lookups = registry.counter(
+    "sprintsync_ai_suggestions_total",
+    "AI suggestions served, by where the answer came from",
+    ["source"],
+)
+suggestion_saved_seconds = registry.counter(
+    "sprintsync_ai_suggestion_saved_seconds_total",
+    "LLM latency avoided by serving suggestions from the cache or a shared call",
+)
+suggestion_hit_ratio = registry.gauge(
+    "sprintsync_ai_suggestion_hit_ratio",
+    "Share of AI suggestions served without a new LLM call",
+)
+
+# Sources that did not need an LLM call of their own
+CACHED_SOURCES = ("memory", "database", "coalesced")
+
+def normalize_title(title: str) -> str:
+    """Case- and whitespace-insensitive form of a task title."""
+    return " ".join(title.casefold().split())
+
+def suggestion_key(model: str, title: str) -> str:
+    return hashlib.sha256(f"{model}\n{normalize_title(title)}".encode()).hexdigest()
+
+class SuggestionCache:
+    """Cache in front of the LLM for /ai/suggest.
+
+    Entries live in an in-memory LRU with TTL and, when ``persist`` is on,
+    in the ai_suggestions table so they survive restarts and are shared by
+    workers. Concurrent requests for the same key share one upstream call.
+    Failures are never cached: every waiter sees the exception.
+    """
+
+    def __init__(self, memory: TTLCache, persist: bool = False):
+        self.memory = memory
+        self.persist = persist
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get_or_create(
+        self,
+        model: str,
+        title: str,
+        produce: Callable[[], Awaitable[str]],
+        db: Optional[AsyncSession] = None,
+    ) -> str:
+        key = suggestion_key(model, title)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            description, latency = cached
+            self._record("memory", latency)
+            return description
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            description, latency = await asyncio.shield(pending)
+            self._record("coalesced", latency)
+            return description
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            entry, source = await self._load_or_produce(key, model, title, produce, db)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn if there are none
+            raise
+        except BaseException:
+            # The leading request was cancelled; waiters should fail like any
+            # other upstream error rather than being cancelled themselves.
+            future.set_exception(RuntimeError("Shared AI suggestion call was cancelled"))
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+        future.set_result(entry)
+        self._record(source, entry[1])
+        return entry[0]
+
+    async def lookup(self, model: str, title: str, db: Optional[AsyncSession] = None) -> Optional[str]:
+        """Cached description for callers that produce their own, e.g. streaming."""
+        key = suggestion_key(model, title)
+        cached = self.memory.get(key)
+        if cached is not None:
+            self._record("memory", cached[1])
+            return cached[0]
+        entry = await self._load_entry(key, db)
+        if entry is not None:
+            self._record("database", entry[1])
+            return entry[0]
+        return None
+
+    async def store(self, model: str, title: str, description: str, latency: float,
+                    db: Optional[AsyncSession] = None):
+        """Record a description produced outside get_or_create."""
+        await self._save(suggestion_key(model, title), model, title, description, latency, db)
+        self._record("llm", latency)
+
+    async def _load_or_produce(self, key, model, title, produce, db):
+        entry = await self._load_entry(key, db)
+        if entry is not None:
+            return entry, "database"
+
+        started_at = time.perf_counter()
+        description = await produce()
+        latency = time.perf_counter() - started_at
+
+        await self._save(key, model, title, description, latency, db)
+        return (description, latency), "llm"
+
+    async def _load_entry(self, key: str, db: Optional[AsyncSession]):
+        if not self.persist or db is None:
+            return None
+        row = await self._load(db, key)
+        if row is None:
+            return None
+        entry = (row.description, row.latency_ms / 1000)
+        self.memory.set(key, entry)
+        return entry
+
+    async def _save(self, key, model, title, description, latency, db):
+        self.memory.set(key, (description, latency))
+        if self.persist and db is not None:
+            await self._store(db, key, model, title, description, latency)
+
+    async def _load(self, db: AsyncSession, key: str) -> Optional[models.AISuggestion]:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.memory.ttl)
+        try:
+            return await db.scalar(
+                select(models.AISuggestion).where(
+                    models.AISuggestion.key == key,
+                    models.AISuggestion.created_at > cutoff,
+                )
+            )
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not read cached AI suggestion: {e}")
+            await db.rollback()
+            return None
+
+    async def _store(self, db: AsyncSession, key, model, title, description, latency):
+        # merge() replaces an expired row; a concurrent insert from another
+        # worker just loses the race, which is harmless for a cache.
+        try:
+            await db.merge(models.AISuggestion(
+                key=key,
+                model=model,
+                title=normalize_title(title),
+                description=description,
+                latency_ms=latency * 1000,
+                created_at=models.utcnow(),
+            ))
+            await db.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not persist AI suggestion: {e}")
+            await db.rollback()
+
+    def _record(self, source: str, latency: float):
+        suggestion_lookups.inc(source=source)
+        if source in CACHED_SOURCES:
+            suggestion_saved_seconds.inc(latency)
+
+    def clear(self):
+        self.memory.clear()
+
+@registry.add_collector
+def _collect_hit_ratio():
+    served = {source: suggestion_lookups.value(source=source) for source in CACHED_SOURCES + ("llm",)}
+    total = sum(served.values())
+    if total:
+        suggestion_hit_ratio.set(sum(served[source] for source in CACHED_SOURCES) / total)
+
+suggestion_cache = SuggestionCache(
+    TTLCache("ai_suggestions", config.AI_CACHE_SIZE, config.AI_CACHE_TTL_SECONDS),
+    persist=config.AI_CACHE_PERSIST,
+)
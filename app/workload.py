@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.config import config
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def task_load(status: Optional[models.TaskStatus], minutes: Optional[int]) -> Tuple[int, int]:
+    """What one task adds to its owner's (open_tasks, open_minutes)"""
+    if status == models.TaskStatus.DONE:
+        return 0, 0
+    return 1, minutes or 0
+
+class WorkloadDeltas:
+    """Counter changes collected while writing tasks, applied before commit"""
+
+    def __init__(self):
+        self._deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, user_id: Optional[str], load: Tuple[int, int], sign: int = 1):
+        if user_id is None:
+            return
+        delta = self._deltas[user_id]
+        delta[0] += sign * load[0]
+        delta[1] += sign * load[1]
+
+    def created(self, user_id, status, minutes):
+        self.add(user_id, task_load(status, minutes))
+
+    def deleted(self, user_id, status, minutes):
+        self.add(user_id, task_load(status, minutes), sign=-1)
+
+    def changed(self, user_id, old_status, old_minutes, new_status, new_minutes):
+        self.deleted(user_id, old_status, old_minutes)
+        self.created(user_id, new_status, new_minutes)
+
+    def items(self) -> List[Tuple[str, int, int]]:
+        """Non-zero (user_id, tasks, minutes) changes in user_id order"""
+        return [
+            (user_id, tasks, minutes)
+            for user_id, (tasks, minutes) in sorted(self._deltas.items())
+            if tasks or minutes
+        ]
+
+async def apply_workload_deltas(db: AsyncSession, deltas: WorkloadDeltas):
+    """Add the deltas to user_workloads in the caller's transaction.
+
+    Increments are done by the database (``open_tasks = open_tasks + ?``),
+    so concurrent writers never lose updates. Rows are touched in user_id
+    order to keep multi-user batches from deadlocking each other.
+    """
+    rows = [
+        {"user_id": user_id, "open_tasks": tasks, "open_minutes": minutes}
+        for user_id, tasks, minutes in deltas.items()
+    ]
+    if not rows:
+        return
+    table = models.UserWorkload.__table__
+    make_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if make_insert is not None:
+        stmt = make_insert(table).values(rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={
+                "open_tasks": table.c.open_tasks + stmt.excluded.open_tasks,
+                "open_minutes": table.c.open_minutes + stmt.excluded.open_minutes,
+            },
+        ))
+        return
+    for row in rows:
+        result = await db.execute(
+            update(table)
+            .where(table.c.user_id == row["user_id"])
+            .values(
+                open_tasks=table.c.open_tasks + row["open_tasks"],
+                open_minutes=table.c.open_minutes + row["open_minutes"],
+            )
+        )
+        if result.rowcount == 0:
+            await db.execute(table.insert().values(row))
+
+async def rebuild_workloads(db: AsyncSession) -> int:
+    """Recount every user's open tasks from the tasks table; returns rows written.
+
+    For repairing counters after writes that bypassed the API.
+    """
+    table = models.UserWorkload.__table__
+    task = models.Task
+    await db.execute(table.delete())
+    counts = (
+        select(task.user_id, func.count(), func.coalesce(func.sum(task.total_minutes), 0))
+        .join(models.User, models.User.id == task.user_id)
+        .where((task.status.is_(None)) | (task.status != models.TaskStatus.DONE))
+        .group_by(task.user_id)
+    )
+    result = await db.execute(
+        table.insert().from_select(["user_id", "open_tasks", "open_minutes"], counts)
+    )
+    return result.rowcount
+
+class Candidate(NamedTuple):
+    user: models.User
+    similarity: float
+    open_tasks: int
+    open_minutes: int
+    score: float
+
+def matching_score(similarity: float, open_tasks: int, open_minutes: int) -> float:
+    """Skill similarity discounted by the work a user already has open.
+
+    ``similarity / (1 + AUTO_ASSIGN_TASK_WEIGHT * tasks + AUTO_ASSIGN_HOUR_WEIGHT * hours)``:
+    an idle user keeps their full similarity, a busy one needs a clearly
+    better skills match to win.
+    """
+    load = (
+        config.AUTO_ASSIGN_TASK_WEIGHT * open_tasks
+        + config.AUTO_ASSIGN_HOUR_WEIGHT * open_minutes / 60
+    )
+    return similarity / (1 + max(load, 0))
+
+async def rank_candidates(db: AsyncSession, matches: Sequence[Tuple[str, float]]) -> List[Candidate]:
+    """Existing users among ``matches`` with their workload, best score first.
+
+    One query validates every candidate and reads their counters; users
+    deleted since the skills index was built are dropped.
+    """
+    if not matches:
+        return []
+    similarities = dict(matches)
+    result = await db.execute(
+        select(models.User, models.UserWorkload.open_tasks, models.UserWorkload.open_minutes)
+        .outerjoin(models.UserWorkload, models.UserWorkload.user_id == models.User.id)
+        .where(models.User.id.in_(list(similarities)))
+    )
+    candidates = []
+    for user, open_tasks, open_minutes in result.all():
+        open_tasks, open_minutes = open_tasks or 0, open_minutes or 0
+        similarity = similarities[user.id]
+        candidates.append(Candidate(
+            user, similarity, open_tasks, open_minutes,
+            matching_score(similarity, open_tasks, open_minutes),
+        ))
+    # Ties go to the better skills match, then to the index's order
+    order = {user_id: position for position, (user_id, _) in enumerate(matches)}
+    candidates.sort(key=lambda c: (-c.score, -c.similarity, order[c.user.id]))
+    return candidates
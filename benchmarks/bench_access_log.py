@@ -0,0 +1,131 @@
+"""Access logging cost per request: synchronous stream handler vs queued JSON pipeline.
+
+"before" formats the old f-string line and writes it through a plain
+StreamHandler, as logging.basicConfig did, so the caller pays for the
+write. "after" calls log_access(), which only enqueues the record; a
+QueueListener thread formats JSON and writes it. Both write to a sink that
+sleeps --sink-delay per write to stand in for stdout backpressure (0 means
+/dev/null speed).
+
+The end-to-end section times GET / through the app in-process with every
+request logged (ACCESS_LOG_SAMPLE_RATE=1) and with 2xx sampling off (0),
+alternating for --rounds rounds and reporting the median of each.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_access_log
+"""
+import argparse
+import asyncio
+import io
+import logging
+import queue
+import statistics
+import time
+from logging.handlers import QueueListener
+
+import httpx
+
+from app.access_log import DroppingQueueHandler, JSONFormatter, access_logger, log_access
+from app.config import config
+from app.database import QueryTimer
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.writes += 1
+        return len(text)
+
+    def flush(self):
+        pass
+
+def before(requests: int, sink: SlowSink) -> float:
+    logger = logging.getLogger("bench.before")
+    logger.propagate = False
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    started = time.perf_counter()
+    for i in range(requests):
+        logger.info(
+            f"Method=GET "
+            f"Path=/tasks/{i} "
+            f"Status=200 "
+            f"UserID=user-{i % 100} "
+            f"Latency={1.234:.2f}ms"
+        )
+    return time.perf_counter() - started
+
+def queue_access_log(sink: SlowSink, queue_size: int) -> QueueListener:
+    """Point the access logger at its own queue pipeline, as configure_logging does for root"""
+    log_queue = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(sink)
+    output.setFormatter(JSONFormatter())
+    access_logger.propagate = False
+    access_logger.handlers = [DroppingQueueHandler(log_queue)]
+    access_logger.setLevel(logging.INFO)
+    return QueueListener(log_queue, output)
+
+def after(requests: int, sink: SlowSink, queue_size: int) -> float:
+    listener = queue_access_log(sink, queue_size)
+    timer = QueryTimer()
+    timer.seconds, timer.queries = 0.0008, 2
+
+    listener.start()
+    started = time.perf_counter()
+    for i in range(requests):
+        log_access("GET", "/tasks/{task_id}", 200, f"user-{i % 100}", 0.001234, timer)
+    elapsed = time.perf_counter() - started
+    listener.stop()
+    return elapsed
+
+async def end_to_end(requests: int, sample_rate: float) -> float:
+    from app.main import app
+
+    config.ACCESS_LOG_SAMPLE_RATE = sample_rate
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/")
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sink-delay", type=float, default=0.0002, help="Seconds each write to the sink blocks")
+    parser.add_argument("--http-requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_delay)
+    elapsed = before(args.requests, sink)
+    print(f"before: {elapsed / args.requests * 1e6:7.1f} us/request in the caller ({sink.writes} lines written)")
+
+    sink = SlowSink(args.sink_delay)
+    elapsed = after(args.requests, sink, queue_size=args.requests)
+    print(f" after: {elapsed / args.requests * 1e6:7.1f} us/request in the caller ({sink.writes} lines written)")
+
+    listener = queue_access_log(SlowSink(args.sink_delay), config.LOG_QUEUE_SIZE)
+    listener.start()
+    rounds = {0.0: [], 1.0: []}
+    for _ in range(args.rounds):
+        for rate in rounds:
+            elapsed = asyncio.run(end_to_end(args.http_requests, rate))
+            rounds[rate].append(elapsed / args.http_requests)
+    listener.stop()
+    results = {rate: statistics.median(times) for rate, times in rounds.items()}
+    for rate, per_request in results.items():
+        print(f"GET / with ACCESS_LOG_SAMPLE_RATE={rate}: {per_request * 1e6:7.1f} us/request (median)")
+    print(f"access log overhead: {(results[1.0] - results[0.0]) * 1e6:.1f} us/request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Sprint analytics at scale: GROUP BY over tasks vs the rollup tables.
+
+Seeds N synthetic tasks (1M by default) for --users users, spread over
+about a year, into a SQLite file or the database given with
+--database-url, and builds the rollups with the reconciliation job
+(timed). Then, for the summary (every user, by status) and a --days day
+timeseries:
+
+- "before" aggregates the tasks and time_entries tables, what the
+  endpoints would have to run without rollups;
+- "after" runs the same aggregates over task_rollups and time_rollups,
+  and the endpoint is timed end to end in-process.
+
+Seeded tasks have no time entries, so the minutes queries only measure
+their fixed cost.
+
+The median of --repeat runs is reported. Finally POST /tasks/ is timed
+with and without the rollup upsert, the write-side cost.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_analytics --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import analytics, models
+from app.auth import create_access_token
+from app.database import get_db, make_async_url
+from app.main import app
+from benchmarks.bench_export import seed
+
+SEED_START = datetime(2025, 1, 1, tzinfo=timezone.utc)  # As in bench_export.seed
+# One task every 30 seconds: 1M tasks cover just under a year
+SEED_SPACING = timedelta(seconds=30)
+
+async def median_seconds(repeat: int, run) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+async def run(args, url: str):
+    engine = create_async_engine(make_async_url(url))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        started = time.perf_counter()
+        rows = await analytics.rebuild_rollups(session)
+        await session.commit()
+        print(f"reconcile: {rows} rollup rows from {args.rows} tasks in {time.perf_counter() - started:.2f}s")
+
+        dialect_name = session.get_bind().dialect.name
+        task, entry = models.Task, models.TimeEntry
+        rollup, time_rollup = models.TaskRollup, models.TimeRollup
+        end = (SEED_START + args.rows * SEED_SPACING).date()  # The last --days days seeded
+        start = end - timedelta(days=args.days - 1)
+        task_day = analytics._day_column(dialect_name, task.created_at)
+        entry_day = analytics._day_column(dialect_name, func.coalesce(entry.started_at, entry.created_at))
+        since = datetime.combine(start, datetime.min.time(), timezone.utc)
+        until = datetime.combine(end + timedelta(days=1), datetime.min.time(), timezone.utc)
+        queries = {
+            "summary": (
+                [
+                    select(task.user_id, task.status, func.count()).group_by(task.user_id, task.status),
+                    select(task.user_id, func.sum(entry.minutes))
+                    .join(task, task.id == entry.task_id)
+                    .group_by(task.user_id),
+                ],
+                [
+                    select(rollup.user_id, rollup.status, func.sum(rollup.tasks))
+                    .group_by(rollup.user_id, rollup.status),
+                    select(time_rollup.user_id, func.sum(time_rollup.minutes)).group_by(time_rollup.user_id),
+                ],
+                "/analytics/summary",
+            ),
+            "timeseries": (
+                [
+                    select(task_day, task.status, func.count())
+                    .where(task.created_at >= since, task.created_at < until)
+                    .group_by(task_day, task.status),
+                    select(entry_day, func.sum(entry.minutes))
+                    .where(func.coalesce(entry.started_at, entry.created_at) >= since,
+                           func.coalesce(entry.started_at, entry.created_at) < until)
+                    .group_by(entry_day),
+                ],
+                [
+                    select(rollup.day, rollup.status, func.sum(rollup.tasks))
+                    .where(rollup.day >= start, rollup.day <= end)
+                    .group_by(rollup.day, rollup.status),
+                    select(time_rollup.day, func.sum(time_rollup.minutes))
+                    .where(time_rollup.day >= start, time_rollup.day <= end)
+                    .group_by(time_rollup.day),
+                ],
+                f"/analytics/timeseries?start={start}&end={end}",
+            ),
+        }
+
+        async def execute_all(statements):
+            for statement in statements:
+                await session.execute(statement)
+
+        async def bench_db():
+            async with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = bench_db
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user0'})}"}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (before, after, path) in queries.items():
+                before_s = await median_seconds(args.repeat, lambda: execute_all(before))
+                after_s = await median_seconds(args.repeat, lambda: execute_all(after))
+                assert (await client.get(path, headers=headers)).status_code == 200
+                endpoint_s = await median_seconds(args.repeat, lambda: client.get(path, headers=headers))
+                print(
+                    f"{name:<10} before {before_s * 1000:9.1f} ms   after {after_s * 1000:7.2f} ms "
+                    f"({before_s / after_s:,.0f}x)   endpoint {endpoint_s * 1000:7.2f} ms"
+                )
+
+            # Write side: the same create with the rollup upsert skipped
+            apply_rollup_deltas = analytics.apply_rollup_deltas
+            create = lambda: client.post("/tasks/", json={"title": "Bench task"}, headers=headers)
+            with_rollups = await median_seconds(args.repeat * 10, create)
+
+            async def skip_rollups(db, deltas):
+                pass
+
+            analytics.apply_rollup_deltas = skip_rollups
+            try:
+                without_rollups = await median_seconds(args.repeat * 10, create)
+            finally:
+                analytics.apply_rollup_deltas = apply_rollup_deltas
+            print(
+                f"POST /tasks/ without rollups {without_rollups * 1000:.2f} ms, "
+                f"with {with_rollups * 1000:.2f} ms"
+            )
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100, help="Rollup rows shrink with tasks per user per day")
+    parser.add_argument("--days", type=int, default=30, help="Days in the timeseries request")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", help="Seed and query this database instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'analytics.db')}"
+        started = time.perf_counter()
+        seed(url, args.rows, args.users, spacing=SEED_SPACING)
+        engine = create_engine(url)
+        with engine.begin() as connection:
+            connection.execute(update(models.User).where(models.User.id == "user-0").values(is_admin=True))
+        engine.dispose()
+        print(f"seeded {args.rows} tasks in {time.perf_counter() - started:.1f}s")
+        asyncio.run(run(args, url))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Concurrent-request throughput: sync Session vs AsyncSession in async handlers.
+
+Both endpoints run the same query against a SQLite file. A ``rtt(ms)`` SQL
+function is registered on every connection to stand in for the network round
+trip to Postgres; in the sync variant it blocks the event loop (as the old
+``Session``-based handlers did), in the async variant it runs on the
+aiosqlite worker thread while the loop keeps serving other requests.
+
+Usage:
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --rtt-ms 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+def _register_rtt(dbapi_connection, connection_record):
+    dbapi_connection.create_function("rtt", 1, lambda ms: time.sleep(ms / 1000.0) or 1)
+
+def build_app(path: str, rtt_ms: float, pool_size: int):
+    # Size both pools to the concurrency level so only the driver differs
+    sync_engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=pool_size
+    )
+    event.listen(sync_engine, "connect", _register_rtt)
+    SyncSession = sessionmaker(bind=sync_engine)
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=pool_size)
+    event.listen(async_engine.sync_engine, "connect", _register_rtt)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    query = text("SELECT rtt(:ms)")
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route(db: Session = Depends(get_sync_db)):
+        return {"v": db.execute(query, {"ms": rtt_ms}).scalar()}
+
+    @app.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        return {"v": (await db.execute(query, {"ms": rtt_ms})).scalar()}
+
+    return app, async_engine
+
+async def drive(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    async def run(path: str) -> None:
+        app, async_engine = build_app(path, args.rtt_ms, args.concurrency)
+        try:
+            for label, route in (("before (sync Session)", "/sync"), ("after (AsyncSession)", "/async")):
+                elapsed = await drive(app, route, args.requests, args.concurrency)
+                print(f"{label:<24} {args.requests / elapsed:8.1f} req/s  ({elapsed:.2f}s total)")
+        finally:
+            await async_engine.dispose()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "bench.db")))
+
+if __name__ == "__main__":
+    main()
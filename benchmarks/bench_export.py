@@ -0,0 +1,95 @@
+"""Streaming export of a large task table: throughput and peak memory.
+
+Seeds N synthetic tasks (1M by default) into a SQLite file, or into the
+database given with --database-url, then drains the GET /tasks/export body
+generator in NDJSON or CSV form. Peak Python heap during the export is
+measured with tracemalloc and should stay flat as N grows.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_export --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.auth import Principal
+from app.database import make_async_url
+from app.router.tasks import EXPORT_COLUMNS, _stream_export, build_task_query
+
+def seed(url: str, rows: int, users: int, chunk: int = 20000, spacing: timedelta = timedelta(seconds=1)):
+    engine = create_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    statuses = list(models.TaskStatus)
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {"id": f"user-{u}", "username": f"user{u}", "email": f"user{u}@example.com"}
+            for u in range(users)
+        ])
+        for offset in range(0, rows, chunk):
+            connection.execute(insert(models.Task), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Synthetic task {i}",
+                    "description": f"Generated description for task {i}, used for export benchmarks",
+                    "status": statuses[i % len(statuses)],
+                    "total_minutes": i % 480,
+                    "user_id": f"user-{i % users}",
+                    "created_at": start + i * spacing,
+                    "updated_at": start + i * spacing,
+                }
+                for i in range(offset, min(offset + chunk, rows))
+            ])
+    engine.dispose()
+
+async def export(url: str, export_format: str):
+    engine = create_async_engine(make_async_url(url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    admin = Principal(id="bench", username="bench", email="bench@example.com", is_admin=True)
+    query, key, _ = build_task_query(admin)
+    query = query.with_only_columns(*EXPORT_COLUMNS).order_by(*key)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    total_bytes = 0
+    async for chunk in _stream_export(session_factory, query, export_format):
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await engine.dispose()
+    return elapsed, total_bytes, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--database-url", help="Seed and export from this database instead of a temp SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'export.db')}"
+        started = time.perf_counter()
+        seed(url, args.rows, args.users)
+        print(f"seeded {args.rows} tasks in {time.perf_counter() - started:.1f}s")
+
+        elapsed, total_bytes, peak = asyncio.run(export(url, args.format))
+        print(
+            f"exported {args.rows} rows as {args.format}: {elapsed:.1f}s "
+            f"({args.rows / elapsed:,.0f} rows/s, {total_bytes / 1e6:.1f} MB), "
+            f"peak heap {peak / 1e6:.1f} MB"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""/ai/suggest LLM call throughput: per-request blocking client vs shared async client.
+
+Starts the fake LLM server (benchmarks/fake_llm.py) on a local port and
+fires N concurrent suggestion calls from one event loop. "before" builds a
+ChatGroq per call and uses the blocking invoke(), as the handler used to,
+so every call stalls the loop. "after" shares one LLMClient using ainvoke()
+behind the LLM_MAX_CONCURRENCY semaphore.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_llm_client
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import uvicorn
+from langchain_groq import ChatGroq
+
+from app.config import config
+from app.llm import create_llm_client
+from app.router.ai import suggest_prompt
+from benchmarks.fake_llm import FakeLLM
+
+def start_fake_llm(latency: float) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    fake = FakeLLM(latency=latency)
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+async def before(base_url: str, requests: int):
+    async def call(i):
+        chat = ChatGroq(model_name=config.GROQ_MODEL, groq_api_key="fake", groq_api_base=base_url)
+        return chat.invoke(suggest_prompt(f"Task {i}")).content
+
+    await asyncio.gather(*(call(i) for i in range(requests)))
+
+async def after(base_url: str, requests: int, concurrency: int):
+    llm = create_llm_client(api_key="fake", base_url=base_url, max_concurrency=concurrency)
+    await asyncio.gather(*(llm.complete(suggest_prompt(f"Task {i}")) for i in range(requests)))
+    await llm.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds per completion")
+    parser.add_argument("--concurrency", type=int, default=config.LLM_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    base_url = start_fake_llm(args.latency)
+    for name, run in (
+        ("before", lambda: before(base_url, args.requests)),
+        ("after", lambda: after(base_url, args.requests, args.concurrency)),
+    ):
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        print(f"{name:>6}: {args.requests} calls in {elapsed:.2f}s ({args.requests / elapsed:.1f} calls/s)")
+
+if __name__ == "__main__":
+    main()
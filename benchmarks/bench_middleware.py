@@ -0,0 +1,112 @@
+"""Request throughput with the access log as BaseHTTPMiddleware vs pure ASGI middleware.
+
+"before" wraps the app in Starlette's BaseHTTPMiddleware running the same
+timing, metrics and logging code the old ``@app.middleware("http")``
+function ran. "after" is AccessLogMiddleware. Both drive GET / and an
+authenticated GET /tasks/ (a page of --page tasks from a seeded SQLite
+file) in-process over httpx's ASGI transport with --concurrency clients.
+Access log records go to a discarding handler so only the middleware
+differs.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_middleware
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.access_log import access_logger
+from app.auth import create_access_token
+from app.database import get_db, make_async_url
+from app.main import app
+from app.middleware import AccessLogMiddleware, begin_request, finish_request
+from benchmarks.bench_export import seed
+
+async def log_requests(request, call_next):
+    # The old middleware function, body moved into begin/finish_request
+    timing = begin_request(request)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        finish_request(request, timing, status_code)
+
+def use_middleware(variant: str):
+    """Swap the access log layer; the stack is rebuilt on the next request"""
+    stack = [m for m in app.user_middleware if m.cls is not AccessLogMiddleware
+             and m.cls is not BaseHTTPMiddleware]
+    if variant == "before":
+        layer = Middleware(BaseHTTPMiddleware, dispatch=log_requests)
+    else:
+        layer = Middleware(AccessLogMiddleware)
+    app.user_middleware = [layer] + stack
+    app.middleware_stack = None
+
+async def drive(path: str, headers: dict, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):
+            assert (await client.get(path, headers=headers)).status_code == 200
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await client.get(path, headers=headers)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+async def run(args, url: str):
+    engine = create_async_engine(make_async_url(url))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def bench_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = bench_db
+    auth = {"Authorization": f"Bearer {create_access_token({'sub': 'user0'})}"}
+
+    for label, route, headers in (("GET /", "/", {}), ("GET /tasks/", f"/tasks/?limit={args.page}", auth)):
+        best = {"before": 0.0, "after": 0.0}
+        for _ in range(args.rounds):
+            for variant in best:
+                use_middleware(variant)
+                rps = await drive(route, headers, args.requests, args.concurrency)
+                best[variant] = max(best[variant], rps)
+        change = (best["after"] / best["before"] - 1) * 100
+        print(f"{label:<12} before {best['before']:8.0f} req/s   after {best['after']:8.0f} req/s   ({change:+.0f}%)")
+    await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks seeded for the listing")
+    parser.add_argument("--page", type=int, default=20, help="Tasks per GET /tasks/ page")
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating rounds; the best of each is reported")
+    args = parser.parse_args()
+
+    access_logger.propagate = False
+    access_logger.handlers = [logging.NullHandler()]
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_middleware.db')}"
+    seed(url, rows=args.tasks, users=1)
+    asyncio.run(run(args, url))
+
+if __name__ == "__main__":
+    main()
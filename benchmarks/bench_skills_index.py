@@ -0,0 +1,107 @@
+"""Skills index at scale: build, snapshot and auto-assign ranking latency.
+
+Generates N users (10k by default), each with a few specialty topics, and
+M completed tasks (1M by default) whose titles mix specialty and generic
+words. Reports index build time and size, snapshot save/load time, query
+latency percentiles, how often the top match shares the query's topic, and
+the cost of an incremental profile update batch.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db JWT_SECRET=bench python -m benchmarks.bench_skills_index
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.config import config
+from app.skills import SkillsIndex
+
+GENERIC = "fix add update improve refactor review implement support handle cleanup page api flow".split()
+
+def make_topics(count: int, rng: random.Random):
+    syllables = "ka lo mi ne ru ta vo xi ze pa qu so".split()
+    return [
+        [f"{rng.choice(syllables)}{rng.choice(syllables)}{t}w{w}" for w in range(6)]
+        for t in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=config.SKILLS_INDEX_DIM)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--update-users", type=int, default=config.SKILLS_UPDATE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    topics = make_topics(args.topics, rng)
+    user_topics = [rng.sample(range(args.topics), 3) for _ in range(args.users)]
+
+    def task_for(user: int):
+        words = rng.sample(topics[rng.choice(user_topics[user])], 2) + rng.sample(GENERIC, 2)
+        return " ".join(words)
+
+    index = SkillsIndex(args.dim)
+    started = time.perf_counter()
+    for offset in range(0, args.tasks, args.batch):
+        count = min(args.batch, args.tasks - offset)
+        users = [rng.randrange(args.users) for _ in range(count)]
+        index.add_many((f"user-{u}", task_for(u)) for u in users)
+    build = time.perf_counter() - started
+    print(f"built {len(index)} profiles from {index.documents} tasks in {build:.1f}s "
+          f"({index.documents / build:,.0f} tasks/s), matrix {index._counts.nbytes / 1e6:.0f} MB")
+
+    started = time.perf_counter()
+    index.top_k("warm up")
+    index._refresh()
+    print(f"initial IDF weighting: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "skills.npz")
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - started
+        loaded = SkillsIndex(args.dim, path)
+        started = time.perf_counter()
+        loaded.load()
+        loaded._refresh()
+        print(f"snapshot {os.path.getsize(path) / 1e6:.0f} MB: save {saved:.2f}s, "
+              f"load + weight {time.perf_counter() - started:.2f}s")
+
+    latencies = []
+    hits = 0
+    for _ in range(args.queries):
+        topic = rng.randrange(args.topics)
+        query = " ".join(rng.sample(topics[topic], 2) + rng.sample(GENERIC, 1))
+        started = time.perf_counter()
+        matches = index.top_k(query, k=config.SKILLS_CANDIDATES)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if matches and topic in user_topics[int(matches[0][0].split("-")[1])]:
+            hits += 1
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"top-{config.SKILLS_CANDIDATES} query: p50 {cuts[49]:.2f} ms, p99 {cuts[98]:.2f} ms; "
+          f"top match has the query topic {hits / args.queries:.0%} of the time")
+
+    # One ProfileUpdater batch: per user, one task moves into DONE and one
+    # DONE task is retitled (subtract the old text, add the new one); then
+    # the next query reweights only those rows
+    deltas = []
+    for u in rng.sample(range(args.users), args.update_users):
+        old, new = task_for(u), task_for(u)
+        deltas += [(f"user-{u}", 1, task_for(u)), (f"user-{u}", 1, old), (f"user-{u}", -1, old), (f"user-{u}", 1, new)]
+    started = time.perf_counter()
+    index.apply_deltas(deltas)
+    applied = time.perf_counter() - started
+    started = time.perf_counter()
+    index.top_k("warm up")
+    print(f"profile update of {args.update_users} users ({len(deltas)} task deltas): "
+          f"apply {applied * 1000:.1f} ms, next query {(time.perf_counter() - started) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
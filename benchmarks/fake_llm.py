@@ -0,0 +1,124 @@
+"""Local stand-in for the Groq chat completions API.
+
+Serves POST /openai/v1/chat/completions after a fixed latency. The reply is
+canned, or built from the prompt by a callable (by default a JSON answer
+for /ai/suggest/batch prompts), and is streamed as SSE chunks when the
+request asks for ``stream``. The first N requests can fail with 503 to
+exercise retries. Request count and peak concurrency are tracked so tests
+and benchmarks can check the client's limits without network access.
+
+Usage:
+    python -m benchmarks.fake_llm --port 9100 --latency 0.5
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=fake uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from typing import Callable, Union
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_REPLY = (
+    "**Overview**: Build the feature end to end.\n"
+    "- Define acceptance criteria\n"
+    "- Implement and test the change\n"
+    "- Document the behaviour"
+)
+
+def auto_reply(prompt: str) -> str:
+    """DEFAULT_REPLY, or a JSON answer per numbered title for batch prompts."""
+    titles = re.findall(r"^(\d+)\. (.+)$", prompt, re.MULTILINE)
+    if "Tasks:" not in prompt or not titles:
+        return DEFAULT_REPLY
+    return json.dumps({"items": [
+        {"index": int(index), "description": f"Deliver {title}.\n- Define acceptance criteria\n- Test it"}
+        for index, title in titles
+    ]})
+
+class FakeLLM:
+    def __init__(self, latency: float = 0.0, reply: Union[str, Callable[[str], str]] = auto_reply,
+                 fail_first: int = 0, chunk_size: int = 8, chunk_delay: float = 0.0):
+        self.latency = latency
+        self.reply = reply
+        self.fail_first = fail_first
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/openai/v1/chat/completions")(self.chat_completions)
+
+    async def chat_completions(self, body: dict):
+        self.requests += 1
+        request_id = self.requests
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if request_id <= self.fail_first:
+                return JSONResponse(
+                    status_code=503,
+                    content={"error": {"message": "overloaded", "type": "server_error"}},
+                )
+            content = self.reply
+            if callable(content):
+                content = content(body["messages"][-1]["content"])
+            if body.get("stream"):
+                return StreamingResponse(
+                    self._stream(request_id, body.get("model", "fake"), content),
+                    media_type="text/event-stream",
+                )
+            return {
+                "id": f"chatcmpl-{request_id}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30},
+            }
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, request_id: int, model: str, content: str):
+        # Latency above is the time to first token; chunk_delay paces the rest
+        for start in range(0, len(content), self.chunk_size):
+            if start:
+                await asyncio.sleep(self.chunk_delay)
+            chunk = {
+                "id": f"chatcmpl-{request_id}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": content[start:start + self.chunk_size]},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per completion")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument("--fail-first", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeLLM(latency=args.latency, fail_first=args.fail_first, chunk_delay=args.chunk_delay)
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+"""End-to-end load test of every router, with a JSON baseline and regression check.
+
+``run`` seeds synthetic users and tasks, starts the app in-process (its
+lifespan included, with a fake LLM behind the /ai routes) and drives a
+weighted mix of auth, tasks, users, analytics and ai requests from --concurrency
+asyncio clients for --duration seconds. Each backend runs in its own
+subprocess, since the app binds its engine to DATABASE_URL at import:
+
+- sqlite: a temporary database file.
+- postgres: --postgres-url, or a throwaway local server started with the
+  optional ``pgserver`` package when no URL is given. Everything in the
+  target database is dropped and reseeded.
+
+The report holds p50/p95/p99/mean latency, RPS and error counts per
+endpoint and backend. ``compare`` (or ``run --compare``) checks a report
+against a stored baseline and exits 1 when an endpoint got slower or
+lost throughput by more than --threshold.
+
+Usage:
+    JWT_SECRET=bench python -m benchmarks.loadtest run --backend sqlite --backend postgres \\
+        --users 200 --tasks-per-user 50 --duration 20 --output baseline.json
+    JWT_SECRET=bench python -m benchmarks.loadtest run --backend sqlite --compare baseline.json
+    python -m benchmarks.loadtest compare baseline.json current.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BACKENDS = ("sqlite", "postgres")
+PASSWORD = "loadtest-password"
+
+# Titles /ai/suggest is asked about; a small pool so the cache sees repeats
+SUGGEST_TITLES = [f"Improve {area} {part}" for area in (
+    "login", "billing", "search", "export", "dashboard", "reporting", "onboarding", "alerts",
+) for part in ("performance", "error handling", "tests", "logging", "docs", "accessibility")]
+
+def task_id(user: int, index: int) -> str:
+    return f"load-task-{user}-{index}"
+
+def seed(url: str, users: int, tasks_per_user: int, chunk: int = 20000):
+    """Fresh schema with ``users`` users (user0 is an admin) and their tasks"""
+    from sqlalchemy import create_engine, insert
+
+    from app import models
+    from app.hashing import get_password_hash
+
+    engine = create_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    password_hash = get_password_hash(PASSWORD)  # One bcrypt run shared by every user
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    statuses = list(models.TaskStatus)
+    open_tasks: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    rollups: Dict[tuple, int] = defaultdict(int)
+    rng = random.Random(42)
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {
+                "id": f"load-user-{u}",
+                "username": f"user{u}",
+                "email": f"user{u}@example.com",
+                "password_hash": password_hash,
+                "is_admin": u == 0,
+            }
+            for u in range(users)
+        ])
+        rows = []
+        for u in range(users):
+            for i in range(tasks_per_user):
+                status = statuses[rng.randrange(len(statuses))]
+                minutes = rng.randrange(0, 480, 15)
+                if status != models.TaskStatus.DONE:
+                    open_tasks[f"load-user-{u}"][0] += 1
+                    open_tasks[f"load-user-{u}"][1] += minutes
+                created = start + timedelta(minutes=u * tasks_per_user + i)
+                # Seeded minutes have no time entries, so time_rollups stays empty
+                rollups[(f"load-user-{u}", created.date(), status)] += 1
+                rows.append({
+                    "id": task_id(u, i),
+                    "title": f"{SUGGEST_TITLES[rng.randrange(len(SUGGEST_TITLES))]} #{i}",
+                    "description": f"Synthetic task {i} for user {u}",
+                    "status": status,
+                    "total_minutes": minutes,
+                    "user_id": f"load-user-{u}",
+                    "created_at": created,
+                    "updated_at": created,
+                })
+                if len(rows) >= chunk:
+                    connection.execute(insert(models.Task), rows)
+                    rows = []
+        if rows:
+            connection.execute(insert(models.Task), rows)
+        if open_tasks:
+            connection.execute(insert(models.UserWorkload), [
+                {"user_id": user_id, "open_tasks": tasks, "open_minutes": minutes}
+                for user_id, (tasks, minutes) in open_tasks.items()
+            ])
+        if rollups:
+            connection.execute(insert(models.TaskRollup), [
+                {"user_id": user_id, "day": day, "status": status, "tasks": tasks}
+                for (user_id, day, status), tasks in rollups.items()
+            ])
+    engine.dispose()
+
+class VirtualUser:
+    """One simulated client: its own identity plus the tasks it created"""
+
+    def __init__(self, number: int, users: int, tasks_per_user: int, headers: dict, admin_headers: dict):
+        self.user = number % users
+        self.tasks_per_user = tasks_per_user
+        self.headers = headers
+        self.admin_headers = admin_headers
+        self.created: List[str] = []
+        self.registered = 0
+        self.rng = random.Random(number)
+
+    def seeded_task(self) -> str:
+        return task_id(self.user, self.rng.randrange(self.tasks_per_user))
+
+    def writable_task(self) -> str:
+        return self.rng.choice(self.created) if self.created else self.seeded_task()
+
+# Each operation: (endpoint label, weight, coroutine taking (client, vu))
+
+async def login(client, vu):
+    return await client.post("/auth/token", data={"username": f"user{vu.user}", "password": PASSWORD})
+
+async def register(client, vu):
+    vu.registered += 1
+    name = f"new-{vu.rng.getrandbits(48):x}-{vu.registered}"
+    return await client.post("/auth/register", json={
+        "username": name, "email": f"{name}@example.com", "password": PASSWORD,
+    })
+
+async def list_tasks(client, vu):
+    return await client.get("/tasks/", params={"cursor": "", "limit": 20}, headers=vu.headers)
+
+async def read_task(client, vu):
+    return await client.get(f"/tasks/{vu.seeded_task()}", headers=vu.headers)
+
+async def create_task(client, vu):
+    response = await client.post("/tasks/", json={
+        "title": vu.rng.choice(SUGGEST_TITLES), "description": "Created by the load test",
+    }, headers=vu.headers)
+    if response.status_code == 200:
+        vu.created.append(response.json()["id"])
+    return response
+
+async def update_task(client, vu):
+    return await client.put(f"/tasks/{vu.writable_task()}", json={
+        "title": vu.rng.choice(SUGGEST_TITLES), "description": "Edited by the load test",
+    }, headers=vu.headers)
+
+async def update_status(client, vu):
+    status = vu.rng.choice(["todo", "in_progress", "done"])
+    return await client.patch(f"/tasks/{vu.writable_task()}/status", params={"status": status}, headers=vu.headers)
+
+async def delete_task(client, vu):
+    if not vu.created:
+        return await create_task(client, vu)
+    return await client.delete(f"/tasks/{vu.created.pop()}", headers=vu.headers)
+
+async def create_bulk(client, vu):
+    response = await client.post("/tasks/bulk", json=[
+        {"title": vu.rng.choice(SUGGEST_TITLES), "description": "Bulk load test"} for _ in range(10)
+    ], headers=vu.headers)
+    if response.status_code == 200:
+        vu.created.extend(result["id"] for result in response.json()["results"])
+    return response
+
+async def log_time(client, vu):
+    return await client.post(f"/tasks/{vu.writable_task()}/time", json={
+        "minutes": vu.rng.randrange(5, 120, 5),
+    }, headers=vu.headers)
+
+async def log_time_bulk(client, vu):
+    return await client.post("/tasks/bulk/time", json=[
+        {"task_id": vu.writable_task(), "minutes": vu.rng.randrange(5, 60, 5),
+         "client_entry_id": f"{vu.rng.getrandbits(64):x}"}
+        for _ in range(10)
+    ], headers=vu.headers)
+
+async def list_users(client, vu):
+    return await client.get("/users/", params={"cursor": "", "limit": 50}, headers=vu.admin_headers)
+
+async def read_user(client, vu):
+    return await client.get(f"/users/load-user-{vu.user}", headers=vu.admin_headers)
+
+async def analytics_summary(client, vu):
+    return await client.get("/analytics/summary", headers=vu.headers)
+
+async def analytics_timeseries(client, vu):
+    return await client.get("/analytics/timeseries", params={"start": "2025-01-01", "end": "2025-03-31"},
+                            headers=vu.headers)
+
+async def suggest(client, vu):
+    return await client.post("/ai/suggest", json={"title": vu.rng.choice(SUGGEST_TITLES)}, headers=vu.headers)
+
+async def auto_assign(client, vu):
+    return await client.post("/ai/auto-assign", json={
+        "title": vu.rng.choice(SUGGEST_TITLES), "description": "Assigned by the load test",
+    }, headers=vu.admin_headers)
+
+OPERATIONS = [
+    ("POST /auth/token", 1, login),
+    ("POST /auth/register", 0.5, register),
+    ("GET /tasks/", 20, list_tasks),
+    ("GET /tasks/{task_id}", 20, read_task),
+    ("POST /tasks/", 8, create_task),
+    ("PUT /tasks/{task_id}", 5, update_task),
+    ("PATCH /tasks/{task_id}/status", 5, update_status),
+    ("DELETE /tasks/{task_id}", 2, delete_task),
+    ("POST /tasks/bulk", 1, create_bulk),
+    ("POST /tasks/{task_id}/time", 4, log_time),
+    ("POST /tasks/bulk/time", 1, log_time_bulk),
+    ("GET /users/", 2, list_users),
+    ("GET /users/{user_id}", 3, read_user),
+    ("GET /analytics/summary", 2, analytics_summary),
+    ("GET /analytics/timeseries", 2, analytics_timeseries),
+    ("POST /ai/suggest", 3, suggest),
+    ("POST /ai/auto-assign", 1, auto_assign),
+]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+    }
+
+async def drive(args) -> dict:
+    import httpx
+
+    from app.auth import create_access_token
+    from app.llm import create_llm_client
+    from app.main import app
+    from benchmarks.fake_llm import FakeLLM
+
+    names = [name for name, _, _ in OPERATIONS]
+    weights = [weight for _, weight, _ in OPERATIONS]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    fake = FakeLLM(latency=args.llm_latency)
+    async with app.router.lifespan_context(app):
+        llm_http = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app))
+        app.state.llm = create_llm_client(api_key="fake", base_url="http://fake-llm", http_client=llm_http)
+        admin_headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user0'})}"}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            started = time.perf_counter()
+            measure_from = started + args.warmup
+            stop_at = measure_from + args.duration
+
+            async def virtual_user(number: int):
+                user = number % args.users
+                headers = {"Authorization": f"Bearer {create_access_token({'sub': f'user{user}'})}"}
+                vu = VirtualUser(number, args.users, args.tasks_per_user, headers, admin_headers)
+                while True:
+                    [index] = vu.rng.choices(range(len(OPERATIONS)), weights=weights)
+                    request_started = time.perf_counter()
+                    if request_started >= stop_at:
+                        return
+                    response = await OPERATIONS[index][2](client, vu)
+                    finished = time.perf_counter()
+                    if request_started < measure_from:
+                        continue
+                    name = names[index]
+                    latencies[name].append(finished - request_started)
+                    status_codes[name][response.status_code] += 1
+                    if response.status_code >= 400:
+                        errors[name] += 1
+
+            await asyncio.gather(*(virtual_user(n) for n in range(args.concurrency)))
+        await app.state.llm.aclose()
+
+    endpoints = {name: summarize(latencies[name], errors[name], args.duration) for name in names if latencies[name]}
+    for name, codes in status_codes.items():
+        endpoints[name]["status_codes"] = {str(code): count for code, count in sorted(codes.items())}
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "endpoints": endpoints,
+        "total": summarize(all_latencies, sum(errors.values()), args.duration),
+        "llm_calls": fake.requests,
+    }
+
+def start_postgres(directory: str):
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("postgres backend needs --postgres-url or the optional pgserver package")
+    server = pgserver.get_server(directory, cleanup_mode="delete")
+    # It listens on a unix socket in ``directory``; Settings wants a host
+    return server, f"postgresql://postgres:@localhost/postgres?host={directory}"
+
+def worker(args):
+    """Seed and load-test one backend in this process; the report goes to --result-file"""
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "sqlite":
+            url = f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        elif args.postgres_url:
+            url = args.postgres_url
+        else:
+            server, url = start_postgres(os.path.join(tmp, "pgdata"))
+
+        # Settings are read when app.config is first imported
+        os.environ["DATABASE_URL"] = url
+        os.environ.setdefault("JWT_SECRET", "loadtest")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+        os.environ.setdefault("ACCESS_LOG_SLOW_MS", "60000")
+        os.environ["SKILLS_INDEX_PATH"] = ""
+
+        seeding_started = time.perf_counter()
+        seed(url, args.users, args.tasks_per_user)
+        seed_seconds = time.perf_counter() - seeding_started
+
+        report = asyncio.run(drive(args))
+        report["seed_seconds"] = round(seed_seconds, 1)
+        with open(args.result_file, "w") as f:
+            json.dump(report, f)
+        if server is not None:
+            server.cleanup()
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args) -> int:
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "llm_latency": args.llm_latency,
+        },
+        "backends": {},
+    }
+    for backend in args.backend or ["sqlite"]:
+        with tempfile.NamedTemporaryFile(suffix=".json") as result:
+            command = [
+                sys.executable, "-m", "benchmarks.loadtest", "worker",
+                "--backend", backend, "--result-file", result.name,
+                "--users", str(args.users), "--tasks-per-user", str(args.tasks_per_user),
+                "--concurrency", str(args.concurrency), "--duration", str(args.duration),
+                "--warmup", str(args.warmup), "--llm-latency", str(args.llm_latency),
+            ]
+            if args.postgres_url:
+                command += ["--postgres-url", args.postgres_url]
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            with open(result.name) as f:
+                report["backends"][backend] = json.load(f)
+        print_report(backend, report["backends"][backend])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            return compare(json.load(f), report, args.threshold, args.min_delta_ms)
+    return 0
+
+def print_report(backend: str, result: dict):
+    print(f"\n{backend}: seeded in {result['seed_seconds']}s, {result['llm_calls']} LLM calls")
+    print(f"{'endpoint':<32}{'reqs':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for name, stats in rows:
+        print(
+            f"{name:<32}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+        )
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> int:
+    """Print regressions of ``current`` against ``baseline``; returns the exit code.
+
+    An endpoint regresses when its p95 grew by more than ``threshold``
+    (and by at least ``min_delta_ms``, to ignore sub-millisecond noise),
+    its RPS fell by more than ``threshold``, or it started returning errors.
+    """
+    regressions = []
+    for backend, result in current["backends"].items():
+        old_result = baseline.get("backends", {}).get(backend)
+        if old_result is None:
+            print(f"{backend}: not in the baseline, skipped")
+            continue
+        old_endpoints = dict(old_result["endpoints"], total=old_result["total"])
+        new_endpoints = dict(result["endpoints"], total=result["total"])
+        for name, new in new_endpoints.items():
+            old = old_endpoints.get(name)
+            if old is None:
+                continue
+            problems = []
+            p95_delta = new["p95_ms"] - old["p95_ms"]
+            if p95_delta > old["p95_ms"] * threshold and p95_delta >= min_delta_ms:
+                problems.append(f"p95 {old['p95_ms']:.2f} -> {new['p95_ms']:.2f} ms")
+            if new["rps"] < old["rps"] * (1 - threshold):
+                problems.append(f"rps {old['rps']:.1f} -> {new['rps']:.1f}")
+            if new["errors"] and not old["errors"]:
+                problems.append(f"{new['errors']} errors")
+            if problems:
+                regressions.append(f"{backend} {name}: " + ", ".join(problems))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nno regressions beyond {threshold:.0%}")
+    return 0
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=100, help="Seeded users; user0 is an admin")
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds per backend")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before that")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake LLM seconds per completion")
+    parser.add_argument("--postgres-url", help="Scratch Postgres database; it is dropped and reseeded")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Load-test one or more backends")
+    run_parser.add_argument("--backend", action="append", choices=BACKENDS)
+    add_load_arguments(run_parser)
+    run_parser.add_argument("--output", help="Write the JSON report here")
+    run_parser.add_argument("--compare", help="Baseline report to check for regressions")
+    run_parser.add_argument("--threshold", type=float, default=0.25)
+    run_parser.add_argument("--min-delta-ms", type=float, default=1.0)
+
+    compare_parser = commands.add_parser("compare", help="Check a report against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+    compare_parser.add_argument("--min-delta-ms", type=float, default=1.0)
+
+    worker_parser = commands.add_parser("worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument("--backend", choices=BACKENDS, required=True)
+    worker_parser.add_argument("--result-file", required=True)
+    add_load_arguments(worker_parser)
+
+    args = parser.parse_args()
+    if args.command == "worker":
+        worker(args)
+    elif args.command == "run":
+        sys.exit(run(args))
+    else:
+        with open(args.baseline) as f, open(args.current) as g:
+            sys.exit(compare(json.load(f), json.load(g), args.threshold, args.min_delta_ms))
+
+if __name__ == "__main__":
+    main()
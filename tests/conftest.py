@@ -1,50 +1,76 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import get_db
+from app.auth import principal_cache
+from app.database import get_db, get_session_factory
+from app.skills import skills_updater
+from app.suggestions import suggestion_cache
 from app.models import Base
 
-# Test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Test database: a throwaway SQLite file per test, shared by the sync
+# session used in unit tests and the aiosqlite session used by the app.
+@pytest.fixture(scope="function")
+def database_path(tmp_path):
+    return tmp_path / "test.db"
 
 @pytest.fixture(scope="function")
-def db():
+def engine(database_path):
+    engine = create_engine(
+        f"sqlite:///{database_path}",
+        connect_args={"check_same_thread": False},
+    )
     Base.metadata.create_all(bind=engine)
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
-    
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def db(engine):
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = TestingSessionLocal()
+
     yield session
-    
+
     session.close()
-    transaction.rollback()
-    connection.close()
-    Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="function")
-def client(db):
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
+def async_session_factory(engine, database_path):
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{database_path}",
+        poolclass=NullPool,
+    )
+    return async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+@pytest.fixture(scope="function")
+def client(async_session_factory):
+    async def override_get_db():
+        async with async_session_factory() as session:
+            yield session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: async_session_factory
+    principal_cache.clear()
+    suggestion_cache.clear()
     with TestClient(app) as test_client:
+        skills_updater.session_factory = async_session_factory
         yield test_client
     app.dependency_overrides.clear()
 
+@pytest.fixture(params=["returning", "fallback"])
+def write_path(request, monkeypatch):
+    # Exercise both the UPDATE/DELETE ... RETURNING path and the
+    # SELECT-then-write fallback used when the dialect lacks RETURNING
+    if request.param == "fallback":
+        from app.router import tasks
+        monkeypatch.setattr(tasks, "_supports_returning", lambda db, kind: False)
+    return request.param
+
 @pytest.fixture
 def auth_headers(client):
     # Create a test user and get auth token
@@ -64,4 +90,26 @@ def auth_headers(client):
     response = client.post("/auth/token", data=login_data)
     token = response.json()["access_token"]
     
-    return {"Authorization": f"Bearer {token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def admin_headers(client, db):
+    from app.models import User
+
+    admin_user = {
+        "username": "adminuser",
+        "email": "admin@example.com",
+        "password": "adminpassword"
+    }
+
+    client.post("/auth/register", json=admin_user)
+    db.query(User).filter(User.username == "adminuser").update({"is_admin": True})
+    db.commit()
+
+    response = client.post("/auth/token", data={
+        "username": "adminuser",
+        "password": "adminpassword"
+    })
+    token = response.json()["access_token"]
+
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,40 @@
+def test_metrics_require_admin(client, auth_headers):
+    response = client.get("/admin/metrics", headers=auth_headers)
+    assert response.status_code == 403
+
+def test_metrics_report_hash_queue_wait(client, admin_headers):
+    response = client.get("/admin/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    samples = response.json()["sprintsync_hash_queue_wait_seconds"]["samples"]
+    operations = {sample["labels"]["operation"] for sample in samples}
+    assert {"hash", "verify"} <= operations
+
+def test_pool_status(client, admin_headers):
+    response = client.get("/admin/db/pool", headers=admin_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["pool_class"] == "InstrumentedQueuePool"
+    assert {"size", "checked_out", "overflow", "slow_checkouts", "checkout_seconds"} <= set(body)
+
+def test_prometheus_metrics_by_route_template(client, auth_headers, monkeypatch):
+    from app.config import config
+
+    task_id = client.post("/tasks/", json={"title": "Measured"}, headers=auth_headers).json()["id"]
+    client.get(f"/tasks/{task_id}", headers=auth_headers)
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE sprintsync_http_request_duration_seconds histogram" in text
+    assert 'route="/tasks/{task_id}",status_class="2xx",le="+Inf"}' in text
+    assert 'route="unmatched",status_class="4xx"' in text
+    assert task_id not in text
+    for name in ("sprintsync_http_requests_in_flight", "sprintsync_db_query_seconds_count",
+                 "sprintsync_hash_duration_seconds_count"):
+        assert name in text
+
+    monkeypatch.setattr(config, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
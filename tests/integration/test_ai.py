@@ -7,3 +7,310 @@ def test_ai_suggestion(client, auth_headers):
     assert response.status_code == 200
     assert "description" in response.json()
 
+
+def test_ai_suggestion_uses_shared_llm_client(client, auth_headers):
+    import httpx
+
+    from app.llm import create_llm_client
+    from benchmarks.fake_llm import FakeLLM
+
+    fake = FakeLLM(reply="**Overview** ## Ship the login page")
+    client.app.state.llm = create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+    )
+
+    for title in ("Login page", "Logout page"):
+        response = client.post("/ai/suggest", json={"title": title}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["description"] == "Overview  Ship the login page"
+    assert fake.requests == 2
+
+def test_ai_suggestion_falls_back_when_llm_fails(client, auth_headers):
+    import httpx
+
+    from app.llm import create_llm_client
+    from benchmarks.fake_llm import FakeLLM
+
+    fake = FakeLLM(fail_first=10)
+    client.app.state.llm = create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+        max_retries=0,
+    )
+
+    response = client.post("/ai/suggest", json={"title": "Login page"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["description"].startswith("Implement and test Login page.")
+
+def test_ai_suggestions_are_cached_by_normalized_title(client, auth_headers):
+    import httpx
+
+    from app.llm import create_llm_client
+    from benchmarks.fake_llm import FakeLLM
+
+    fake = FakeLLM(reply="Fix the session cookie handling")
+    client.app.state.llm = create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+    )
+
+    for title in ("Fix login bug", "fix login bug ", "FIX  LOGIN BUG"):
+        response = client.post("/ai/suggest", json={"title": title}, headers=auth_headers)
+        assert response.json()["description"] == "Fix the session cookie handling"
+    assert fake.requests == 1
+
+def _events(response):
+    import json
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_ai_suggestion_stream_without_api_key(client, auth_headers):
+    response = client.post("/ai/suggest/stream", json={"title": "Login page"}, headers=auth_headers)
+    assert response.status_code == 200
+    events = _events(response)
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert len(tokens) > 1
+    assert events[-1] == ("done", {"description": "".join(tokens)})
+    assert events[-1][1]["description"] == client.post(
+        "/ai/suggest", json={"title": "Login page"}, headers=auth_headers
+    ).json()["description"]
+
+def test_ai_suggestion_streams_cleaned_tokens(client, auth_headers):
+    import httpx
+
+    from app.llm import create_llm_client
+    from benchmarks.fake_llm import FakeLLM
+
+    fake = FakeLLM(reply="  **Overview**: build it ## now  ", chunk_size=3)
+    client.app.state.llm = create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+    )
+
+    headers = {**auth_headers, "Accept": "text/event-stream"}
+    events = _events(client.post("/ai/suggest", json={"title": "Login page"}, headers=headers))
+    assert len([name for name, _ in events if name == "token"]) > 1
+    assert events[-1] == ("done", {"description": "Overview: build it  now"})
+
+    # The streamed result is cached for the plain endpoint too
+    response = client.post("/ai/suggest", json={"title": "login page"}, headers=auth_headers)
+    assert response.json()["description"] == "Overview: build it  now"
+    assert fake.requests == 1
+
+def test_ai_suggestion_stream_falls_back_before_first_token(client, auth_headers):
+    import httpx
+
+    from app.llm import create_llm_client
+    from benchmarks.fake_llm import FakeLLM
+
+    fake = FakeLLM(fail_first=10)
+    client.app.state.llm = create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+        max_retries=0,
+    )
+
+    events = _events(client.post("/ai/suggest/stream", json={"title": "Login page"}, headers=auth_headers))
+    assert events[-1][0] == "done"
+    assert events[-1][1]["description"].startswith("Implement and test Login page.")
+
+def _fake_llm_client(fake, **kwargs):
+    import httpx
+
+    from app.llm import create_llm_client
+
+    return create_llm_client(
+        api_key="fake",
+        base_url="http://fake-llm",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)),
+        **kwargs,
+    )
+
+def test_ai_batch_packs_titles_into_chunks(client, auth_headers, monkeypatch):
+    from app.config import config
+    from benchmarks.fake_llm import FakeLLM
+
+    monkeypatch.setattr(config, "AI_BATCH_CHUNK_SIZE", 2)
+    fake = FakeLLM()
+    client.app.state.llm = _fake_llm_client(fake)
+
+    titles = ["Login page", "Signup page", "login page ", "Reset password", "Audit log", "Billing"]
+    response = client.post("/ai/suggest/batch", json=[{"title": t} for t in titles], headers=auth_headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["title"] for r in results] == titles
+    assert all(r["ok"] for r in results)
+    assert results[0]["description"].startswith("Deliver Login page.")
+    assert results[2]["description"] == results[0]["description"]
+    assert fake.requests == 3  # 5 distinct titles, 2 per prompt
+
+    # Batch results feed the single-title cache
+    client.post("/ai/suggest", json={"title": "Billing"}, headers=auth_headers)
+    assert fake.requests == 3
+
+def test_ai_batch_returns_partial_results(client, auth_headers, monkeypatch):
+    import json
+    import re
+
+    from app.config import config
+    from benchmarks.fake_llm import FakeLLM
+
+    def reply(prompt):
+        titles = re.findall(r"^(\d+)\. (.+)$", prompt, re.MULTILINE)
+        return json.dumps({"items": [
+            {"index": int(i), "description": f"About {t}"} for i, t in titles if "broken" not in t
+        ]})
+
+    monkeypatch.setattr(config, "AI_BATCH_CHUNK_SIZE", 10)
+    client.app.state.llm = _fake_llm_client(FakeLLM(reply=reply))
+
+    response = client.post(
+        "/ai/suggest/batch", json=[{"title": "Good one"}, {"title": "broken one"}], headers=auth_headers
+    )
+    good, broken = response.json()["results"]
+    assert good == {"title": "Good one", "description": "About Good one", "ok": True, "error_code": None}
+    assert broken["ok"] is False
+    assert broken["error_code"] == "ai_invalid_output"
+    assert broken["description"].startswith("Implement and test broken one.")
+
+def test_ai_batch_survives_a_failed_chunk(client, auth_headers, monkeypatch):
+    from app.config import config
+    from benchmarks.fake_llm import FakeLLM
+
+    monkeypatch.setattr(config, "AI_BATCH_CHUNK_SIZE", 1)
+    client.app.state.llm = _fake_llm_client(FakeLLM(fail_first=1), max_retries=0)
+
+    response = client.post(
+        "/ai/suggest/batch", json=[{"title": f"Task {i}"} for i in range(3)], headers=auth_headers
+    )
+    results = response.json()["results"]
+    assert [r["error_code"] for r in results].count("ai_unavailable") == 1
+    assert sum(r["ok"] for r in results) == 2
+
+def test_ai_batch_without_api_key_and_size_limit(client, auth_headers, monkeypatch):
+    from app.config import config
+
+    response = client.post("/ai/suggest/batch", json=[{"title": "Login page"}], headers=auth_headers)
+    assert response.json()["results"][0]["ok"] is True
+    assert "Complete Login page" in response.json()["results"][0]["description"]
+
+    monkeypatch.setattr(config, "AI_BATCH_MAX_ITEMS", 2)
+    response = client.post("/ai/suggest/batch", json=[{"title": "t"}] * 3, headers=auth_headers)
+    assert response.status_code == 413
+
+def _completed_task(db, user_id, title):
+    import uuid
+
+    from app.models import Task, TaskStatus
+
+    db.add(Task(id=str(uuid.uuid4()), title=title, status=TaskStatus.DONE, user_id=user_id))
+
+def test_auto_assign_picks_user_with_matching_skills(client, admin_headers, db, async_session_factory):
+    import asyncio
+
+    from app.models import User
+    from app.skills import skills_index
+
+    db.add_all([
+        User(id="db-expert", username="dbexpert", email="db@example.com"),
+        User(id="ui-expert", username="uiexpert", email="ui@example.com"),
+    ])
+    db.flush()
+    _completed_task(db, "db-expert", "Tune Postgres query plans")
+    _completed_task(db, "db-expert", "Add Postgres indexes for reports")
+    _completed_task(db, "ui-expert", "Build React dashboard widgets")
+    db.commit()
+    asyncio.run(skills_index.rebuild(async_session_factory))
+    skills_index.add("ghost", "Postgres Postgres Postgres")  # user no longer exists
+
+    response = client.post(
+        "/ai/auto-assign",
+        json={"title": "Slow Postgres query", "description": "Needs an index"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["assigned_to"]["username"] == "dbexpert"
+    assert body["task"]["user_id"] == "db-expert"
+    assert body["task"]["assigned_by"] is not None
+    assert body["assigned_by"] == "adminuser"
+    assert 0 < body["matching_score"] <= 1
+    assert body["workload"] == {"open_tasks": 0, "open_minutes": 0}
+    assert [c["user_id"] for c in body["candidates"]] == ["db-expert"]
+
+    response = client.post("/ai/auto-assign", json={"title": "Unrelated gardening"}, headers=admin_headers)
+    assert response.status_code == 404
+
+def test_auto_assign_prefers_the_less_busy_of_similar_users(client, admin_headers, db, async_session_factory):
+    import asyncio
+
+    from app.models import User, UserWorkload
+    from app.skills import skills_index
+
+    db.add_all([
+        User(id="busy", username="busy", email="busy@example.com"),
+        User(id="idle", username="idle", email="idle@example.com"),
+        UserWorkload(user_id="busy", open_tasks=12, open_minutes=600),
+    ])
+    db.flush()
+    for user_id in ("busy", "idle"):
+        _completed_task(db, user_id, "Tune Postgres query plans")
+    db.commit()
+    asyncio.run(skills_index.rebuild(async_session_factory))
+
+    body = client.post("/ai/auto-assign", json={"title": "Postgres query plans"}, headers=admin_headers).json()
+    assert body["assigned_to"]["username"] == "idle"
+    scores = {c["user_id"]: c for c in body["candidates"]}
+    assert scores["busy"]["similarity"] == scores["idle"]["similarity"]
+    assert scores["busy"]["score"] < scores["idle"]["score"] == body["matching_score"]
+
+    # The new task counts towards the assignee's open work
+    db.expire_all()
+    assert db.get(UserWorkload, "idle").open_tasks == 1
+
+def test_auto_assign_requires_admin(client, auth_headers):
+    response = client.post("/ai/auto-assign", json={"title": "Anything"}, headers=auth_headers)
+    assert response.status_code == 403
+
+def test_completed_tasks_update_skill_profiles(client, auth_headers, admin_headers):
+    from app.skills import skills_index, skills_updater
+
+    task_id = client.post(
+        "/tasks/", json={"title": "Configure Grafana dashboards"}, headers=auth_headers
+    ).json()["id"]
+    client.patch(f"/tasks/{task_id}/status?status=done", headers=auth_headers)
+    assert skills_updater.pending == 1
+
+    client.portal.call(skills_updater.flush)
+    assert skills_updater.pending == 0
+    response = client.post("/ai/auto-assign", json={"title": "New Grafana alert"}, headers=admin_headers)
+    assert response.json()["assigned_to"]["username"] == "testuser"
+    user_id = response.json()["assigned_to"]["user_id"]
+
+    # Editing a DONE task swaps its text in the profile; leaving DONE takes it out
+    client.put(f"/tasks/{task_id}", json={"title": "Tune Kafka consumers"}, headers=auth_headers)
+    client.portal.call(skills_updater.flush)
+    assert skills_index.top_k("Grafana") == []
+    assert skills_index.top_k("Kafka")[0][0] == user_id
+    client.patch(f"/tasks/{task_id}/status?status=todo", headers=auth_headers)
+    client.portal.call(skills_updater.flush)
+    assert skills_index.top_k("Kafka") == []
+    client.patch(f"/tasks/{task_id}/status?status=done", headers=auth_headers)
+
+    skills_index.clear()
+    response = client.post("/admin/skills/rebuild", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["users"] == 1
+    assert response.json()["tasks"] == 1
+    assert client.get("/admin/skills", headers=auth_headers).status_code == 403
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+def _rollups(db):
+    from app.models import TaskRollup, TimeRollup
+
+    db.expire_all()
+    tasks = sorted((row.user_id, row.day, row.status.value, row.tasks) for row in db.query(TaskRollup) if row.tasks)
+    minutes = sorted((row.user_id, row.day, row.minutes) for row in db.query(TimeRollup) if row.minutes)
+    return tasks, minutes
+
+def test_task_writes_keep_rollups_in_step(client, auth_headers, admin_headers, db, write_path):
+    ids = [client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    response = client.post("/tasks/bulk", json=[{"title": "Bulk 1"}, {"title": "Bulk 2"}], headers=auth_headers)
+    ids += [result["id"] for result in response.json()["results"]]
+    client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers)
+
+    client.patch(f"/tasks/{ids[0]}/status?status=in_progress", headers=auth_headers)
+    client.patch(f"/tasks/{ids[1]}/status?status=done", headers=auth_headers)
+    client.patch("/tasks/bulk/status", json=[{"id": ids[2], "status": "done"}], headers=auth_headers)
+    client.post(f"/tasks/{ids[0]}/time", json={"minutes": 30}, headers=auth_headers)
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    client.post(
+        "/tasks/bulk/time",
+        json=[
+            {"task_id": ids[1], "minutes": 20},
+            {"task_id": ids[4], "minutes": 15, "started_at": yesterday},
+            {"task_id": ids[0], "minutes": 25, "started_at": yesterday},
+        ],
+        headers=auth_headers,
+    )
+    # Deleting a task takes its minutes back off the days they were worked
+    client.delete(f"/tasks/{ids[4]}", headers=auth_headers)
+
+    response = client.get("/analytics/summary", headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["totals"] == {"todo": 1, "in_progress": 1, "done": 2, "total": 4, "minutes": 75}
+    assert [user["total"] for user in summary["users"]] == [4]
+
+    # What the writes maintained matches a recount from the tasks table
+    maintained = _rollups(db)
+    response = client.post("/admin/analytics/rebuild", headers=admin_headers)
+    assert response.status_code == 200
+    assert _rollups(db) == maintained
+
+def test_summary_and_timeseries(client, auth_headers, admin_headers, db):
+    from app.models import Task
+
+    ids = [client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers)
+    today = datetime.now(timezone.utc).date()
+
+    # Backdate one task straight in the database, then reconcile
+    db.query(Task).filter(Task.id == ids[0]).update({"created_at": datetime.now(timezone.utc) - timedelta(days=2)})
+    db.commit()
+    client.post("/admin/analytics/rebuild", headers=admin_headers)
+    client.patch(f"/tasks/{ids[0]}/status?status=done", headers=auth_headers)
+    # Minutes count on the day the work was done, not the day the task was created
+    started_at = datetime.combine(today - timedelta(days=1), datetime.min.time(), timezone.utc).isoformat()
+    client.post(f"/tasks/{ids[0]}/time", json={"minutes": 90, "started_at": started_at}, headers=auth_headers)
+
+    response = client.get("/analytics/timeseries", params={"start": str(today - timedelta(days=3))}, headers=auth_headers)
+    assert response.status_code == 200
+    series = response.json()
+    assert series["end"] == str(today)
+    assert [day["day"] for day in series["days"]] == [str(today - timedelta(days=n)) for n in (3, 2, 1, 0)]
+    assert [(day["total"], day["done"], day["minutes"]) for day in series["days"]] == [
+        (0, 0, 0), (1, 1, 0), (0, 0, 90), (2, 0, 0),
+    ]
+    assert len(client.get("/analytics/timeseries", headers=auth_headers).json()["days"]) == 30
+
+    # Admins see everyone, per user, and can narrow to one user or day range
+    summary = client.get("/analytics/summary", headers=admin_headers).json()
+    assert summary["totals"]["total"] == 4
+    assert sorted(user["total"] for user in summary["users"]) == [1, 3]
+    testuser = next(user["user_id"] for user in summary["users"] if user["total"] == 3)
+    narrowed = client.get("/analytics/summary", params={"user_id": testuser, "start": str(today)}, headers=admin_headers)
+    assert narrowed.json()["totals"] == {"todo": 2, "in_progress": 0, "done": 0, "total": 2, "minutes": 0}
+
+    admin_id = next(user["user_id"] for user in summary["users"] if user["user_id"] != testuser)
+    assert client.get("/analytics/summary", params={"user_id": admin_id}, headers=auth_headers).status_code == 403
+
+    for params in ({"start": "2025-02-01", "end": "2025-01-01"}, {"start": "2020-01-01", "end": "2025-01-01"}):
+        response = client.get("/analytics/timeseries", params=params, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "invalid_date_range"
@@ -22,4 +22,51 @@ def test_register_and_login(client):
 
 def test_protected_endpoint(client, auth_headers):
     response = client.get("/tasks", headers=auth_headers)
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_current_user_is_served_from_principal_cache(client, auth_headers):
+    from app.auth import Principal, principal_cache
+
+    client.get("/tasks", headers=auth_headers)
+    principal = principal_cache.get("testuser")
+    assert isinstance(principal, Principal)
+    assert principal.username == "testuser"
+
+def test_update_user_invalidates_principal_cache(client, auth_headers, admin_headers):
+    from app.auth import principal_cache
+
+    assert client.get("/tasks", headers=auth_headers).status_code == 200
+    users = client.get("/users", headers=admin_headers).json()
+    user_id = next(user["id"] for user in users if user["username"] == "testuser")
+
+    response = client.put(f"/users/{user_id}", json={"username": "renamed"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert principal_cache.get("testuser") is None
+
+    # The old token names a user that no longer exists
+    assert client.get("/tasks", headers=auth_headers).status_code == 404
+
+def test_token_is_verified_once_per_request(client, auth_headers, monkeypatch):
+    from app import auth
+
+    auth.token_cache.clear()
+    calls = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    assert client.get("/tasks", headers=auth_headers).status_code == 200
+    assert len(calls) == 1
+
+    # Repeat tokens are served from the verified-token cache
+    assert client.get("/tasks", headers=auth_headers).status_code == 200
+    assert len(calls) == 1
+
+    # Whatever the case of the scheme
+    token = auth_headers["Authorization"].split(" ", 1)[1]
+    assert client.get("/tasks", headers={"Authorization": f"bearer {token}"}).status_code == 200
+    assert len(calls) == 1
+
+def test_invalid_token_is_rejected(client):
+    response = client.get("/tasks", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+    assert response.json()["error_code"] == "invalid_token"
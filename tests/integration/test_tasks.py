@@ -1,3 +1,5 @@
+import pytest
+
 def test_create_and_get_tasks(client, auth_headers):
     # Create a task
     task_data = {
@@ -36,4 +38,417 @@ def test_update_task_status(client, auth_headers):
         headers=auth_headers
     )
     assert response.status_code == 200
-    assert response.json()["status"] == "in_progress"
\ No newline at end of file
+    assert response.json()["status"] == "in_progress"
+
+def test_cursor_pagination_walks_all_tasks(client, auth_headers):
+    created = []
+    for i in range(5):
+        response = client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers)
+        created.append(response.json()["id"])
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get("/tasks", params={"cursor": cursor, "limit": 2}, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(task["id"] for task in page["items"])
+        cursor = page["next_cursor"]
+
+    assert seen == created
+
+def test_offset_pagination_still_returns_a_list(client, auth_headers):
+    for i in range(3):
+        client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers)
+
+    response = client.get("/tasks", params={"skip": 1, "limit": 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["Task 1"]
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get("/tasks", params={"cursor": "garbage!"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["error_code"] == "invalid_cursor"
+
+def test_filter_and_sort_tasks(client, auth_headers):
+    ids = {}
+    for title in ["Fix login", "Fix logout", "Write docs"]:
+        ids[title] = client.post("/tasks", json={"title": title}, headers=auth_headers).json()["id"]
+    client.patch(f"/tasks/{ids['Fix logout']}/status?status=done", headers=auth_headers)
+
+    response = client.get("/tasks", params={"status": "done"}, headers=auth_headers)
+    assert [task["title"] for task in response.json()] == ["Fix logout"]
+
+    response = client.get("/tasks", params={"title_prefix": "Fix", "sort": "-title"}, headers=auth_headers)
+    assert [task["title"] for task in response.json()] == ["Fix logout", "Fix login"]
+
+    response = client.get("/tasks", params={"sort": "-updated_at", "cursor": "", "limit": 1}, headers=auth_headers)
+    assert [task["title"] for task in response.json()["items"]] == ["Fix logout"]
+
+def test_unknown_sort_column_is_rejected(client, auth_headers):
+    response = client.get("/tasks", params={"sort": "password_hash"}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_bulk_create_update_and_status(client, auth_headers, admin_headers):
+    response = client.post(
+        "/tasks/bulk",
+        json=[{"title": f"Bulk {i}", "description": "d"} for i in range(3)],
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    created = response.json()["results"]
+    assert [item["task"]["title"] for item in created] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    ids = [item["id"] for item in created]
+
+    admin_task = client.post("/tasks", json={"title": "Admin only"}, headers=admin_headers).json()["id"]
+
+    response = client.patch(
+        "/tasks/bulk",
+        json=[
+            {"id": ids[0], "title": "Renamed", "description": "new"},
+            {"id": "missing", "title": "x"},
+            {"id": admin_task, "title": "stolen"},
+            {"id": ids[0], "title": "Twice"},
+        ],
+        headers=auth_headers,
+    )
+    results = response.json()["results"]
+    assert results[0]["ok"] and results[0]["task"]["title"] == "Renamed"
+    assert results[0]["task"]["updated_at"] > created[0]["task"]["updated_at"]
+    assert [item.get("error_code") for item in results[1:]] == [
+        "task_not_found", "insufficient_permissions", "duplicate_id"
+    ]
+
+    response = client.patch(
+        "/tasks/bulk/status",
+        json=[{"id": task_id, "status": "done"} for task_id in ids],
+        headers=auth_headers,
+    )
+    assert [item["task"]["status"] for item in response.json()["results"]] == ["done"] * 3
+    assert client.get("/tasks", params={"status": "done"}, headers=auth_headers).json()[0]["id"] == ids[0]
+
+def test_bulk_rejects_oversized_batches(client, auth_headers, monkeypatch):
+    from app.config import config
+
+    monkeypatch.setattr(config, "BULK_MAX_ITEMS", 2)
+    response = client.post("/tasks/bulk", json=[{"title": "t"}] * 3, headers=auth_headers)
+    assert response.status_code == 413
+    assert response.json()["error_code"] == "batch_too_large"
+
+def test_writes_keep_not_found_and_forbidden_semantics(client, auth_headers, admin_headers, write_path):
+    own = client.post("/tasks", json={"title": "Mine"}, headers=auth_headers)
+    assert own.status_code == 200
+    own = own.json()["id"]
+    other = client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers).json()["id"]
+
+    response = client.put(f"/tasks/{own}", json={"title": "Mine, edited"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Mine, edited"
+
+    response = client.patch(f"/tasks/{own}/status?status=in_progress", headers=auth_headers)
+    assert response.json()["status"] == "in_progress"
+
+    for method, url, kwargs in [
+        ("put", "/tasks/{}", {"json": {"title": "x"}}),
+        ("patch", "/tasks/{}/status?status=done", {}),
+        ("delete", "/tasks/{}", {}),
+    ]:
+        assert getattr(client, method)(url.format("missing"), headers=auth_headers, **kwargs).status_code == 404
+        assert getattr(client, method)(url.format(other), headers=auth_headers, **kwargs).status_code == 403
+
+    # Admins may write anyone's task
+    response = client.patch(f"/tasks/{own}/status?status=done", headers=admin_headers)
+    assert response.json()["status"] == "done"
+
+    assert client.delete(f"/tasks/{own}", headers=auth_headers).status_code == 200
+    assert client.get(f"/tasks/{own}", headers=auth_headers).status_code == 404
+
+def test_export_streams_visible_tasks(client, auth_headers, admin_headers, monkeypatch):
+    import csv
+    import io
+    import json
+    from app.config import config
+
+    monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "a, \"quoted\" one"}, headers=auth_headers)
+    client.post("/tasks", json={"title": "Admin task"}, headers=admin_headers)
+
+    response = client.get("/tasks/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"Task {i}" for i in range(5)]
+    assert rows[0]["status"] == "todo"
+
+    response = client.get("/tasks/export", params={"format": "csv"}, headers=admin_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 6
+    assert rows[0]["description"] == 'a, "quoted" one'
+
+def _workloads(db):
+    from app.models import User, UserWorkload
+
+    db.expire_all()
+    rows = db.query(User.username, UserWorkload.open_tasks, UserWorkload.open_minutes).join(
+        UserWorkload, UserWorkload.user_id == User.id
+    )
+    return {username: (tasks, minutes) for username, tasks, minutes in rows}
+
+def test_writes_maintain_workload_counters(client, auth_headers, admin_headers, db, write_path):
+    ids = [client.post("/tasks", json={"title": f"Task {i}"}, headers=auth_headers).json()["id"] for i in range(3)]
+    response = client.post("/tasks/bulk", json=[{"title": "Bulk 1"}, {"title": "Bulk 2"}], headers=auth_headers)
+    ids += [result["id"] for result in response.json()["results"]]
+    client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers)
+    assert _workloads(db) == {"testuser": (5, 0), "adminuser": (1, 0)}
+
+    # Moving between open statuses changes nothing; DONE and back does
+    client.patch(f"/tasks/{ids[0]}/status?status=in_progress", headers=auth_headers)
+    client.patch(f"/tasks/{ids[1]}/status?status=done", headers=auth_headers)
+    client.put(f"/tasks/{ids[2]}", json={"title": "Renamed"}, headers=auth_headers)
+    assert _workloads(db)["testuser"] == (4, 0)
+
+    client.patch("/tasks/bulk/status", json=[
+        {"id": ids[1], "status": "todo"},
+        {"id": ids[3], "status": "done"},
+        {"id": ids[4], "status": "done"},
+    ], headers=auth_headers)
+    assert _workloads(db)["testuser"] == (3, 0)
+
+    client.delete(f"/tasks/{ids[0]}", headers=auth_headers)  # open
+    client.delete(f"/tasks/{ids[3]}", headers=auth_headers)  # done
+    assert _workloads(db)["testuser"] == (2, 0)
+
+    # The recount agrees with what the writes maintained
+    from app.models import Task
+
+    db.query(Task).filter(Task.id == ids[1]).update({"total_minutes": 90})
+    db.commit()
+    response = client.post("/admin/workloads/rebuild", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["users"] == 2
+    assert _workloads(db) == {"testuser": (2, 90), "adminuser": (1, 0)}
+
+def test_access_log_records_route_template_user_and_db_time(client, auth_headers, caplog):
+    import logging
+
+    task_id = client.post("/tasks", json={"title": "Logged"}, headers=auth_headers).json()["id"]
+    with caplog.at_level(logging.INFO, logger="sprintsync.access"):
+        caplog.clear()
+        client.get(f"/tasks/{task_id}", headers=auth_headers)
+        client.get("/tasks/missing", headers=auth_headers)
+
+    ok, missing = [r for r in caplog.records if r.name == "sprintsync.access"]
+    assert ok.method == "GET"
+    assert ok.path == "/tasks/{task_id}"
+    assert ok.status == 200
+    assert ok.user != "anonymous"
+    assert ok.db_queries >= 1
+    assert 0 < ok.db_ms <= ok.latency_ms
+    assert missing.status == 404
+    assert missing.levelname == "INFO"
+
+def test_access_log_covers_streamed_bodies(client, auth_headers, caplog):
+    import logging
+
+    client.post("/tasks", json={"title": "Exported"}, headers=auth_headers)
+    with caplog.at_level(logging.INFO, logger="sprintsync.access"):
+        caplog.clear()
+        response = client.get("/tasks/export", headers=auth_headers)
+    assert response.status_code == 200
+
+    [record] = [r for r in caplog.records if r.name == "sprintsync.access"]
+    assert record.path == "/tasks/export"
+    assert record.status == 200
+    # The export reads the database while streaming the body, after the
+    # endpoint has returned; those queries only count if timing runs to
+    # the last chunk
+    assert record.db_queries >= 1
+
+def test_log_time_adds_to_total_minutes(client, auth_headers, admin_headers, db, write_path):
+    task_id = client.post("/tasks", json={"title": "Timed"}, headers=auth_headers).json()["id"]
+    other = client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers).json()["id"]
+
+    response = client.post(f"/tasks/{task_id}/time", json={"minutes": 30, "note": "Spike"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["total_minutes"] == 30
+    assert response.json()["entry"]["note"] == "Spike"
+    response = client.post(f"/tasks/{task_id}/time", json={"minutes": 45}, headers=auth_headers)
+    assert response.json()["total_minutes"] == 75
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).json()["total_minutes"] == 75
+    assert _workloads(db)["testuser"] == (1, 75)
+
+    # Resending a client_entry_id returns the recorded entry and adds nothing
+    first = client.post(f"/tasks/{task_id}/time", json={"minutes": 15, "client_entry_id": "t-1"}, headers=auth_headers)
+    again = client.post(f"/tasks/{task_id}/time", json={"minutes": 15, "client_entry_id": "t-1"}, headers=auth_headers)
+    assert again.json()["duplicate"] is True
+    assert again.json()["entry"]["id"] == first.json()["entry"]["id"]
+    assert again.json()["total_minutes"] == 90
+
+    # Minutes logged on a DONE task stay out of the open workload
+    client.patch(f"/tasks/{task_id}/status?status=done", headers=auth_headers)
+    client.post(f"/tasks/{task_id}/time", json={"minutes": 10}, headers=auth_headers)
+    assert _workloads(db)["testuser"] == (0, 0)
+
+    page = client.get(f"/tasks/{task_id}/time", params={"limit": 2}, headers=auth_headers).json()
+    assert [entry["minutes"] for entry in page["items"]] == [30, 45]
+    rest = client.get(f"/tasks/{task_id}/time", params={"cursor": page["next_cursor"]}, headers=auth_headers).json()
+    assert [entry["minutes"] for entry in rest["items"]] == [15, 10]
+
+    assert client.post("/tasks/missing/time", json={"minutes": 5}, headers=auth_headers).status_code == 404
+    assert client.post(f"/tasks/{other}/time", json={"minutes": 5}, headers=auth_headers).status_code == 403
+    assert client.post(f"/tasks/{task_id}/time", json={"minutes": 0}, headers=auth_headers).status_code == 422
+    assert client.get(f"/tasks/{other}/time", headers=auth_headers).status_code == 403
+
+    from app.models import TimeEntry
+
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    assert db.query(TimeEntry).count() == 0
+
+def test_bulk_time_upload_is_idempotent(client, auth_headers, admin_headers, db, write_path):
+    a, b = [client.post("/tasks", json={"title": t}, headers=auth_headers).json()["id"] for t in ("A", "B")]
+    other = client.post("/tasks", json={"title": "Admin's"}, headers=admin_headers).json()["id"]
+    batch = [
+        {"task_id": a, "minutes": 20, "client_entry_id": "e-1"},
+        {"task_id": b, "minutes": 40, "client_entry_id": "e-2"},
+        {"task_id": a, "minutes": 5, "client_entry_id": "e-3"},
+        {"task_id": a, "minutes": 20, "client_entry_id": "e-1"},  # Repeated within the batch
+        {"task_id": other, "minutes": 60, "client_entry_id": "e-4"},
+        {"task_id": "missing", "minutes": 60, "client_entry_id": "e-5"},
+        {"task_id": b, "minutes": 10},
+    ]
+    response = client.post("/tasks/bulk/time", json=batch, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [(r["ok"], r["duplicate"], r["error_code"]) for r in body["results"]] == [
+        (True, False, None),
+        (True, False, None),
+        (True, False, None),
+        (True, True, None),
+        (False, False, "insufficient_permissions"),
+        (False, False, "task_not_found"),
+        (True, False, None),
+    ]
+    assert body["results"][3]["entry"]["id"] == body["results"][0]["entry"]["id"]
+    assert body["totals"] == {a: 25, b: 50}
+
+    # A retried flush (say the response was lost) changes nothing but the
+    # one entry without a client id
+    retry = client.post("/tasks/bulk/time", json=batch, headers=auth_headers).json()
+    assert [r["duplicate"] for r in retry["results"] if r["ok"]] == [True, True, True, True, False]
+    assert retry["results"][1]["entry"]["id"] == body["results"][1]["entry"]["id"]
+    assert retry["totals"] == {a: 25, b: 60}
+    assert _workloads(db)["testuser"] == (2, 85)
+
+    from app.models import TimeEntry
+
+    assert db.query(TimeEntry).count() == 5
+    assert client.post("/tasks/bulk/time", json=[], headers=auth_headers).json() == {"results": [], "totals": {}}
+
+def test_search_ranks_visible_tasks(client, auth_headers, admin_headers):
+    titles = {
+        "title": ("Fix the login page", "Users cannot sign in"),
+        "description": ("Sprint cleanup", "Also fixes the login redirect"),
+        "unrelated": ("Write release notes", "Summarize the sprint"),
+        "paging 1": ("Login audit", None),
+        "paging 2": ("Login metrics", None),
+    }
+    ids = {
+        name: client.post("/tasks", json={"title": title, "description": description}, headers=auth_headers).json()["id"]
+        for name, (title, description) in titles.items()
+    }
+    client.post("/tasks", json={"title": "Fix admin login"}, headers=admin_headers)
+
+    # Stemmed and punctuation-proof; a title match outranks a description match
+    response = client.get("/tasks/search", params={"q": "fixing LOGIN!"}, headers=auth_headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == [ids["title"], ids["description"]]
+    assert items[0]["rank"] > items[1]["rank"]
+
+    # Admins also find other users' tasks
+    response = client.get("/tasks/search", params={"q": "fix login"}, headers=admin_headers)
+    assert len(response.json()["items"]) == 3
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = client.get("/tasks/search", params={"q": "login", "limit": 2, "cursor": cursor}, headers=auth_headers).json()
+        assert len(page["items"]) <= 2
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+    assert sorted(seen) == sorted(ids[name] for name in ("title", "description", "paging 1", "paging 2"))
+
+    # Edits and deletes reach the index
+    client.put(f"/tasks/{ids['unrelated']}", json={"title": "Login release notes"}, headers=auth_headers)
+    client.delete(f"/tasks/{ids['title']}", headers=auth_headers)
+    found = client.get("/tasks/search", params={"q": "login", "limit": 10}, headers=auth_headers).json()["items"]
+    assert ids["unrelated"] in [item["id"] for item in found]
+    assert ids["title"] not in [item["id"] for item in found]
+
+    client.patch(f"/tasks/{ids['paging 1']}/status?status=done", headers=auth_headers)
+    done = client.get("/tasks/search", params={"q": "login", "status": "done"}, headers=auth_headers).json()["items"]
+    assert [item["id"] for item in done] == [ids["paging 1"]]
+    assert client.get("/tasks/search", params={"q": "!!"}, headers=auth_headers).json() == {"items": [], "next_cursor": None}
+    assert client.get("/tasks/search", params={"q": ""}, headers=auth_headers).status_code == 422
+
+def test_conditional_get_and_if_match(client, auth_headers, admin_headers, write_path):
+    task_id = client.post("/tasks", json={"title": "Poll me"}, headers=auth_headers).json()["id"]
+
+    response = client.get(f"/tasks/{task_id}", headers=auth_headers)
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+    response = client.get(f"/tasks/{task_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # A plain listing tags its page; the first revalidation swaps that for
+    # the tag of the count/max probe, which later polls match
+    page_etag = client.get("/tasks", headers=auth_headers).headers["etag"]
+    assert client.get("/tasks", headers=auth_headers).headers["etag"] == page_etag
+    response = client.get("/tasks", headers={**auth_headers, "If-None-Match": page_etag})
+    assert response.status_code == 200
+    list_etag = response.headers["etag"]
+    assert list_etag != page_etag
+    assert client.get("/tasks", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 304
+    # The same filters seen by someone else are a different listing
+    assert client.get("/tasks", headers={**admin_headers, "If-None-Match": list_etag}).status_code == 200
+
+    # A write with the current ETag succeeds and hands back the next one
+    response = client.put(
+        f"/tasks/{task_id}", json={"title": "Polled"}, headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+    assert client.get(f"/tasks/{task_id}", headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+    assert client.get("/tasks", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 200
+    assert client.get("/tasks", headers=auth_headers).headers["etag"] != page_etag
+
+    # The old ETag lost the race
+    response = client.patch(
+        f"/tasks/{task_id}/status?status=done", headers={**auth_headers, "If-Match": etag}
+    )
+    assert response.status_code == 412
+    assert response.json()["error_code"] == "precondition_failed"
+    assert client.get(f"/tasks/{task_id}", headers=auth_headers).json()["status"] == "todo"
+
+    response = client.patch(
+        f"/tasks/{task_id}/status?status=done", headers={**auth_headers, "If-Match": new_etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    # Ownership and existence still come first
+    assert client.put("/tasks/missing", json={"title": "x"}, headers={**auth_headers, "If-Match": etag}).status_code == 404
+    assert client.put(f"/tasks/{task_id}", json={"title": "x"}, headers={**admin_headers, "If-Match": "*"}).status_code == 200
+
+    # Deleting a task changes the listing even though max(updated_at) may not
+    other = client.post("/tasks", json={"title": "Older"}, headers=auth_headers).json()["id"]
+    list_etag = client.get("/tasks", headers={**auth_headers, "If-None-Match": '"stale"'}).headers["etag"]
+    assert client.get("/tasks", headers={**auth_headers, "If-None-Match": list_etag}).status_code == 304
+    client.delete(f"/tasks/{task_id}", headers=auth_headers)
+    response = client.get("/tasks", headers={**auth_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == [other]
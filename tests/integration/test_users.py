@@ -0,0 +1,33 @@
+def test_users_cursor_pagination(client, auth_headers, admin_headers):
+    response = client.get("/users", params={"cursor": "", "limit": 1}, headers=admin_headers)
+    assert response.status_code == 200
+    first = response.json()
+    assert [user["username"] for user in first["items"]] == ["testuser"]
+
+    response = client.get("/users", params={"cursor": first["next_cursor"], "limit": 1}, headers=admin_headers)
+    second = response.json()
+    assert [user["username"] for user in second["items"]] == ["adminuser"]
+    assert second["next_cursor"] is None
+
+def test_users_conditional_get_and_if_match(client, auth_headers, admin_headers):
+    response = client.get("/users", headers=admin_headers)
+    page_etag = response.headers["etag"]
+    list_etag = client.get("/users", headers={**admin_headers, "If-None-Match": page_etag}).headers["etag"]
+    assert client.get("/users", headers={**admin_headers, "If-None-Match": list_etag}).status_code == 304
+
+    user_id = next(user["id"] for user in response.json() if user["username"] == "testuser")
+    response = client.get(f"/users/{user_id}", headers=admin_headers)
+    etag = response.headers["etag"]
+    assert client.get(f"/users/{user_id}", headers={**admin_headers, "If-None-Match": etag}).status_code == 304
+
+    response = client.put(
+        f"/users/{user_id}", json={"email": "new@example.com"}, headers={**admin_headers, "If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    response = client.put(
+        f"/users/{user_id}", json={"email": "newer@example.com"}, headers={**admin_headers, "If-Match": etag}
+    )
+    assert response.status_code == 412
+    assert client.get("/users", headers={**admin_headers, "If-None-Match": list_etag}).status_code == 200
+    assert client.get("/users", headers=admin_headers).headers["etag"] != page_etag
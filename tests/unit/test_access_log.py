@@ -0,0 +1,62 @@
+import io
+import json
+import logging
+import queue
+
+def test_json_formatter_includes_extra_fields():
+    from app.access_log import JSONFormatter
+
+    record = logging.makeLogRecord({
+        "name": "sprintsync.access", "levelname": "INFO", "msg": "request %s", "args": ("done",),
+        "method": "GET", "status": 200,
+    })
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "request done"
+    assert entry["logger"] == "sprintsync.access"
+    assert entry["method"] == "GET"
+    assert entry["status"] == 200
+    assert "args" not in entry
+
+def test_should_log_samples_only_fast_successes(monkeypatch):
+    from app.access_log import should_log
+    from app.config import config
+
+    monkeypatch.setattr(config, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(config, "ACCESS_LOG_SLOW_MS", 500)
+    assert not should_log(200, 0.01)
+    assert should_log(404, 0.01)
+    assert should_log(500, 0.01)
+    assert should_log(200, 0.5)
+
+    monkeypatch.setattr(config, "ACCESS_LOG_SAMPLE_RATE", 1.0)
+    assert should_log(200, 0.01)
+
+def test_queue_handler_drops_records_instead_of_blocking():
+    from app.access_log import DroppingQueueHandler, log_records_dropped
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    dropped = log_records_dropped.value()
+    handler.emit(logging.makeLogRecord({"msg": "first"}))
+    handler.emit(logging.makeLogRecord({"msg": "second"}))
+    assert handler.queue.qsize() == 1
+    assert log_records_dropped.value() == dropped + 1
+
+def test_configure_logging_writes_json_from_the_listener_thread():
+    from app.access_log import configure_logging
+
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stream = io.StringIO()
+    try:
+        listener = configure_logging(stream)
+        listener.start()
+        logging.getLogger("sprintsync.test").warning("disk %s", "full", extra={"free_mb": 3})
+        listener.stop()
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "disk full"
+    assert entry["free_mb"] == 3
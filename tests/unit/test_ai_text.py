@@ -0,0 +1,41 @@
+import random
+
+def test_streamed_cleanup_matches_clean_description():
+    from app.router.ai import DescriptionCleaner
+
+    def reference(text):
+        text = text.strip().replace("**", "").replace("##", "")
+        if len(text) > 500:
+            text = text[:497] + "..."
+        return text
+
+    rng = random.Random(13)
+    for _ in range(500):
+        text = "".join(rng.choice("ab *#\n") for _ in range(rng.randint(0, 700)))
+        cleaner = DescriptionCleaner()
+        out, position = [], 0
+        while position < len(text) and not cleaner.done:
+            step = rng.randint(1, 6)
+            out.append(cleaner.feed(text[position:position + step]))
+            position += step
+        out.append(cleaner.finish())
+        assert "".join(out) == reference(text), repr(text)
+
+def test_cleaner_stops_at_the_length_cap():
+    from app.router.ai import DescriptionCleaner
+
+    cleaner = DescriptionCleaner(max_length=10)
+    assert cleaner.feed("abcdef") == "abcdef"
+    assert cleaner.feed("ghij") == "g"
+    assert cleaner.feed("k") == "..."
+    assert cleaner.done
+    assert cleaner.feed("more") == ""
+
+def test_batch_reply_parsing_keeps_valid_items_only():
+    from app.router.ai import parse_batch_reply
+
+    reply = 'Sure!\n{"items": [{"index": 1, "description": "**One**"}, {"index": 3, "description": "Three"},' \
+            ' {"index": 9, "description": "out of range"}, {"index": 2, "description": "  "}]}'
+    assert parse_batch_reply(reply, 3) == {0: "One", 2: "Three"}
+    assert parse_batch_reply("not json", 3) == {}
+    assert parse_batch_reply('{"items": "nope"}', 3) == {}
@@ -0,0 +1,39 @@
+def test_rollup_deltas_key_by_owner_creation_day_and_status():
+    from datetime import date, datetime, timedelta, timezone
+    from app.analytics import RollupDeltas, day_of
+    from app.models import TaskStatus
+
+    late = datetime(2025, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    assert day_of(late) == date(2025, 3, 2)
+    assert day_of(datetime(2025, 3, 1, 23, 30)) == date(2025, 3, 1)
+
+    created = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+    deltas = RollupDeltas()
+    deltas.created("b", created, TaskStatus.TODO)
+    deltas.created("a", created, None)
+    deltas.changed("a", created, TaskStatus.TODO, TaskStatus.DONE)
+    deltas.created("c", created, TaskStatus.IN_PROGRESS)
+    deltas.deleted("c", created, TaskStatus.IN_PROGRESS)
+    deltas.created(None, created, TaskStatus.TODO)
+
+    # A missing status counts as TODO; c nets out to nothing
+    day = date(2025, 3, 1)
+    assert deltas.items() == [
+        ("a", day, TaskStatus.DONE, 1),
+        ("b", day, TaskStatus.TODO, 1),
+    ]
+
+def test_rollup_deltas_key_minutes_by_day_of_work():
+    from datetime import date, datetime, timezone
+    from app.analytics import RollupDeltas
+
+    deltas = RollupDeltas()
+    deltas.logged("a", datetime(2025, 3, 3, 9, tzinfo=timezone.utc), 30)
+    deltas.logged("a", datetime(2025, 3, 1, 9, tzinfo=timezone.utc), 20)
+    deltas.logged("a", datetime(2025, 3, 3, 17, tzinfo=timezone.utc), 15)
+    deltas.logged("b", datetime(2025, 3, 1, 9, tzinfo=timezone.utc), 10)
+    deltas.logged("b", datetime(2025, 3, 1, 11, tzinfo=timezone.utc), -10)
+    deltas.logged(None, datetime(2025, 3, 1, 9, tzinfo=timezone.utc), 5)
+
+    assert deltas.minute_items() == [("a", date(2025, 3, 1), 20), ("a", date(2025, 3, 3), 45)]
+    assert deltas.items() == []
@@ -0,0 +1,52 @@
+def test_ttl_cache_evicts_least_recently_used():
+    from app.cache import TTLCache
+
+    cache = TTLCache("test-lru", max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_ttl_cache_expires_entries():
+    from app.cache import TTLCache
+
+    now = [100.0]
+    cache = TTLCache("test-ttl", max_size=10, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=102.0)
+
+    now[0] = 103.0
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    now[0] = 106.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_ttl_cache_counts_hits_and_misses():
+    from app.cache import TTLCache, cache_requests
+
+    cache = TTLCache("test-counters", max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    assert cache_requests.value(cache="test-counters", result="hit") == 1
+    assert cache_requests.value(cache="test-counters", result="miss") == 1
+
+def test_token_cache_honours_exp():
+    import hashlib
+    import time
+    from datetime import timedelta
+    from app.auth import create_access_token, decode_access_token, token_cache
+
+    token = create_access_token({"sub": "someone"}, expires_delta=timedelta(seconds=2))
+    assert decode_access_token(token)["sub"] == "someone"
+
+    digest = hashlib.sha256(token.encode()).digest()
+    _, expires_at = token_cache._entries[digest]
+    assert expires_at <= time.monotonic() + 2.5
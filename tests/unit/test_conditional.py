@@ -0,0 +1,52 @@
+def _request(**headers):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+def test_if_match_round_trips_row_etags():
+    from datetime import datetime, timezone
+    from app.conditional import if_match_versions, row_etag, version_matches
+
+    version = datetime(2025, 1, 2, 3, 4, 5, 600, tzinfo=timezone.utc)
+    etag = row_etag(version)
+    # SQLite hands back the same moment naive
+    assert row_etag(version.replace(tzinfo=None)) == etag
+
+    versions = if_match_versions(_request(if_match=f'"1", {etag}'))
+    assert version_matches(version.replace(tzinfo=None), versions)
+    assert if_match_versions(_request()) is None
+    assert if_match_versions(_request(if_match="*")) is None
+    # Weak, malformed and out-of-range tags never match
+    assert if_match_versions(_request(if_match=f'W/{etag}, "abc", "{"9" * 30}"')) == []
+
+def test_not_modified_uses_weak_comparison():
+    from fastapi import Response
+    from app.conditional import collection_etag, not_modified
+
+    etag = collection_etag(3, None, "user-1")
+    assert etag != collection_etag(3, None, "user-2")
+
+    cached = not_modified(_request(if_none_match=f'"other", W/{etag}'), Response(), etag, None)
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+    response = Response()
+    assert not_modified(_request(if_none_match='"other"'), response, etag, None) is None
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "private, no-cache"
+
+def test_page_etag_covers_ids_versions_and_extras():
+    from datetime import datetime, timezone
+    from app.conditional import page_etag
+
+    first = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    later = datetime(2025, 1, 3, tzinfo=timezone.utc)
+    etag, last_modified = page_etag([("a", first), ("b", later.replace(tzinfo=None))], "user-1")
+    assert last_modified == later
+    assert etag == page_etag([("a", first), ("b", later)], "user-1")[0]
+    assert etag != page_etag([("a", later), ("b", later)], "user-1")[0]
+    assert etag != page_etag([("a", first), ("b", later)], "user-1", "next-cursor")[0]
+    assert page_etag([], "user-1") == (page_etag([], "user-1")[0], None)
@@ -0,0 +1,72 @@
+def test_make_async_url_picks_driver_per_backend():
+    from app.database import make_async_url
+
+    assert make_async_url("postgresql://u:p@localhost:5432/sprintsync") == (
+        "postgresql+asyncpg://u:p@localhost:5432/sprintsync"
+    )
+    assert make_async_url("postgresql+psycopg2://u:p@db/app").startswith("postgresql+asyncpg://")
+    assert make_async_url("sqlite:///./local.db") == "sqlite+aiosqlite:///./local.db"
+
+def test_get_db_yields_async_session():
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.database import get_db
+
+    async def run():
+        generator = get_db()
+        session = await generator.__anext__()
+        assert isinstance(session, AsyncSession)
+        await generator.aclose()
+
+    asyncio.run(run())
+
+def test_engine_options_follow_settings(monkeypatch):
+    from app.config import config
+    from app.database import InstrumentedNullPool, InstrumentedQueuePool, async_engine_options
+
+    monkeypatch.setattr(config, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(config, "DB_POOL_RECYCLE", 300)
+    options = async_engine_options("postgresql://u:p@db/app")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+    assert options["pool_recycle"] == 300
+    assert options["pool_pre_ping"] is True
+
+    monkeypatch.setattr(config, "DB_PGBOUNCER", True)
+    options = async_engine_options("postgresql://u:p@db/app")
+    assert options["poolclass"] is InstrumentedNullPool
+
+def test_pgbouncer_options_disable_prepared_statement_reuse(monkeypatch):
+    from app.config import config
+    from app.database import async_engine_options
+
+    monkeypatch.setattr(config, "DB_PGBOUNCER", True)
+    connect_args = async_engine_options("postgresql://u:p@db/app")["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    first, second = name_func(), name_func()
+    assert first.startswith("__asyncpg_") and first != second
+    # SQLite gets no asyncpg arguments
+    assert "connect_args" not in async_engine_options("sqlite:///./local.db")
+
+def test_slow_checkouts_are_counted(monkeypatch, tmp_path):
+    import asyncio
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.config import config
+    from app.database import InstrumentedQueuePool, pool_checkout_seconds, pool_slow_checkouts
+
+    monkeypatch.setattr(config, "DB_SLOW_CHECKOUT_MS", -1)
+    slow_before = pool_slow_checkouts.value()
+    count_before = pool_checkout_seconds.samples()[0][1]["count"] if pool_checkout_seconds.samples() else 0
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool)
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        await engine.dispose()
+
+    asyncio.run(run())
+    assert pool_slow_checkouts.value() == slow_before + 1
+    assert pool_checkout_seconds.samples()[0][1]["count"] == count_before + 1
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+import pytest
+
+def test_hasher_round_trip():
+    from app.hashing import PasswordHasher
+
+    hasher = PasswordHasher(workers=1, max_pending=4)
+
+    async def run():
+        hashed = await hasher.hash("s3cret")
+        assert await hasher.verify("s3cret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+
+    asyncio.run(run())
+    hasher.shutdown()
+
+def test_hasher_rejects_when_queue_is_full():
+    from app.exceptions import ServiceBusy
+    from app.hashing import PasswordHasher, hash_rejected
+
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    release = threading.Event()
+    rejected_before = hash_rejected.value(operation="hash")
+
+    async def run():
+        blocked = asyncio.ensure_future(hasher._run("hash", release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceBusy):
+            await hasher.hash("another")
+        release.set()
+        await blocked
+        assert hasher.pending == 0
+
+    asyncio.run(run())
+    hasher.shutdown()
+    assert hash_rejected.value(operation="hash") == rejected_before + 1
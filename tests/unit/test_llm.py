@@ -0,0 +1,80 @@
+import asyncio
+
+import groq
+import httpx
+import pytest
+
+from benchmarks.fake_llm import FakeLLM
+
+def make_client(fake, **kwargs):
+    from app.llm import create_llm_client
+
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app))
+    kwargs.setdefault("backoff", 0)
+    return create_llm_client(
+        api_key="fake", base_url="http://fake-llm", http_client=http_client, **kwargs
+    )
+
+def test_no_api_key_means_no_client(monkeypatch):
+    from app.config import config
+    from app.llm import create_llm_client
+
+    monkeypatch.setattr(config, "GROQ_API_KEY", "")
+    assert create_llm_client() is None
+
+def test_complete_returns_model_reply():
+    fake = FakeLLM(reply="Do the thing")
+    llm = make_client(fake)
+
+    async def run():
+        assert await llm.complete("prompt") == "Do the thing"
+        await llm.aclose()
+
+    asyncio.run(run())
+    assert fake.requests == 1
+
+def test_transient_errors_are_retried():
+    from app.llm import llm_retries
+
+    fake = FakeLLM(reply="ok", fail_first=2)
+    llm = make_client(fake, max_retries=2)
+    retries_before = llm_retries.value(error="InternalServerError")
+
+    async def run():
+        assert await llm.complete("prompt") == "ok"
+        await llm.aclose()
+
+    asyncio.run(run())
+    assert fake.requests == 3
+    assert llm_retries.value(error="InternalServerError") == retries_before + 2
+
+def test_retries_give_up_after_max_retries():
+    fake = FakeLLM(fail_first=10)
+    llm = make_client(fake, max_retries=1)
+
+    async def run():
+        with pytest.raises(groq.InternalServerError):
+            await llm.complete("prompt")
+        await llm.aclose()
+
+    asyncio.run(run())
+    assert fake.requests == 2
+
+def test_concurrency_is_bounded():
+    fake = FakeLLM(latency=0.05)
+    llm = make_client(fake, max_concurrency=2)
+
+    async def run():
+        await asyncio.gather(*(llm.complete(f"prompt {i}") for i in range(6)))
+        await llm.aclose()
+
+    asyncio.run(run())
+    assert fake.requests == 6
+    assert fake.max_in_flight == 2
+
+def test_backoff_delay_is_jittered_and_capped():
+    from app.llm import MAX_BACKOFF_SECONDS, backoff_delay
+
+    delays = [backoff_delay(attempt, 0.5) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= MAX_BACKOFF_SECONDS for delay in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,72 @@
+import os
+
+def test_render_prometheus_text():
+    from app.metrics import MetricsRegistry, render_prometheus
+
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run", ["kind"]).inc(3, kind='say "hi"')
+    registry.histogram("job_seconds", "Job time", buckets=(0.1, 1.0)).observe(0.5)
+
+    text = render_prometheus(registry.export())
+    assert text.splitlines() == [
+        "# HELP job_seconds Job time",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 0',
+        'job_seconds_bucket{le="1.0"} 1',
+        'job_seconds_bucket{le="+Inf"} 1',
+        "job_seconds_sum 0.5",
+        "job_seconds_count 1",
+        "# HELP jobs_total Jobs run",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 3',
+    ]
+
+def test_metrics_files_merge_across_workers(tmp_path):
+    from app.metrics import MetricsRegistry, merge_metrics_files, write_metrics_file
+
+    dead_pid = 2 ** 22 + 1  # above Linux's pid_max, so never running
+    for pid, requests in ((os.getpid(), 2), (dead_pid, 5)):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(requests)
+        registry.histogram("latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+        registry.gauge("in_flight", "In flight", multiprocess_mode="sum").set(requests)
+        registry.gauge("index_users", "Index size").set(requests)
+        write_metrics_file(str(tmp_path), registry.export(), pid=pid)
+
+    merged = merge_metrics_files(str(tmp_path))
+    assert merged["requests_total"]["samples"] == [({}, 7)]
+    assert merged["latency_seconds"]["samples"] == [({}, {"count": 2, "sum": 1.0, "buckets": [2]})]
+    # Gauges of the exited worker are gone; "all" gauges get a worker label
+    assert merged["in_flight"]["samples"] == [({}, 2)]
+    assert merged["index_users"]["samples"] == [({"worker": str(os.getpid())}, 2)]
+
+def test_exited_workers_are_compacted_without_losing_totals(tmp_path):
+    from app.metrics import (
+        ARCHIVE_FILE, MetricsRegistry, compact_metrics_files, merge_metrics_files, write_metrics_file,
+    )
+
+    dead_pid = 2 ** 22 + 1
+    directory = str(tmp_path)
+    # The same PID twice, as when the OS hands a dead worker's PID to its
+    # replacement: each run gets a file of its own
+    for pid, requests in ((dead_pid, 5), (dead_pid, 3), (os.getpid(), 2)):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(requests)
+        registry.gauge("index_users", "Index size").set(requests)
+        write_metrics_file(directory, registry.export(), pid=pid)
+    assert merge_metrics_files(directory)["requests_total"]["samples"] == [({}, 10)]
+
+    assert compact_metrics_files(directory) == 2
+    assert compact_metrics_files(directory) == 0
+    [live_file] = tmp_path.glob(f"metrics-{os.getpid()}-*.json")
+    assert {p.name for p in tmp_path.glob("metrics-*.json")} == {ARCHIVE_FILE, live_file.name}
+    merged = merge_metrics_files(directory)
+    assert merged["requests_total"]["samples"] == [({}, 10)]
+    assert merged["index_users"]["samples"] == [({"worker": str(os.getpid())}, 2)]
+
+    # Later exits add to the archive
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests").inc(4)
+    write_metrics_file(directory, registry.export(), pid=dead_pid)
+    assert compact_metrics_files(directory) == 1
+    assert merge_metrics_files(directory)["requests_total"]["samples"] == [({}, 14)]
@@ -0,0 +1,18 @@
+def test_cursor_round_trips_typed_values():
+    from datetime import datetime, timezone
+    from app.models import Task, TaskStatus
+    from app.pagination import decode_cursor, encode_cursor
+
+    columns = (Task.created_at, Task.status, Task.id)
+    values = [datetime(2025, 1, 2, 3, 4, 5, 600, tzinfo=timezone.utc), TaskStatus.DONE, "abc"]
+
+    assert decode_cursor(encode_cursor(values), columns) == values
+
+def test_cursor_with_wrong_shape_is_invalid():
+    import pytest
+    from app.exceptions import InvalidCursor
+    from app.models import Task
+    from app.pagination import decode_cursor, encode_cursor
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(["only-one"]), (Task.created_at, Task.id))
@@ -0,0 +1,214 @@
+import pytest
+
+def make_index(dim=256):
+    from app.skills import SkillsIndex
+
+    index = SkillsIndex(dim)
+    index.add_many([
+        ("alice", "Fix React component rendering in the dashboard"),
+        ("alice", "Add React hooks for form state"),
+        ("bob", "Tune Postgres query plans and indexes"),
+        ("bob", "Migrate Postgres schema with Alembic"),
+        ("carol", "Write onboarding documentation"),
+    ])
+    return index
+
+def test_top_k_ranks_by_skill_overlap():
+    index = make_index()
+
+    matches = index.top_k("Slow Postgres query on the tasks table", k=3)
+    assert matches[0][0] == "bob"
+    assert 0 < matches[0][1] <= 1
+    assert "carol" not in [user_id for user_id, _ in matches]
+
+    assert index.top_k("React form validation")[0][0] == "alice"
+    assert index.top_k("zzz qqq") == []
+
+def test_incremental_adds_and_growth():
+    from app.skills import SkillsIndex
+
+    index = SkillsIndex(4096)
+    for i in range(200):
+        index.add(f"user-{i}", f"skill{i} generic work")
+    assert len(index) == 200
+    assert index.top_k("skill150", k=1)[0][0] == "user-150"
+
+    index.add("user-3", "kubernetes deployment")
+    assert index.top_k("kubernetes", k=1)[0][0] == "user-3"
+
+def test_snapshot_round_trip(tmp_path):
+    from app.skills import SkillsIndex
+
+    index = make_index()
+    path = str(tmp_path / "skills.npz")
+    index.save(path)
+
+    loaded = SkillsIndex(256, path)
+    assert loaded.load()
+    assert loaded.user_ids == index.user_ids
+    assert loaded.documents == index.documents
+    assert loaded.top_k("Postgres indexes") == pytest.approx(index.top_k("Postgres indexes"))
+
+    # A snapshot built with a different feature size is ignored
+    assert not SkillsIndex(512, path).load()
+    assert not SkillsIndex(256, str(tmp_path / "missing.npz")).load()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["skills.npz"]
+
+def test_snapshot_is_rebuilt_once_the_database_moves_on(tmp_path, db, async_session_factory):
+    import asyncio
+
+    from app.models import Task, TaskStatus, User
+    from app.skills import SkillsIndex
+
+    db.add(User(id="u1", username="u1", email="u1@example.com"))
+    db.add(Task(id="t1", title="Tune Postgres indexes", status=TaskStatus.DONE, user_id="u1"))
+    db.commit()
+    path = str(tmp_path / "skills.npz")
+    index = SkillsIndex(256, path)
+    asyncio.run(index.load_or_build(async_session_factory))
+    assert index.watermark[0] == 1
+
+    # Nothing written since: the snapshot is used as it is
+    stale = SkillsIndex(256, path)
+    stale.add("ghost", "Postgres")
+    stale.watermark = index.watermark
+    stale.save()
+    asyncio.run(index.load_or_build(async_session_factory))
+    assert "ghost" in index.user_ids
+
+    # A task leaving DONE moves the watermark, so the snapshot is rebuilt
+    index.save()
+    db.get(Task, "t1").status = TaskStatus.TODO
+    db.commit()
+    asyncio.run(index.load_or_build(async_session_factory))
+    assert index.user_ids == [] and index.watermark[0] == 0
+
+def test_deltas_add_and_subtract_task_vectors():
+    index = make_index()
+    index.top_k("warm up weights")
+
+    # bob's Postgres tasks leave DONE, a React one enters; dave never had a row
+    index.apply_deltas([
+        ("bob", -1, "Tune Postgres query plans and indexes"),
+        ("bob", -1, "Migrate Postgres schema with Alembic"),
+        ("bob", 1, "Design React component library"),
+        ("dave", -1, "Anything"),
+    ])
+    assert index.documents == 4
+    assert "dave" not in index.user_ids
+    assert {user_id for user_id, _ in index.top_k("React component")} == {"alice", "bob"}
+    assert index.top_k("Postgres indexes") == []
+
+    # Adding a vector back and taking it away again leaves the row as it was
+    before = index.top_k("React component")
+    index.apply_deltas([("carol", 1, "React docs")])
+    index.apply_deltas([("carol", -1, "React docs")])
+    assert index.top_k("React component") == pytest.approx(before)
+
+def test_profile_updater_debounces_and_batches():
+    import asyncio
+
+    from app.models import TaskStatus, utcnow
+    from app.skills import ProfileUpdater, SkillsIndex, skills_profile_lag
+
+    index = SkillsIndex(1024)
+    updater = ProfileUpdater(index, debounce=0.05, max_delay=1, batch_size=10)
+    batches = []
+    apply_deltas = index.apply_deltas
+    index.apply_deltas = lambda deltas: (
+        batches.append(deltas := list(deltas)), apply_deltas(deltas)
+    )
+    applied_before = skills_profile_lag.samples()[0][1]["count"] if skills_profile_lag.samples() else 0
+
+    now = utcnow()
+
+    async def run():
+        updater.start(None)
+        updater.task_changed("u1", TaskStatus.TODO, "Kafka consumer", TaskStatus.DONE, "Kafka consumer", now)
+        # Edits of a DONE task swap its text; TODO tasks are left out
+        updater.task_changed("u1", TaskStatus.DONE, "Kafka consumer", TaskStatus.DONE, "Kafka consumer tuning", now)
+        updater.task_changed("u2", TaskStatus.TODO, "Unfinished Kafka", TaskStatus.TODO, "Unfinished Kafka work", now)
+        updater.task_changed("u2", None, None, TaskStatus.DONE, "Terraform modules", now)
+        for _ in range(3):
+            await asyncio.sleep(0.01)
+            updater.task_changed("u2", TaskStatus.DONE, "Terraform modules", TaskStatus.DONE, "Terraform modules", now)
+        assert batches == []  # still inside the debounce window
+        await asyncio.sleep(0.2)
+        await updater.stop()
+
+    asyncio.run(run())
+    assert len(batches) == 1
+    assert sorted({user_id for user_id, _, _ in batches[0]}) == ["u1", "u2"]
+    assert [(sign, text) for user_id, sign, text in batches[0] if user_id == "u1"] == [
+        (1, "Kafka consumer"), (-1, "Kafka consumer"), (1, "Kafka consumer tuning"),
+    ]
+    assert updater.pending == 0
+    assert index.documents == 2
+    assert [user_id for user_id, _ in index.top_k("kafka tuning")] == ["u1"]
+    assert skills_profile_lag.samples()[0][1]["count"] == applied_before + 2
+
+def test_rebuild_drops_queued_deltas_it_already_read(db, async_session_factory):
+    import asyncio
+    from datetime import timedelta
+
+    from app.models import Task, TaskStatus, User
+    from app.skills import ProfileUpdater, SkillsIndex
+
+    db.add(User(id="u1", username="u1", email="u1@example.com"))
+    db.add(Task(id="t1", title="Tune Postgres indexes", status=TaskStatus.DONE, user_id="u1"))
+    db.commit()
+    written_at = db.get(Task, "t1").updated_at
+    index = SkillsIndex(256)
+    updater = ProfileUpdater(index, debounce=0, max_delay=0, batch_size=10)
+    rebuild = index.rebuild
+
+    async def racing_rebuild(session_factory):
+        # t1's write commits after the queue was swapped out, so its delta
+        # is queued again while the rebuild reads t1 from the database
+        updater.task_changed("u1", TaskStatus.TODO, "", TaskStatus.DONE, "Tune Postgres indexes", written_at)
+        updater.task_changed(
+            "u1", None, None, TaskStatus.DONE, "Write Kafka consumers", written_at + timedelta(seconds=1)
+        )
+        await rebuild(session_factory)
+
+    index.rebuild = racing_rebuild
+
+    async def run():
+        await updater.rebuild(async_session_factory)
+        assert [text for _, text, _ in updater._deltas["u1"]] == ["Write Kafka consumers"]
+        await updater.flush()
+
+    asyncio.run(run())
+    assert index.documents == 2
+    assert index.top_k("Postgres indexes")[0][0] == "u1"
+
+def test_profiles_that_go_negative_are_reread(db, async_session_factory):
+    import asyncio
+
+    from app.models import Task, TaskStatus, User, utcnow
+    from app.skills import ProfileUpdater, SkillsIndex
+
+    db.add(User(id="u1", username="u1", email="u1@example.com"))
+    db.add_all([
+        Task(id="t1", title="Write Kafka consumers", status=TaskStatus.DONE, user_id="u1"),
+        Task(id="t2", title="Terraform modules", status=TaskStatus.TODO, user_id="u1"),
+        Task(id="t3", title="Draft Kafka notes", status=TaskStatus.TODO, user_id="u1"),
+    ])
+    db.commit()
+    # A stale snapshot: it saw t2 done but neither t1 nor t3 ever being done
+    index = SkillsIndex(256)
+    index.add_many([("u1", "Terraform modules"), ("u2", "React hooks")])
+    updater = ProfileUpdater(index, debounce=0, max_delay=0, batch_size=10)
+
+    async def run():
+        updater.start(async_session_factory)
+        updater.task_changed("u1", TaskStatus.DONE, "Terraform modules", TaskStatus.TODO, "Terraform modules", utcnow())
+        updater.task_changed("u1", TaskStatus.DONE, "Draft Kafka notes", TaskStatus.TODO, "Draft Kafka notes", utcnow())
+        await updater.flush()
+        await updater.stop()
+
+    asyncio.run(run())
+    assert index.negative_users(["u1", "u2"]) == []
+    assert index.documents == 2
+    assert index.top_k("Kafka")[0][0] == "u1"
+    assert index.top_k("Terraform") == []
@@ -0,0 +1,78 @@
+import asyncio
+
+from app.cache import TTLCache
+
+def make_cache(persist=False):
+    from app.suggestions import SuggestionCache
+
+    return SuggestionCache(TTLCache("test_suggestions", 10, 60), persist=persist)
+
+def test_titles_are_normalized_per_model():
+    from app.suggestions import normalize_title, suggestion_key
+
+    assert normalize_title("  Fix   Login bug ") == "fix login bug"
+    assert suggestion_key("m", "Fix login bug") == suggestion_key("m", "fix login bug ")
+    assert suggestion_key("m", "Fix login bug") != suggestion_key("other", "Fix login bug")
+
+def test_concurrent_identical_requests_share_one_call():
+    from app.suggestions import suggestion_lookups
+
+    cache = make_cache()
+    calls = []
+    coalesced_before = suggestion_lookups.value(source="coalesced")
+
+    async def produce():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "description"
+
+    async def run():
+        results = await asyncio.gather(
+            *(cache.get_or_create("m", f"Fix login bug{' ' * i}", produce) for i in range(5))
+        )
+        assert results == ["description"] * 5
+        assert await cache.get_or_create("m", "FIX LOGIN BUG", produce) == "description"
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert suggestion_lookups.value(source="coalesced") == coalesced_before + 4
+
+def test_failures_reach_waiters_and_are_not_cached():
+    cache = make_cache()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream down")
+
+    async def succeed():
+        return "recovered"
+
+    async def run():
+        results = await asyncio.gather(
+            cache.get_or_create("m", "title", fail),
+            cache.get_or_create("m", "title", fail),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+        assert await cache.get_or_create("m", "title", succeed) == "recovered"
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+def test_persisted_suggestions_survive_a_cold_memory_cache(async_session_factory):
+    calls = []
+
+    async def produce():
+        calls.append(1)
+        return "persisted"
+
+    async def run():
+        async with async_session_factory() as db:
+            assert await make_cache(persist=True).get_or_create("m", "Title", produce, db=db) == "persisted"
+        async with async_session_factory() as db:
+            assert await make_cache(persist=True).get_or_create("m", "title", produce, db=db) == "persisted"
+
+    asyncio.run(run())
+    assert len(calls) == 1
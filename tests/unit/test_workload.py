@@ -0,0 +1,30 @@
+def test_workload_deltas_track_open_tasks():
+    from app.models import TaskStatus
+    from app.workload import WorkloadDeltas, task_load
+
+    assert task_load(TaskStatus.TODO, None) == (1, 0)
+    assert task_load(TaskStatus.IN_PROGRESS, 45) == (1, 45)
+    assert task_load(TaskStatus.DONE, 45) == (0, 0)
+
+    deltas = WorkloadDeltas()
+    deltas.created("b", TaskStatus.TODO, 0)
+    deltas.created("a", TaskStatus.TODO, 0)
+    deltas.changed("a", TaskStatus.TODO, 30, TaskStatus.IN_PROGRESS, 30)
+    deltas.changed("b", TaskStatus.IN_PROGRESS, 30, TaskStatus.DONE, 30)
+    deltas.deleted("c", TaskStatus.DONE, 10)
+    deltas.created(None, TaskStatus.TODO, 0)
+
+    # c nets out to nothing and is left out; rows come in user_id order
+    assert deltas.items() == [("a", 1, 0), ("b", 0, -30)]
+
+def test_matching_score_discounts_busy_users(monkeypatch):
+    from app.config import config
+    from app.workload import matching_score
+
+    monkeypatch.setattr(config, "AUTO_ASSIGN_TASK_WEIGHT", 0.1)
+    monkeypatch.setattr(config, "AUTO_ASSIGN_HOUR_WEIGHT", 0.05)
+
+    assert matching_score(0.8, 0, 0) == 0.8
+    assert matching_score(0.8, 10, 0) == 0.4
+    assert matching_score(0.8, 0, 1200) == 0.4
+    assert matching_score(0.8, 10, 0) < matching_score(0.6, 0, 0)